@@ -1,9 +1,9 @@
 """Unified action dispatcher: routes actions to connectors for dry_run or execute."""
 
-import asyncio
 import logging
 
 from connectors import slack, linear, email_connector
+from utils.executors import browser_executor
 
 logger = logging.getLogger(__name__)
 
@@ -150,7 +150,7 @@ async def _execute_calendar(payload: dict, lang: str = "en") -> dict:
         )
 
         agent = GoogleCalendarAgent(lang=lang)
-        result = await asyncio.to_thread(agent.check_and_create_event, cmd)
+        result = await browser_executor.run(agent.check_and_create_event, cmd)
 
         if result.conflict:
             suggestion = (
@@ -1,33 +1,44 @@
 """FastAPI routes for the Autopilot system."""
 
 import asyncio
+import json
 import logging
+import os
 import uuid
+from collections.abc import Callable
+from contextlib import suppress
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from openai import AsyncOpenAI
 
 from ai_client import get_openai_client
 from actions.calendar import enrich_calendar_title, finalize_calendar_payload, build_calendar_confirmation
 from actions.dispatcher import dry_run_action, execute_action
 from actions.enrichment import (
-    build_rag_query,
-    enrich_actions,
     append_confirmation_to_slack_payload,
     append_confirmation_to_email_payload,
     merge_extracted_actions,
     determine_final_status,
 )
-from extraction.autopilot_extractor import extract_autopilot_json
 from extraction.calendar_extractor import extract_calendar_event
-from extraction.reply_drafter import generate_reply_draft
-from connectors.email_connector import build_email_content
-from rag.retrieve import retrieve
-from resources.base import ResourceFailed
+from store.jobs import JobRetry, enqueue_job, get_job, job_workers
 from store.runs import create_run, update_run, get_run, list_runs
-from api.models import AutopilotRunRequest, AutopilotConfirmRequest, AutopilotAdjustRequest
-from speech.speech import transcribe_audio_base64
+from api.models import AutopilotRunRequest, AutopilotBatchRequest, AutopilotConfirmRequest, AutopilotAdjustRequest
+from api.pipeline import (
+    PipelineError,
+    batch_events,
+    create_batch_runs,
+    error_status,
+    pipeline_error,
+    pipeline_events,
+    run_pipeline,
+)
+from speech.scheduler import SttOverloaded
+from speech.speech import AUDIO_FORMATS, STT_SAMPLE_RATE, transcribe_audio_base64, transcribe_audio_file_async
+from utils.executors import io_executor
+from utils.file_utils import UploadTooLarge, save_stream_to_temp
 from utils.lang import normalize_lang
 from utils.timezone import now as now_toronto
 
@@ -43,8 +54,66 @@ async def autopilot_run(
     req: AutopilotRunRequest,
     client: Annotated[AsyncOpenAI, Depends(get_openai_client)],
 ):
+    run_id, source = _start_run(req)
+    return await _run_pipeline(run_id, client, **source)
+
+
+# --- POST /autopilot/run/stream ---
+
+STREAM_FORMATS = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
+
+@router.post("/run/stream")
+async def autopilot_run_stream(
+    req: AutopilotRunRequest,
+    client: Annotated[AsyncOpenAI, Depends(get_openai_client)],
+    stream_format: Annotated[str, Query(alias="format")] = "sse",
+):
+    """Same pipeline as /autopilot/run, streamed as each stage completes.
+
+    Events: `run`, `progress` (long-audio chunks), `transcribed`, `extracted`,
+    `evidence`, `draft_delta` (reply text as the model writes it), `draft`,
+    `previewed`, or a final `error` with the status code
+    and detail /autopilot/run would have answered with. `format=sse` (default)
+    sends Server-Sent Events, `format=ndjson` one JSON object per line.
+    """
+    stream_format = stream_format.lower()
+    if stream_format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    run_id, source = _start_run(req)
+
+    async def body():
+        yield _encode_event(stream_format, "run", {"run_id": run_id})
+        try:
+            async for event, data in pipeline_events(run_id, client, stream_draft=True, **source):
+                yield _encode_event(stream_format, event, data)
+        except Exception as e:
+            status, detail = error_status(pipeline_error(run_id, e))
+            yield _encode_event(stream_format, "error", {"status_code": status, "detail": detail})
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_FORMATS[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _encode_event(stream_format: str, event: str, data: dict) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({"event": event, "data": data}, ensure_ascii=False, default=str) + "\n"
+
+
+def _start_run(req: AutopilotRunRequest) -> tuple[str, dict]:
+    """Validate a /run request, create its run row, return the pipeline source."""
     run_id = str(uuid.uuid4())
+    create_run(run_id, req.mode, _raw_input(req), run_type="autopilot")
+    return run_id, _run_source(req)
+
 
+def _raw_input(req: AutopilotRunRequest) -> str:
+    """Validate a /run request and return what its run row records as input."""
     if req.mode == "audio":
         if not req.audio_base64:
             raise HTTPException(status_code=400, detail="audio_base64 is required for audio mode")
@@ -55,76 +124,222 @@ async def autopilot_run(
         raw_input = req.text
     else:
         raise HTTPException(status_code=400, detail="mode must be 'audio' or 'text'")
+    return raw_input or ""
 
-    create_run(run_id, req.mode, raw_input or "", run_type="autopilot")
 
-    try:
-        # Step 1: Transcription
-        if req.mode == "audio":
-            transcript = await transcribe_audio_base64(req.audio_base64, lang=normalize_lang(req.locale))
-        else:
-            transcript = req.text.strip()
+def _run_source(req: AutopilotRunRequest) -> dict:
+    """The `text=` or `transcribe=` argument of `pipeline_events` for a request."""
+    async def transcribe(on_progress: Callable[[int, int], None]) -> str:
+        return await transcribe_audio_base64(
+            req.audio_base64,
+            lang=normalize_lang(req.locale),
+            on_progress=on_progress,
+        )
 
-        if not transcript:
-            raise HTTPException(status_code=400, detail="Empty transcript")
+    if req.mode == "audio":
+        return {"transcribe": transcribe}
+    return {"text": req.text}
 
-        update_run(run_id, transcript=transcript, status="transcribed")
 
-        # Step 2: Extraction via Tool Calling
-        extracted = await extract_autopilot_json(transcript, client=client, run_id=run_id)
-        update_run(run_id, extracted_json=extracted, status="extracted")
+# --- POST /autopilot/jobs ---
 
-        # Step 3: RAG retrieval
-        evidence = await retrieve(build_rag_query(extracted), client)
-        update_run(run_id, evidence_json=evidence)
+@router.post("/jobs", status_code=202)
+async def autopilot_submit_job(req: AutopilotRunRequest):
+    """Queue a run of the /autopilot/run pipeline and return its run_id at once.
 
-        # Step 4: Reply draft
-        draft = await generate_reply_draft(client, transcript, extracted, evidence, run_id=run_id)
+    The job is stored in SQLite and picked up by a job worker in any backend
+    process. Poll GET /autopilot/jobs/{run_id} or subscribe to
+    GET /autopilot/jobs/{run_id}/events for its progress.
+    """
+    run_id = str(uuid.uuid4())
+    create_run(run_id, req.mode, _raw_input(req), run_type="autopilot")
+    enqueue_job(run_id, req.model_dump())
+    job_workers.notify()
+    return {"run_id": run_id, "status": "queued"}
 
-        entities = extracted.get("entities") or {}
-        email_content = build_email_content(draft, extracted) if entities.get("email") else None
 
-        reply_payload = {
-            "text": draft.get("reply_text", ""),
-            "reply_text": draft.get("reply_text", ""),
-            "citations": draft.get("citations", []),
-            "html": email_content.get("body_html", "") if email_content else "",
-            "subject": email_content.get("subject", "") if email_content else "",
-            "to": email_content.get("to", "") if email_content else "",
-            "from": email_content.get("from_display", "") if email_content else "",
-            "body_text": email_content.get("body_text", "") if email_content else "",
-        }
-        update_run(run_id, reply_draft=reply_payload, status="drafted")
+# --- GET /autopilot/jobs/{run_id} ---
+
+@router.get("/jobs/{run_id}")
+async def autopilot_job_status(run_id: str):
+    """Job status, the stage the run has reached and, once done, its result."""
+    status = await io_executor.run(_job_status, run_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Job {run_id} not found")
+    return status
 
-        # Step 5: Enrich & dry_run preview (parallelized)
-        actions = extracted.get("next_best_actions", [])
-        actions = await enrich_actions(actions, extracted, draft, email_content, transcript)
 
-        previews = await asyncio.gather(*[dry_run_action(a) for a in actions])
-        actions_preview = [
-            {**action, "preview": preview.get("preview", "")}
-            for action, preview in zip(actions, previews)
-        ]
-        update_run(run_id, actions_json=actions_preview, status="previewed")
+# --- GET /autopilot/jobs/{run_id}/events ---
 
-        return {
+@router.get("/jobs/{run_id}/events")
+async def autopilot_job_events(
+    run_id: str,
+    stream_format: Annotated[str, Query(alias="format")] = "sse",
+):
+    """Follow a job: a `status` event whenever its status, stage or progress
+    changes, then `result` or `error`. Formats as for /autopilot/run/stream."""
+    stream_format = stream_format.lower()
+    if stream_format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    if await io_executor.run(get_job, run_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {run_id} not found")
+
+    async def body():
+        last = None
+        while True:
+            status = await io_executor.run(_job_status, run_id)
+            if status is None:  # deleted while we were following it
+                yield _encode_event(stream_format, "error", {"status_code": 404, "detail": f"Job {run_id} not found"})
+                return
+            result = status.pop("result", None)
+            if status != last:
+                yield _encode_event(stream_format, "status", status)
+                last = status
+            if status["status"] == "done":
+                yield _encode_event(stream_format, "result", result)
+                return
+            if status["status"] == "error":
+                yield _encode_event(stream_format, "error", {"detail": status["error"]})
+                return
+            await asyncio.sleep(job_workers.poll_s)
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_FORMATS[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _job_status(run_id: str) -> dict | None:
+    job = get_job(run_id)
+    if job is None:
+        return None
+    run = get_run(run_id) or {}
+    status = {
+        "run_id": run_id,
+        "status": job["status"],
+        "stage": run.get("status"),
+        "attempts": job["attempts"],
+        "progress": run.get("progress_json"),
+        "error": job["error"] or run.get("error"),
+    }
+    if job["status"] == "done":
+        actions = run.get("actions_json") or []
+        status["result"] = {
             "run_id": run_id,
-            "transcript": transcript,
-            "extracted": merge_extracted_actions(extracted, actions),
-            "evidence": evidence,
-            "reply_draft": reply_payload,
-            "actions_preview": actions_preview,
+            "transcript": run.get("transcript"),
+            "extracted": merge_extracted_actions(run.get("extracted_json") or {}, actions),
+            "evidence": run.get("evidence_json") or [],
+            "reply_draft": run.get("reply_draft"),
+            "actions_preview": actions,
         }
+    return status
 
-    except (HTTPException, ResourceFailed):
-        raise
-    except ValueError as e:
-        update_run(run_id, status="error", error=str(e)[:1000])
-        raise HTTPException(status_code=422, detail=str(e))
+
+async def run_autopilot_job(job: dict) -> None:
+    """`job_workers` handler: run (or resume) the pipeline for a queued job."""
+    run_id = job["run_id"]
+    req = AutopilotRunRequest(**job["payload"])
+    run = await io_executor.run(get_run, run_id)
+    client = await get_openai_client()
+    try:
+        async for _ in pipeline_events(run_id, client, resume=run, **_run_source(req)):
+            pass
+    except SttOverloaded as e:
+        raise JobRetry(str(e)) from e
     except Exception as e:
-        logger.exception("[%s] Autopilot run error", run_id)
-        update_run(run_id, status="error", error=str(e)[:1000])
-        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)[:200]}")
+        _, detail = error_status(pipeline_error(run_id, e))
+        update_run(run_id, status="error", error=str(detail)[:1000])
+        raise RuntimeError(detail) from e
+
+
+# --- POST /autopilot/batch ---
+
+@router.post("/batch")
+async def autopilot_batch(
+    req: AutopilotBatchRequest,
+    client: Annotated[AsyncOpenAI, Depends(get_openai_client)],
+    stream_format: Annotated[str, Query(alias="format")] = "sse",
+):
+    """Run many transcripts through the text-mode /autopilot/run pipeline.
+
+    Events: `batch` (the run_ids, in input order), one `item` per transcript
+    as soon as it finishes (`index`, `run_id`, then `result` or
+    `status_code`/`detail`), and a final `done` with the counts. Formats as
+    for /autopilot/run/stream.
+    """
+    stream_format = stream_format.lower()
+    if stream_format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    try:
+        run_ids = create_batch_runs(req.transcripts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def body():
+        yield _encode_event(stream_format, "batch", {"run_ids": run_ids})
+        async for event, data in batch_events(run_ids, req.transcripts, client):
+            yield _encode_event(stream_format, event, data)
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_FORMATS[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- POST /autopilot/run/audio ---
+
+@router.post("/run/audio")
+async def autopilot_run_audio(
+    request: Request,
+    client: Annotated[AsyncOpenAI, Depends(get_openai_client)],
+    locale: str = "en",
+    audio_format: Annotated[str, Query(alias="format")] = "auto",
+    sample_rate: Annotated[int, Query(ge=8000, le=48000)] = STT_SAMPLE_RATE,
+):
+    """Run the autopilot on a raw binary audio body.
+
+    Same pipeline as /autopilot/run in audio mode, without base64 in JSON:
+    the body is streamed to a temp file and decoded from disk, so memory
+    does not grow with the size of the upload.
+    """
+    audio_format = audio_format.lower()
+    if audio_format not in AUDIO_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(AUDIO_FORMATS)}")
+    try:
+        path = await save_stream_to_temp(request.stream(), suffix=".audio")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        size = os.path.getsize(path)
+        if not size:
+            raise HTTPException(status_code=400, detail="audio body is required")
+        run_id = str(uuid.uuid4())
+        create_run(run_id, "audio", f"<raw audio upload: {size} bytes>", run_type="autopilot")
+
+        async def transcribe(on_progress: Callable[[int, int], None]) -> str:
+            return await transcribe_audio_file_async(
+                path,
+                lang=normalize_lang(locale),
+                fmt=audio_format,
+                sample_rate=sample_rate,
+                on_progress=on_progress,
+            )
+
+        return await _run_pipeline(run_id, client, transcribe=transcribe)
+    finally:
+        with suppress(OSError):
+            os.unlink(path)
+
+
+async def _run_pipeline(run_id: str, client: AsyncOpenAI, **source) -> dict:
+    """`run_pipeline` with its PipelineError raised as an HTTPException."""
+    try:
+        return await run_pipeline(run_id, client, **source)
+    except PipelineError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
 
 
 # --- POST /autopilot/confirm ---
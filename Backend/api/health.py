@@ -3,7 +3,19 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse
 
+from extraction.llm_cache import llm_cache
+from extraction.speculation import speculation_stats
 from resources.registry import ResourceRegistry
+from speech.admission import voice_admission
+from speech.batching import partial_batcher
+from speech.scheduler import stt_scheduler
+from speech.stats import stt_tier_latency, tts_latency
+from speech.stt_cache import stt_cache
+from speech.workers import speech_workers_snapshot
+from speech.tts_cache import tts_cache
+from store.jobs import job_workers
+from store.voice_sessions import voice_sessions
+from utils.executors import executors_snapshot
 from utils.warmup.runtime import WarmupRuntime
 
 router = APIRouter(tags=["health"])
@@ -59,4 +71,17 @@ async def warmup_cluster(runtime: Annotated[WarmupRuntime, Depends(get_runtime)]
 async def metrics(runtime: Annotated[WarmupRuntime, Depends(get_runtime)]):
     content = runtime.metrics_snapshot()
     content["local_process_count"] = runtime.cluster_snapshot()["summary"]["process_count"]
+    content["stt"] = stt_scheduler.snapshot()
+    content["stt"]["batching"] = partial_batcher.snapshot()
+    content["stt"]["tiers"] = stt_tier_latency.snapshot()
+    content["stt"]["cache"] = stt_cache.snapshot()
+    content["tts_cache"] = tts_cache.snapshot()
+    content["tts_latency"] = tts_latency.snapshot()
+    content["speculation"] = speculation_stats.snapshot()
+    content["llm_cache"] = llm_cache.snapshot()
+    content["voice_sessions"] = voice_sessions.snapshot()
+    content["voice_admission"] = voice_admission.snapshot()
+    content["executors"] = executors_snapshot()
+    content["speech_workers"] = speech_workers_snapshot()
+    content["jobs"] = job_workers.snapshot()
     return content
@@ -9,6 +9,7 @@ class VoiceResponse(BaseModel):
   ai_text: str
   audio_base64: str  # 回复语音
   session_id: str | None = None
+  tts_format: str = "wav"  # wav | pcm16 | ogg | webm
 
 
 class AutopilotRunRequest(BaseModel):
@@ -18,6 +19,10 @@ class AutopilotRunRequest(BaseModel):
   locale: Optional[str] = "en"
 
 
+class AutopilotBatchRequest(BaseModel):
+  transcripts: list[str]
+
+
 class AutopilotConfirmRequest(BaseModel):
   run_id: str
   actions: list[dict]
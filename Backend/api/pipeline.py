@@ -0,0 +1,323 @@
+"""The autopilot pipeline behind /autopilot/run, /autopilot/jobs and /autopilot/batch.
+
+Transcribe (audio runs) or take the text, then extract, retrieve, draft and
+preview, recording each stage on the run row. Nothing here depends on
+FastAPI: a failure the caller should answer with a status code is raised as
+`PipelineError`, which the router turns into an HTTPException and the MCP
+server into a tool result.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from openai import AsyncOpenAI
+
+from actions.dispatcher import dry_run_action
+from actions.enrichment import build_rag_query, enrich_actions, merge_extracted_actions
+from connectors.email_connector import build_email_content
+from extraction.autopilot_extractor import extract_autopilot_json
+from extraction.reply_drafter import generate_reply_draft, stream_reply_draft
+from rag.retrieve import retrieve, retrieve_many
+from resources.base import ResourceFailed
+from speech.scheduler import SttOverloaded
+from store.runs import create_runs, update_run
+
+logger = logging.getLogger(__name__)
+
+AUTOPILOT_BATCH_MAX_ITEMS = max(1, int(os.getenv("AUTOPILOT_BATCH_MAX_ITEMS", "500")))
+AUTOPILOT_BATCH_CONCURRENCY = max(1, int(os.getenv("AUTOPILOT_BATCH_CONCURRENCY", "4")))
+
+# Intermediate events that carry no part of the final result.
+_PARTIAL_EVENTS = {"progress", "draft_delta"}
+
+
+class PipelineError(Exception):
+    """A failed run with the status code and detail it answers with."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def run_pipeline(
+    run_id: str,
+    client: AsyncOpenAI,
+    *,
+    text: str | None = None,
+    transcribe: Callable[[Callable[[int, int], None]], Awaitable[str]] | None = None,
+    resume: dict | None = None,
+) -> dict:
+    """Run every stage and return the combined result."""
+    result: dict = {"run_id": run_id}
+    try:
+        async for event, data in pipeline_events(run_id, client, text=text, transcribe=transcribe, resume=resume):
+            if event not in _PARTIAL_EVENTS:
+                result.update(data)
+    except Exception as e:
+        raise pipeline_error(run_id, e)
+    return result
+
+
+def pipeline_error(run_id: str, exc: Exception) -> Exception:
+    """What a failed run answers with; unexpected errors are recorded on the run.
+
+    PipelineError, ResourceFailed and SttOverloaded pass through unchanged
+    (the last two are answered with 503 by main.py's handlers).
+    """
+    if isinstance(exc, (PipelineError, ResourceFailed, SttOverloaded)):
+        return exc
+    if isinstance(exc, ValueError):
+        update_run(run_id, status="error", error=str(exc)[:1000])
+        return PipelineError(422, str(exc))
+    logger.error("[%s] Autopilot run error", run_id, exc_info=exc)
+    update_run(run_id, status="error", error=str(exc)[:1000])
+    return PipelineError(500, f"Internal error: {str(exc)[:200]}")
+
+
+def error_status(error: Exception) -> tuple[int, str]:
+    """(status_code, detail) of a `pipeline_error` result, for error events."""
+    if isinstance(error, PipelineError):
+        return error.status_code, error.detail
+    return 503, str(error)
+
+
+async def _transcribe_with_progress(
+    run_id: str,
+    transcribe: Callable[[Callable[[int, int], None]], Awaitable[str]],
+) -> AsyncIterator[tuple[str, dict]]:
+    """Yield long-audio progress while `transcribe` runs, then the transcript."""
+    progress: asyncio.Queue[dict] = asyncio.Queue()
+
+    def report_progress(done: int, total: int) -> None:
+        update = {"stage": "transcribe", "done": done, "total": total}
+        update_run(run_id, progress_json=update)
+        progress.put_nowait(update)
+
+    task = asyncio.ensure_future(transcribe(report_progress))
+    try:
+        while not task.done():
+            getter = asyncio.ensure_future(progress.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield "progress", getter.result()
+            else:
+                getter.cancel()
+        while not progress.empty():
+            yield "progress", progress.get_nowait()
+        yield "transcript", {"transcript": task.result()}
+    finally:
+        task.cancel()
+
+
+async def pipeline_events(
+    run_id: str,
+    client: AsyncOpenAI,
+    *,
+    text: str | None = None,
+    transcribe: Callable[[Callable[[int, int], None]], Awaitable[str]] | None = None,
+    stream_draft: bool = False,
+    resume: dict | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """Transcribe (audio runs) or take `text`, then extract, retrieve, draft and
+    preview, yielding (event, data) as each stage completes. With
+    `stream_draft` the reply text is also yielded token by token.
+
+    `resume` is the stored run row of an interrupted run: stages whose
+    results it already holds are replayed from it instead of being rerun.
+    """
+    done = _checkpoints(resume)
+
+    # Step 1: Transcription
+    transcript = (text or "").strip()
+    if "transcript" in done:
+        transcript = done["transcript"]
+    elif transcribe is not None:
+        async for event, data in _transcribe_with_progress(run_id, transcribe):
+            if event == "progress":
+                yield event, data
+            else:
+                transcript = data["transcript"]
+
+    if not transcript:
+        raise PipelineError(400, "Empty transcript")
+
+    if "transcript" not in done:
+        update_run(run_id, transcript=transcript, status="transcribed")
+    yield "transcribed", {"transcript": transcript}
+
+    # Step 2: Extraction via Tool Calling
+    extracted = done.get("extracted")
+    if extracted is None:
+        extracted = await extract_autopilot_json(transcript, client=client, run_id=run_id)
+        update_run(run_id, extracted_json=extracted, status="extracted")
+    yield "extracted", {"extracted": extracted}
+
+    # Step 3: RAG retrieval
+    evidence = done.get("evidence")
+    if evidence is None:
+        evidence = await retrieve(build_rag_query(extracted), client)
+        update_run(run_id, evidence_json=evidence)
+    yield "evidence", {"evidence": evidence}
+
+    # Step 4: Reply draft
+    if "draft" in done:
+        draft = done["draft"]
+    elif stream_draft:
+        draft = {}
+        async for kind, value in stream_reply_draft(client, transcript, extracted, evidence, run_id=run_id):
+            if kind == "delta":
+                yield "draft_delta", {"text": value}
+            else:
+                draft = value
+    else:
+        draft = await generate_reply_draft(client, transcript, extracted, evidence, run_id=run_id)
+
+    entities = extracted.get("entities") or {}
+    email_content = build_email_content(draft, extracted) if entities.get("email") else None
+
+    reply_payload = {
+        "text": draft.get("reply_text", ""),
+        "reply_text": draft.get("reply_text", ""),
+        "citations": draft.get("citations", []),
+        "html": email_content.get("body_html", "") if email_content else "",
+        "subject": email_content.get("subject", "") if email_content else "",
+        "to": email_content.get("to", "") if email_content else "",
+        "from": email_content.get("from_display", "") if email_content else "",
+        "body_text": email_content.get("body_text", "") if email_content else "",
+    }
+    if "draft" not in done:
+        update_run(run_id, reply_draft=reply_payload, status="drafted")
+    yield "draft", {"reply_draft": reply_payload}
+
+    # Step 5: Enrich & dry_run preview (parallelized)
+    actions = extracted.get("next_best_actions", [])
+    actions = await enrich_actions(actions, extracted, draft, email_content, transcript)
+
+    previews = await asyncio.gather(*[dry_run_action(a) for a in actions])
+    actions_preview = [
+        {**action, "preview": preview.get("preview", "")}
+        for action, preview in zip(actions, previews)
+    ]
+    update_run(run_id, actions_json=actions_preview, status="previewed")
+    yield "previewed", {
+        "extracted": merge_extracted_actions(extracted, actions),
+        "actions_preview": actions_preview,
+    }
+
+
+def _checkpoints(run: dict | None) -> dict:
+    """Stage results already stored on `run`, keyed like the pipeline's locals."""
+    if not run or run.get("status") == "error":
+        return {}
+    done: dict = {}
+    if run.get("transcript"):
+        done["transcript"] = run["transcript"]
+    if isinstance(run.get("extracted_json"), dict):
+        done["extracted"] = run["extracted_json"]
+        if isinstance(run.get("evidence_json"), list):
+            done["evidence"] = run["evidence_json"]
+        reply = run.get("reply_draft")
+        if "evidence" in done and isinstance(reply, dict):
+            done["draft"] = {"reply_text": reply.get("reply_text", ""), "citations": reply.get("citations", [])}
+    return done
+
+
+# --- Batches ---
+
+def create_batch_runs(transcripts: list[str]) -> list[str]:
+    """Validate a batch and insert its run rows in one transaction.
+
+    Raises ValueError for an empty or oversized batch.
+    """
+    if not transcripts:
+        raise ValueError("transcripts must not be empty")
+    if len(transcripts) > AUTOPILOT_BATCH_MAX_ITEMS:
+        raise ValueError(f"at most {AUTOPILOT_BATCH_MAX_ITEMS} transcripts per batch")
+    run_ids = [str(uuid.uuid4()) for _ in transcripts]
+    create_runs([(run_id, "text", text) for run_id, text in zip(run_ids, transcripts)], run_type="autopilot")
+    return run_ids
+
+
+async def batch_events(
+    run_ids: list[str],
+    transcripts: list[str],
+    client: AsyncOpenAI,
+    *,
+    concurrency: int | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """Extract every transcript, retrieve evidence for all of them with one
+    embeddings request, then draft and preview each. Yields ("item", ...) per
+    transcript as it succeeds or fails, then ("done", counts)."""
+    limit = asyncio.Semaphore(concurrency or AUTOPILOT_BATCH_CONCURRENCY)
+    counts = {"succeeded": 0, "failed": 0}
+
+    def failed(index: int, exc: BaseException) -> tuple[str, dict]:
+        status, detail = error_status(pipeline_error(run_ids[index], exc))
+        counts["failed"] += 1
+        return "item", {"index": index, "run_id": run_ids[index], "status_code": status, "detail": detail}
+
+    # Steps 1-2 per transcript
+    async def extract(index: int) -> dict:
+        transcript = (transcripts[index] or "").strip()
+        if not transcript:
+            raise PipelineError(400, "Empty transcript")
+        async with limit:
+            extracted = await extract_autopilot_json(transcript, client=client, run_id=run_ids[index])
+        update_run(run_ids[index], transcript=transcript, extracted_json=extracted, status="extracted")
+        return {"status": "extracted", "transcript": transcript, "extracted_json": extracted}
+
+    checkpoints: dict[int, dict] = {}
+    async for index, outcome in _as_completed({i: extract(i) for i in range(len(run_ids))}):
+        if isinstance(outcome, BaseException):
+            yield failed(index, outcome)
+        else:
+            checkpoints[index] = outcome
+
+    # Step 3 for the whole batch
+    pending = sorted(checkpoints)
+    if pending:
+        try:
+            queries = [build_rag_query(checkpoints[i]["extracted_json"]) for i in pending]
+            evidence = await retrieve_many(queries, client)
+        except Exception as e:
+            for i in pending:
+                yield failed(i, e)
+            pending = []
+        else:
+            for i, found in zip(pending, evidence):
+                update_run(run_ids[i], evidence_json=found)
+                checkpoints[i]["evidence_json"] = found
+
+    # Steps 4-5 per transcript, resuming after the stored evidence
+    async def finish(index: int) -> dict:
+        async with limit:
+            return await run_pipeline(run_ids[index], client, resume=checkpoints[index])
+
+    async for index, outcome in _as_completed({i: finish(i) for i in pending}):
+        if isinstance(outcome, BaseException):
+            yield failed(index, outcome)
+        else:
+            counts["succeeded"] += 1
+            yield "item", {"index": index, "run_id": run_ids[index], "result": outcome}
+
+    yield "done", counts
+
+
+async def _as_completed(coros: dict[int, Awaitable[Any]]) -> AsyncIterator[tuple[int, Any]]:
+    """Yield (key, result or exception) in completion order; cancels the rest on close."""
+    tasks = {asyncio.ensure_future(coro): key for key, coro in coros.items()}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                exc = task.exception()
+                yield tasks[task], exc if exc is not None else task.result()
+    finally:
+        for task in pending:
+            task.cancel()
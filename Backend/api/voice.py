@@ -2,10 +2,14 @@
 
 import asyncio
 import base64
+import io
+import json
 import logging
 import os
 import time
 import uuid
+import wave
+from contextlib import suppress
 from datetime import datetime
 from typing import Annotated
 
@@ -15,19 +19,44 @@ from pydantic import BaseModel
 
 from ai_client import get_openai_client
 from speech.speech import (
+    AUDIO_FORMATS,
+    STT_SAMPLE_RATE,
+    TTS_MIME_TYPES,
     delta_from_previous,
+    normalize_tts_format,
     segment_tts_text,
+    stream_speech,
+    streaming_wav_header,
     synthesize_speech,
-    transcribe_audio_async,
-    transcribe_audio_bytes_async,
+    transcribe_audio_file_async,
 )
+from speech.admission import VoiceBusy, voice_admission
+from speech.scheduler import SttOverloaded
+from speech.stats import tts_latency
+from speech.streaming import StreamingTranscriber
+from speech.vad import create_vad_tracker
 from extraction.calendar_extractor import extract_calendar_event
+from extraction.speculation import (
+    STREAM_SPECULATIVE_EXTRACTION,
+    STREAM_SPECULATIVE_STABLE_N,
+    SpeculativeExtraction,
+)
 from connectors.calendar_agent import GoogleCalendarAgent
 from actions.models import CalendarCommand
 from api.models import VoiceResponse
+from api.voice_frames import (
+    FLAG_FINAL,
+    FRAME_AUDIO,
+    FRAME_TTS,
+    PROTOCOL_BINARY,
+    normalize_protocol,
+    pack_frame,
+    unpack_frame,
+)
 from resources.base import ResourceFailed
 from store.runs import create_run, update_run, get_run
-from utils.file_utils import save_temp_file
+from store.voice_sessions import voice_sessions
+from utils.executors import browser_executor
 from utils.lang import normalize_lang as _normalize_lang
 from utils.timezone import now as now_toronto
 
@@ -57,6 +86,14 @@ MESSAGES = {
     },
 }
 
+# Replies spoken verbatim (no placeholders); pre-synthesized into the TTS cache.
+TTS_TEMPLATE_KEYS = ("stt_empty", "nlp_failed", "create_failed")
+
+
+def tts_template_texts() -> dict[str, list[str]]:
+    return {lang: [msgs[key] for key in TTS_TEMPLATE_KEYS] for lang, msgs in MESSAGES.items()}
+
+
 HTTP_MESSAGES = {
     "zh": {
         "tts_text_required": "text 不能为空",
@@ -83,9 +120,6 @@ LOG_MESSAGES = {
     },
 }
 
-VOICE_SESSION_TTL_SECONDS = 1800
-VOICE_SESSIONS: dict[str, dict] = {}
-
 STREAM_STT_UPDATE_MS = int(os.getenv("STREAM_STT_UPDATE_MS", "350"))
 STREAM_STT_MIN_BYTES = int(os.getenv("STREAM_STT_MIN_BYTES", "2000"))
 STREAM_STT_PARTIAL_DEBOUNCE_N = int(os.getenv("STREAM_STT_PARTIAL_DEBOUNCE_N", "2"))
@@ -93,12 +127,20 @@ STREAM_STT_MIN_SPEECH_MS = int(os.getenv("STREAM_STT_MIN_SPEECH_MS", "350"))
 STREAM_STT_SILENCE_MS = int(os.getenv("STREAM_STT_SILENCE_MS", "900"))
 STREAM_STT_MAX_AUDIO_MS = int(os.getenv("STREAM_STT_MAX_AUDIO_MS", "25000"))
 STREAM_STT_ENERGY_THRESHOLD = float(os.getenv("STREAM_STT_ENERGY_THRESHOLD", "0.02"))
+# Speech needed while a reply is in flight before a duplex session barges in.
+STREAM_BARGE_IN_MIN_MS = int(os.getenv("STREAM_BARGE_IN_MIN_MS", "200"))
+STREAM_DUPLEX = os.getenv("STREAM_DUPLEX", "false").lower() in {"1", "true", "yes"}
+# Sequential sessions that stay open after `done` and wait for the next utterance.
+STREAM_MULTI_TURN = os.getenv("STREAM_MULTI_TURN", "false").lower() in {"1", "true", "yes"}
+STREAM_SESSION_IDLE_S = float(os.getenv("STREAM_SESSION_IDLE_S", "120"))
+STREAM_SESSION_MAX_S = float(os.getenv("STREAM_SESSION_MAX_S", "1800"))
 STREAM_DEFAULT_CHUNK_MS = int(os.getenv("STREAM_DEFAULT_CHUNK_MS", "80"))
 STREAM_TTS_WORKERS = int(os.getenv("STREAM_TTS_WORKERS", "2"))
-
-
-def _now_utc() -> datetime:
-    return datetime.utcnow()
+# "segment": one complete WAV per text segment (default).
+# "wav" / "pcm16": forward Piper PCM as it is produced; "wav" prefixes the first
+# chunk with an open-ended WAV header, "pcm16" sends bare samples.
+TTS_STREAM_MODES = ("segment", "wav", "pcm16")
+STREAM_TTS_MODE = os.getenv("STREAM_TTS_MODE", "segment").lower()
 
 
 def _msg(lang: str, key: str, table: dict) -> str:
@@ -108,25 +150,16 @@ def _msg(lang: str, key: str, table: dict) -> str:
 def _get_voice_session(session_id: str | None) -> dict | None:
     if not session_id:
         return None
-    session = VOICE_SESSIONS.get(session_id)
-    if not session:
-        return None
-    age = (_now_utc() - session.get("updated_at", _now_utc())).total_seconds()
-    if age > VOICE_SESSION_TTL_SECONDS:
-        try:
-            del VOICE_SESSIONS[session_id]
-        except Exception:
-            pass
-        return None
-    return session
+    return voice_sessions.get(session_id)
+
+
+def _context_event(session_id: str | None) -> dict | None:
+    session = _get_voice_session(session_id)
+    return session.get("event") if session and session.get("awaiting_update") else None
 
 
 def _set_voice_session(session_id: str, event: dict, awaiting_update: bool) -> None:
-    VOICE_SESSIONS[session_id] = {
-        "event": event,
-        "awaiting_update": awaiting_update,
-        "updated_at": _now_utc(),
-    }
+    voice_sessions.set(session_id, event, awaiting_update)
 
 
 async def _build_voice_response(
@@ -135,11 +168,12 @@ async def _build_voice_response(
     lang: str,
     session_id: str | None,
     include_audio: bool,
+    tts_format: str = "wav",
 ) -> VoiceResponse:
     audio_b64 = ""
     if include_audio:
         try:
-            audio_bytes = await synthesize_speech(ai_text, lang=lang)
+            audio_bytes = await synthesize_speech(ai_text, lang=lang, fmt=tts_format)
             audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
         except Exception as e:
             logger.exception("%s: %s", _msg(lang, "tts_failed", LOG_MESSAGES), e)
@@ -149,6 +183,7 @@ async def _build_voice_response(
         ai_text=ai_text,
         audio_base64=audio_b64,
         session_id=session_id,
+        tts_format=tts_format,
     )
 
 
@@ -159,6 +194,8 @@ async def _process_calendar_text(
     include_audio: bool,
     client: AsyncOpenAI,
     input_type: str = "text",
+    tts_format: str = "wav",
+    speculation: SpeculativeExtraction | None = None,
 ) -> VoiceResponse:
     msgs = MESSAGES[normalized_lang]
     if not user_text.strip():
@@ -168,6 +205,7 @@ async def _process_calendar_text(
             normalized_lang,
             session_id,
             include_audio,
+            tts_format,
         )
 
     if not session_id:
@@ -189,16 +227,19 @@ async def _process_calendar_text(
         except Exception:
             pass
 
-    session = _get_voice_session(session_id)
-    context_event = session.get("event") if session and session.get("awaiting_update") else None
+    context_event = _context_event(session_id)
 
     try:
-        extracted = await extract_calendar_event(
-            user_text,
-            client=client,
-            lang=normalized_lang,
-            context_event=context_event,
-        )
+        extracted = None
+        if speculation is not None:
+            extracted = await speculation.take(user_text, context_event)
+        if extracted is None:
+            extracted = await extract_calendar_event(
+                user_text,
+                client=client,
+                lang=normalized_lang,
+                context_event=context_event,
+            )
         update_run(run_id, transcript=full_transcript, extracted_json=extracted, status="extracted")
 
         cmd = CalendarCommand(
@@ -211,10 +252,10 @@ async def _process_calendar_text(
         logger.exception("%s: %s", _msg(normalized_lang, "nlp_failed", LOG_MESSAGES), e)
         update_run(run_id, status="error", error=str(e)[:1000])
         ai_text = msgs["nlp_failed"]
-        return await _build_voice_response(user_text, ai_text, normalized_lang, session_id, include_audio)
+        return await _build_voice_response(user_text, ai_text, normalized_lang, session_id, include_audio, tts_format)
 
     agent = GoogleCalendarAgent(lang=normalized_lang)
-    result = await asyncio.to_thread(agent.check_and_create_event, cmd)
+    result = await browser_executor.run(agent.check_and_create_event, cmd)
 
     if result.success:
         ai_text = msgs["create_ok"].format(
@@ -238,17 +279,52 @@ async def _process_calendar_text(
         _set_voice_session(session_id, extracted, awaiting_update=False)
         update_run(run_id, status="error", error=result.message or "Failed to create calendar event")
 
-    return await _build_voice_response(user_text, ai_text, normalized_lang, session_id, include_audio)
+    return await _build_voice_response(user_text, ai_text, normalized_lang, session_id, include_audio, tts_format)
 
 
-def _new_stream_state(lang: str, session_id: str | None, include_audio: bool) -> dict:
+def _new_stream_state(
+    lang: str,
+    session_id: str | None,
+    include_audio: bool,
+    protocol: str = "json",
+    audio_format: str = "webm",
+    sample_rate: int = STT_SAMPLE_RATE,
+    tts_stream: str = STREAM_TTS_MODE,
+    tts_format: str | None = None,
+    duplex: bool = STREAM_DUPLEX,
+    multi_turn: bool = STREAM_MULTI_TURN,
+) -> dict:
+    normalized_lang = _normalize_lang(lang)
+    session_id = session_id or str(uuid.uuid4())
+    if audio_format not in AUDIO_FORMATS:
+        audio_format = "webm"
+    if tts_stream not in TTS_STREAM_MODES:
+        tts_stream = "segment"
     return {
-        "lang": _normalize_lang(lang),
-        "session_id": session_id or str(uuid.uuid4()),
+        "lang": normalized_lang,
+        "session_id": session_id,
         "include_audio": include_audio,
-        "audio_buffer": bytearray(),
+        "protocol": normalize_protocol(protocol),
+        "audio_format": audio_format,
+        "tts_stream": tts_stream,
+        "tts_format": normalize_tts_format(tts_format),
+        "sample_rate": sample_rate,
+        "duplex": duplex,
+        "multi_turn": multi_turn,
+        "transcriber": StreamingTranscriber(
+            normalized_lang,
+            audio_format=audio_format,
+            input_sample_rate=sample_rate,
+            vad=create_vad_tracker(),
+            session_id=session_id,
+        ),
+        **_turn_fields(),
+    }
+
+
+def _turn_fields() -> dict:
+    return {
         "last_stt_ts_ms": 0.0,
-        "stt_task": None,
         "partial_candidate": "",
         "partial_repeats": 0,
         "last_partial_sent": "",
@@ -258,6 +334,94 @@ def _new_stream_state(lang: str, session_id: str | None, include_audio: bool) ->
     }
 
 
+def _next_turn_state(state: dict) -> dict:
+    """Fresh per-turn state that keeps the session's negotiated options."""
+    return _new_stream_state(
+        lang=state["lang"],
+        session_id=state["session_id"],
+        include_audio=state["include_audio"],
+        protocol=state["protocol"],
+        audio_format=state["audio_format"],
+        sample_rate=state["sample_rate"],
+        tts_stream=state["tts_stream"],
+        tts_format=state["tts_format"],
+        duplex=state["duplex"],
+        multi_turn=state["multi_turn"],
+    )
+
+
+def _reset_turn(state: dict) -> dict:
+    """Reuse the session state, transcriber and VAD for the next sequential turn."""
+    state["transcriber"].reset()
+    state.pop("speculation", None)
+    state.update(_turn_fields())
+    return state
+
+
+def _bind_stream(websocket: WebSocket, state: dict, client: AsyncOpenAI | None = None) -> dict:
+    """Push partials from the transcriber task straight to the socket."""
+
+    async def on_partial(text: str) -> None:
+        await _send_partial(websocket, state, text)
+
+    async def extract(text: str, context_event: dict | None) -> dict:
+        return await extract_calendar_event(
+            text,
+            client=client,
+            lang=state["lang"],
+            context_event=context_event,
+        )
+
+    state["transcriber"].on_partial = on_partial
+    if client is not None and STREAM_SPECULATIVE_EXTRACTION:
+        state["speculation"] = SpeculativeExtraction(extract)
+    return state
+
+
+def _discard_stream(state: dict) -> None:
+    state["transcriber"].cancel()
+    if state.get("speculation") is not None:
+        state["speculation"].cancel()
+
+
+async def _receive_packet(websocket: WebSocket) -> dict:
+    """Receive one client message; binary audio frames become audio_chunk packets."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    data = message.get("bytes")
+    if data is None:
+        return json.loads(message.get("text") or "null") or {}
+    frame = unpack_frame(data)
+    if frame.kind != FRAME_AUDIO:
+        raise ValueError("clients may only send audio frames")
+    return {
+        "type": "audio_chunk",
+        "binary": True,
+        "audio": frame.payload,
+        "sequence": frame.sequence,
+        "duration_ms": frame.duration_ms,
+        "energy": 1.0 if frame.voiced else 0.0,
+        "final": frame.final,
+    }
+
+
+def _wav_duration_ms(audio_bytes: bytes) -> int:
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wav_file:
+            return int(wav_file.getnframes() * 1000 / wav_file.getframerate())
+    except Exception:
+        return 0
+
+
+def _parse_sample_rate(value: object) -> int:
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        return STT_SAMPLE_RATE
+    return parsed if 8000 <= parsed <= 48000 else STT_SAMPLE_RATE
+
+
 def _normalize_energy(value: object) -> float:
     try:
         parsed = float(value)
@@ -274,30 +438,15 @@ async def _schedule_partial_stt(state: dict) -> None:
     now_ms = time.monotonic() * 1000
     if (now_ms - state["last_stt_ts_ms"]) < STREAM_STT_UPDATE_MS:
         return
-    if len(state["audio_buffer"]) < STREAM_STT_MIN_BYTES:
-        return
-    task = state.get("stt_task")
-    if task and not task.done():
+    transcriber: StreamingTranscriber = state["transcriber"]
+    if transcriber.buffered_bytes < STREAM_STT_MIN_BYTES:
         return
+    if transcriber.start_update():
+        state["last_stt_ts_ms"] = now_ms
 
-    snapshot = bytes(state["audio_buffer"])
-    lang = state["lang"]
-    state["last_stt_ts_ms"] = now_ms
-    state["stt_task"] = asyncio.create_task(transcribe_audio_bytes_async(snapshot, lang))
-
-
-async def _emit_partial_if_ready(websocket: WebSocket, state: dict) -> None:
-    task = state.get("stt_task")
-    if not task or not task.done():
-        return
-    state["stt_task"] = None
-
-    try:
-        partial_text = (task.result() or "").strip()
-    except Exception:
-        logger.exception("Partial STT failed")
-        return
 
+async def _send_partial(websocket: WebSocket, state: dict, partial_text: str) -> None:
+    partial_text = (partial_text or "").strip()
     if not partial_text:
         return
 
@@ -307,6 +456,10 @@ async def _emit_partial_if_ready(websocket: WebSocket, state: dict) -> None:
         state["partial_candidate"] = partial_text
         state["partial_repeats"] = 1
 
+    speculation = state.get("speculation")
+    if speculation is not None and state["partial_repeats"] >= STREAM_SPECULATIVE_STABLE_N:
+        speculation.start(partial_text, _context_event(state["session_id"]))
+
     if state["partial_repeats"] < STREAM_STT_PARTIAL_DEBOUNCE_N:
         return
 
@@ -324,7 +477,48 @@ async def _emit_partial_if_ready(websocket: WebSocket, state: dict) -> None:
     )
 
 
+def _barge_in_detected(state: dict) -> bool:
+    vad = state["transcriber"].vad
+    voiced_ms = vad.voiced_ms if vad is not None else state["voiced_ms"]
+    return voiced_ms >= STREAM_BARGE_IN_MIN_MS
+
+
+async def _interrupt_turn(websocket: WebSocket, turn: asyncio.Task | None, reason: str) -> bool:
+    """Cancel an in-flight reply (extraction and TTS workers) and report it."""
+    if turn is None or turn.done():
+        return False
+    turn.cancel()
+    with suppress(asyncio.CancelledError):
+        await turn
+    await websocket.send_json({"type": "tts_done", "interrupted": True, "reason": reason})
+    return True
+
+
+def _session_deadline(started_s: float, last_activity_s: float, now_s: float) -> tuple[float | None, str]:
+    """Seconds left before the connection is ended, and why; None means no limit."""
+    limits = []
+    if STREAM_SESSION_MAX_S > 0:
+        limits.append((started_s + STREAM_SESSION_MAX_S - now_s, "max_session"))
+    if STREAM_SESSION_IDLE_S > 0:
+        limits.append((last_activity_s + STREAM_SESSION_IDLE_S - now_s, "idle_timeout"))
+    if not limits:
+        return None, ""
+    remaining, reason = min(limits)
+    return max(0.0, remaining), reason
+
+
+def _log_turn_result(turn: asyncio.Task) -> None:
+    if not turn.cancelled() and turn.exception() is not None:
+        logger.error("Voice turn failed", exc_info=turn.exception())
+
+
 def _should_finalize_by_silence(state: dict, now_ms: float) -> bool:
+    vad = state["transcriber"].vad
+    if vad is not None:
+        if vad.voiced_ms < STREAM_STT_MIN_SPEECH_MS:
+            return False
+        return vad.trailing_silence_ms >= STREAM_STT_SILENCE_MS
+    # Server VAD disabled (STREAM_VAD_BACKEND=off): fall back to client energy.
     if state["voiced_ms"] < STREAM_STT_MIN_SPEECH_MS:
         return False
     last_voice_ts_ms = state.get("last_voice_ts_ms", 0.0)
@@ -333,12 +527,23 @@ def _should_finalize_by_silence(state: dict, now_ms: float) -> bool:
     return (now_ms - last_voice_ts_ms) >= STREAM_STT_SILENCE_MS
 
 
-async def _stream_tts_chunks(websocket: WebSocket, text: str, lang: str) -> None:
+async def _stream_tts_chunks(
+    websocket: WebSocket,
+    text: str,
+    lang: str,
+    binary: bool = False,
+    mode: str = "segment",
+    tts_format: str = "wav",
+) -> None:
     segments = segment_tts_text(text)
     if not segments:
         await websocket.send_json({"type": "tts_done", "interrupted": False})
         return
+    if mode != "segment":
+        await _stream_tts_pcm(websocket, segments, lang, binary=binary, mode=mode)
+        return
 
+    started = time.perf_counter()
     worker_count = max(1, min(STREAM_TTS_WORKERS, len(segments)))
     job_queue: asyncio.Queue = asyncio.Queue()
     result_queue: asyncio.Queue = asyncio.Queue()
@@ -357,7 +562,7 @@ async def _stream_tts_chunks(websocket: WebSocket, text: str, lang: str) -> None
 
             seq, seg_text = item
             try:
-                audio_bytes = await synthesize_speech(seg_text, lang=lang)
+                audio_bytes = await synthesize_speech(seg_text, lang=lang, fmt=tts_format)
                 await result_queue.put(("segment", (seq, seg_text, audio_bytes, "")))
             except Exception as e:
                 logger.exception("TTS chunk synth failed at seq=%s", seq)
@@ -383,14 +588,28 @@ async def _stream_tts_chunks(websocket: WebSocket, text: str, lang: str) -> None
             while next_seq in pending:
                 chunk_text, chunk_audio, chunk_err = pending.pop(next_seq)
                 is_final = next_seq == last_seq
-
-                if chunk_audio:
+                if chunk_audio and started is not None:
+                    tts_latency.first_audio.observe((time.perf_counter() - started) * 1000)
+                    started = None
+
+                if chunk_audio and binary:
+                    await websocket.send_bytes(
+                        pack_frame(
+                            FRAME_TTS,
+                            chunk_audio,
+                            sequence=next_seq,
+                            duration_ms=_wav_duration_ms(chunk_audio),
+                            flags=FLAG_FINAL if is_final else 0,
+                        )
+                    )
+                elif chunk_audio:
                     await websocket.send_json(
                         {
                             "type": "tts_chunk",
                             "sequence": next_seq,
                             "text": chunk_text,
                             "audio_base64": base64.b64encode(chunk_audio).decode("utf-8"),
+                            "format": tts_format,
                             "is_final": is_final,
                         }
                     )
@@ -413,74 +632,182 @@ async def _stream_tts_chunks(websocket: WebSocket, text: str, lang: str) -> None
     await websocket.send_json({"type": "tts_done", "interrupted": False})
 
 
+async def _stream_tts_pcm(
+    websocket: WebSocket,
+    segments: list[str],
+    lang: str,
+    binary: bool,
+    mode: str,
+) -> None:
+    """Send Piper PCM for each segment, in order, as soon as it is produced.
+
+    Up to STREAM_TTS_WORKERS segments synthesize at once; chunks of segments
+    ahead of the one being sent wait in their own queue.
+    """
+    started = time.perf_counter()
+    limiter = asyncio.Semaphore(max(1, STREAM_TTS_WORKERS))
+    queues: list[asyncio.Queue] = [asyncio.Queue() for _ in segments]
+
+    async def produce(seq: int, seg_text: str) -> None:
+        async with limiter:
+            try:
+                async for chunk in stream_speech(seg_text, lang=lang):
+                    await queues[seq].put(("chunk", chunk))
+                await queues[seq].put(("done", None))
+            except Exception as e:
+                logger.exception("TTS stream synth failed at seq=%s", seq)
+                await queues[seq].put(("error", str(e)))
+
+    producers = [asyncio.create_task(produce(seq, seg_text)) for seq, seg_text in enumerate(segments)]
+    sequence = 0
+    last_seq = len(segments) - 1
+    try:
+        for seq, seg_text in enumerate(segments):
+            first_in_segment = True
+            while True:
+                kind, payload = await queues[seq].get()
+                if kind == "done":
+                    break
+                if kind == "error":
+                    await websocket.send_json(
+                        {
+                            "type": "tts_error",
+                            "sequence": seq,
+                            "message": payload[:200],
+                            "is_final": seq == last_seq,
+                        }
+                    )
+                    break
+
+                sample_rate, pcm = payload
+                duration_ms = len(pcm) * 1000 // (sample_rate * 2)
+                if sequence == 0:
+                    await websocket.send_json(
+                        {
+                            "type": "tts_start",
+                            "format": mode,
+                            "sample_rate": sample_rate,
+                            "channels": 1,
+                            "sample_width": 2,
+                        }
+                    )
+                    if mode == "wav":
+                        pcm = streaming_wav_header(sample_rate) + pcm
+
+                if binary:
+                    await websocket.send_bytes(
+                        pack_frame(FRAME_TTS, pcm, sequence=sequence, duration_ms=min(duration_ms, 0xFFFF))
+                    )
+                else:
+                    await websocket.send_json(
+                        {
+                            "type": "tts_chunk",
+                            "sequence": sequence,
+                            "segment": seq,
+                            "text": seg_text if first_in_segment else "",
+                            "audio_base64": base64.b64encode(pcm).decode("utf-8"),
+                            "format": mode,
+                            "is_final": False,
+                        }
+                    )
+                if sequence == 0:
+                    tts_latency.first_audio.observe((time.perf_counter() - started) * 1000)
+                first_in_segment = False
+                sequence += 1
+
+        if binary and sequence:
+            await websocket.send_bytes(pack_frame(FRAME_TTS, b"", sequence=sequence, flags=FLAG_FINAL))
+    finally:
+        for task in producers:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+
+    await websocket.send_json({"type": "tts_done", "interrupted": False})
+
+
 async def _finalize_stream(
     websocket: WebSocket,
     state: dict,
     final_reason: str,
     client: AsyncOpenAI,
 ) -> None:
-    task = state.get("stt_task")
-    if task and not task.done():
-        try:
-            await task
-        except Exception:
-            pass
-    state["stt_task"] = None
-
-    final_text = ""
-    if state["audio_buffer"]:
+    try:
+        final_text = ""
         try:
-            final_text = await transcribe_audio_bytes_async(
-                bytes(state["audio_buffer"]),
-                state["lang"],
+            final_text = await state["transcriber"].finalize()
+        except SttOverloaded:
+            logger.warning("Final STT rejected: scheduler overloaded")
+            await websocket.send_json(
+                {
+                    "type": "error",
+                    "code": "overloaded",
+                    "message": "Speech recognition is overloaded, please retry shortly",
+                }
             )
+            await websocket.send_json({"type": "done", "session_id": state["session_id"]})
+            return
         except Exception:
             logger.exception("Final STT failed")
             final_text = ""
-    final_text = (final_text or "").strip()
+        final_text = (final_text or "").strip()
+
+        final_delta = delta_from_previous(state["last_partial_sent"], final_text)
+        await websocket.send_json(
+            {
+                "type": "stt_final",
+                "text": final_text,
+                "delta": final_delta,
+                "reason": final_reason,
+            }
+        )
 
-    final_delta = delta_from_previous(state["last_partial_sent"], final_text)
-    await websocket.send_json(
-        {
-            "type": "stt_final",
-            "text": final_text,
-            "delta": final_delta,
-            "reason": final_reason,
-        }
-    )
+        response = await _process_calendar_text(
+            final_text,
+            state["lang"],
+            state["session_id"],
+            include_audio=False,
+            client=client,
+            input_type="audio",
+            speculation=state.get("speculation"),
+        )
 
-    response = await _process_calendar_text(
-        final_text,
-        state["lang"],
-        state["session_id"],
-        include_audio=False,
-        client=client,
-        input_type="audio",
-    )
+        await websocket.send_json(
+            {
+                "type": "ai_response",
+                "user_text": response.user_text,
+                "ai_text": response.ai_text,
+                "session_id": response.session_id,
+            }
+        )
 
-    await websocket.send_json(
-        {
-            "type": "ai_response",
-            "user_text": response.user_text,
-            "ai_text": response.ai_text,
-            "session_id": response.session_id,
-        }
-    )
+        if state["include_audio"] and response.ai_text:
+            await _stream_tts_chunks(
+                websocket,
+                response.ai_text,
+                state["lang"],
+                binary=state["protocol"] == PROTOCOL_BINARY,
+                mode=state["tts_stream"],
+                tts_format=state["tts_format"],
+            )
 
-    if state["include_audio"] and response.ai_text:
-        await _stream_tts_chunks(websocket, response.ai_text, state["lang"])
+        await websocket.send_json(
+            {
+                "type": "done",
+                "session_id": response.session_id,
+            }
+        )
 
-    await websocket.send_json(
-        {
-            "type": "done",
-            "session_id": response.session_id,
-        }
-    )
+    finally:
+        # Drop a speculative extraction that the turn did not consume.
+        if state.get("speculation") is not None:
+            state["speculation"].cancel()
 
 
 class TTSRequest(BaseModel):
     text: str
     lang: str | None = "zh"
+    format: str | None = None
 
 
 class CalendarTextRequest(BaseModel):
@@ -488,6 +815,7 @@ class CalendarTextRequest(BaseModel):
     lang: str | None = "zh"
     session_id: str | None = None
     include_audio: bool | None = True
+    tts_format: str | None = None
 
 
 @router.post("/tts")
@@ -496,15 +824,16 @@ async def tts(request: TTSRequest):
     text = (request.text or "").strip()
     if not text:
         raise HTTPException(status_code=400, detail=_msg(normalized_lang, "tts_text_required", HTTP_MESSAGES))
+    tts_format = normalize_tts_format(request.format)
     try:
-        audio_bytes = await synthesize_speech(text, lang=normalized_lang)
+        audio_bytes = await synthesize_speech(text, lang=normalized_lang, fmt=tts_format)
     except ResourceFailed:
         raise
     except Exception as e:
         logger.exception("%s: %s", _msg(normalized_lang, "tts_failed", LOG_MESSAGES), e)
         raise HTTPException(status_code=500, detail=_msg(normalized_lang, "tts_failed", HTTP_MESSAGES))
     audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
-    return {"audio_base64": audio_b64}
+    return {"audio_base64": audio_b64, "format": tts_format, "mime_type": TTS_MIME_TYPES[tts_format]}
 
 
 @router.post("/voice", response_model=VoiceResponse)
@@ -515,31 +844,29 @@ async def handle_voice(
     lang: str = Form("zh"),
     session_id: str | None = Form(None),
     include_audio: bool | None = Form(True),
+    tts_format: str | None = Form(None),
 ):
     normalized_lang = _normalize_lang(lang)
     msgs = MESSAGES[normalized_lang]
+    tts_format = normalize_tts_format(tts_format)
     if not audio and not (text or "").strip():
         raise HTTPException(status_code=400, detail=msgs["no_audio"])
 
     if text and text.strip():
-        return await _process_calendar_text(text.strip(), normalized_lang, session_id, bool(include_audio), client=client, input_type="text")
-
-    temp_path = save_temp_file(audio)
-
-    try:
-        user_text = await transcribe_audio_async(temp_path, lang=normalized_lang)
-        return await _process_calendar_text(user_text, normalized_lang, session_id, bool(include_audio), client=client, input_type="audio")
+        return await _process_calendar_text(text.strip(), normalized_lang, session_id, bool(include_audio), client=client, input_type="text", tts_format=tts_format)
 
-    except (HTTPException, ResourceFailed):
-        raise
-    except Exception as e:
-        logger.exception("%s: %s", _msg(normalized_lang, "voice_error", LOG_MESSAGES), e)
-        raise HTTPException(status_code=500, detail=_msg(normalized_lang, "voice_processing_failed", HTTP_MESSAGES))
-    finally:
+    async with voice_admission.admit("upload"):
         try:
-            os.remove(temp_path)
-        except Exception:
-            pass
+            # The multipart parser has already spooled the part to a temp
+            # file; decode from it rather than reading it into memory.
+            user_text = await transcribe_audio_file_async(audio.file, lang=normalized_lang)
+            return await _process_calendar_text(user_text, normalized_lang, session_id, bool(include_audio), client=client, input_type="audio", tts_format=tts_format)
+
+        except (HTTPException, ResourceFailed, SttOverloaded):
+            raise
+        except Exception as e:
+            logger.exception("%s: %s", _msg(normalized_lang, "voice_error", LOG_MESSAGES), e)
+            raise HTTPException(status_code=500, detail=_msg(normalized_lang, "voice_processing_failed", HTTP_MESSAGES))
 
 
 @router.websocket("/voice/ws")
@@ -548,39 +875,113 @@ async def handle_voice_ws(
     client: Annotated[AsyncOpenAI, Depends(get_openai_client)],
 ):
     await websocket.accept()
-    state = _new_stream_state(lang="zh", session_id=None, include_audio=True)
+    try:
+        ticket = await voice_admission.acquire("stream")
+    except VoiceBusy as busy:
+        await websocket.send_json(busy.payload())
+        await websocket.close(code=1013)  # Try Again Later
+        return
+    try:
+        state = _bind_stream(websocket, _new_stream_state(lang="zh", session_id=None, include_audio=True), client)
+    except Exception as e:
+        # The main loop's finally is not reached yet; give the slot back here.
+        ticket.release()
+        logger.exception("Voice websocket setup error: %s", e)
+        with suppress(Exception):
+            await websocket.send_json({"type": "error", "message": str(e)[:200]})
+        await websocket.close(code=1011)  # Internal Error
+        return
+    # Duplex sessions run each reply as a background turn so the receive loop
+    # keeps reading; speech or an interrupt message cancels it. Multi-turn
+    # sessions answer inline and then reset the same state for the next turn.
+    turn: asyncio.Task | None = None
+    started_s = last_activity_s = time.monotonic()
+
+    async def finish(final_reason: str) -> bool:
+        """Finalize the current utterance; True when the connection should close."""
+        nonlocal state, turn, last_activity_s
+        if not state["duplex"]:
+            await _finalize_stream(websocket, state, final_reason=final_reason, client=client)
+            if not state["multi_turn"]:
+                return True
+            # The idle clock restarts once the reply has been delivered.
+            last_activity_s = time.monotonic()
+            state = _bind_stream(websocket, _reset_turn(state), client)
+            return False
+        await _interrupt_turn(websocket, turn, "next_turn")
+        turn = asyncio.create_task(_finalize_stream(websocket, state, final_reason=final_reason, client=client))
+        turn.add_done_callback(_log_turn_result)
+        state = _bind_stream(websocket, _next_turn_state(state), client)
+        return False
 
     try:
         while True:
-            await _emit_partial_if_ready(websocket, state)
-            packet = await websocket.receive_json()
+            timeout, end_reason = _session_deadline(started_s, last_activity_s, time.monotonic())
+            try:
+                packet = await asyncio.wait_for(_receive_packet(websocket), timeout)
+            except asyncio.TimeoutError:
+                _discard_stream(state)
+                await websocket.send_json({"type": "session_end", "reason": end_reason})
+                await websocket.close()
+                return
+            last_activity_s = time.monotonic()
             packet_type = (packet or {}).get("type")
 
             if packet_type == "start":
-                state = _new_stream_state(
+                _discard_stream(state)
+                await _interrupt_turn(websocket, turn, "restart")
+                turn = None
+                state = _bind_stream(websocket, _new_stream_state(
                     lang=(packet or {}).get("lang") or "zh",
                     session_id=(packet or {}).get("session_id"),
                     include_audio=bool((packet or {}).get("include_audio", True)),
-                )
+                    protocol=(packet or {}).get("protocol") or "json",
+                    audio_format=str((packet or {}).get("audio_format") or "webm").lower(),
+                    sample_rate=_parse_sample_rate((packet or {}).get("sample_rate")),
+                    tts_stream=str((packet or {}).get("tts_stream") or STREAM_TTS_MODE).lower(),
+                    tts_format=(packet or {}).get("tts_format"),
+                    duplex=bool((packet or {}).get("duplex", STREAM_DUPLEX)),
+                    multi_turn=bool((packet or {}).get("multi_turn", STREAM_MULTI_TURN)),
+                ), client)
                 await websocket.send_json(
                     {
                         "type": "ack",
                         "session_id": state["session_id"],
+                        "protocol": state["protocol"],
+                        "audio_format": state["audio_format"],
+                        "tts_stream": state["tts_stream"],
+                        "tts_format": state["tts_format"],
+                        "duplex": state["duplex"],
+                        "multi_turn": state["multi_turn"],
                     }
                 )
                 continue
 
             if packet_type == "audio_chunk":
-                audio_b64 = (packet or {}).get("audio_base64") or ""
-                if not audio_b64:
-                    continue
-
-                try:
-                    chunk_bytes = base64.b64decode(audio_b64)
-                except Exception:
-                    continue
-
-                state["audio_buffer"].extend(chunk_bytes)
+                if packet.get("binary"):
+                    if state["protocol"] != PROTOCOL_BINARY:
+                        await websocket.send_json(
+                            {
+                                "type": "error",
+                                "message": "Binary frames require protocol=binary in the start packet",
+                            }
+                        )
+                        continue
+                    chunk_bytes = packet["audio"]
+                    if not chunk_bytes and not packet.get("final"):
+                        continue
+                else:
+                    audio_b64 = (packet or {}).get("audio_base64") or ""
+                    if not audio_b64:
+                        continue
+
+                    try:
+                        chunk_bytes = base64.b64decode(audio_b64)
+                    except Exception:
+                        continue
+
+                state["transcriber"].append(chunk_bytes)
+                await state["transcriber"].feed_vad()
 
                 chunk_ms = int((packet or {}).get("duration_ms") or STREAM_DEFAULT_CHUNK_MS)
                 chunk_ms = max(10, min(chunk_ms, 1000))
@@ -593,21 +994,41 @@ async def handle_voice_ws(
                     state["last_voice_ts_ms"] = now_ms
 
                 await _schedule_partial_stt(state)
-                await _emit_partial_if_ready(websocket, state)
+
+                if turn is not None and not turn.done() and _barge_in_detected(state):
+                    await _interrupt_turn(websocket, turn, "speech")
+                    turn = None
 
                 if state["total_audio_ms"] >= STREAM_STT_MAX_AUDIO_MS:
-                    await _finalize_stream(websocket, state, final_reason="max_duration", client=client)
-                    return
+                    if await finish("max_duration"):
+                        return
+                    continue
+
+                if state["transcriber"].over_budget:
+                    if await finish("max_bytes"):
+                        return
+                    continue
 
                 if _should_finalize_by_silence(state, now_ms):
-                    await _finalize_stream(websocket, state, final_reason="silence_timeout", client=client)
-                    return
+                    if await finish("silence_timeout"):
+                        return
+                    continue
+
+                if packet.get("final"):
+                    if await finish("user_stop"):
+                        return
 
                 continue
 
             if packet_type == "stop":
-                await _finalize_stream(websocket, state, final_reason="user_stop", client=client)
-                return
+                if await finish("user_stop"):
+                    return
+                continue
+
+            if packet_type == "interrupt":
+                await _interrupt_turn(websocket, turn, "client")
+                turn = None
+                continue
 
             if packet_type == "ping":
                 await websocket.send_json({"type": "pong"})
@@ -621,15 +1042,17 @@ async def handle_voice_ws(
             )
 
     except WebSocketDisconnect:
-        task = state.get("stt_task")
-        if task and not task.done():
-            task.cancel()
+        _discard_stream(state)
     except Exception as e:
         logger.exception("Voice websocket error: %s", e)
         try:
             await websocket.send_json({"type": "error", "message": str(e)[:200]})
         except Exception:
             pass
+    finally:
+        if turn is not None and not turn.done():
+            turn.cancel()
+        ticket.release()
 
 
 @router.post("/calendar/text", response_model=VoiceResponse)
@@ -645,4 +1068,5 @@ async def handle_calendar_text(
         bool(request.include_audio),
         client=client,
         input_type="text",
+        tts_format=normalize_tts_format(request.tts_format),
     )
@@ -0,0 +1,77 @@
+"""Binary frame codec for the /voice/ws binary protocol mode.
+
+Clients opt in with `{"type": "start", "protocol": "binary"}`. Audio chunks
+and TTS segments then travel as raw binary WebSocket frames prefixed with a
+fixed 8-byte big-endian header; control messages stay JSON text frames.
+
+    kind:u8  flags:u8  sequence:u32  duration_ms:u16  payload...
+"""
+
+import struct
+from dataclasses import dataclass
+
+FRAME_HEADER = struct.Struct("!BBIH")
+
+FRAME_AUDIO = 1
+FRAME_TTS = 2
+
+FLAG_VOICED = 0x01
+FLAG_FINAL = 0x02
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_BINARY)
+
+
+@dataclass(frozen=True)
+class Frame:
+    kind: int
+    flags: int
+    sequence: int
+    duration_ms: int
+    payload: memoryview
+
+    @property
+    def voiced(self) -> bool:
+        return bool(self.flags & FLAG_VOICED)
+
+    @property
+    def final(self) -> bool:
+        return bool(self.flags & FLAG_FINAL)
+
+
+def pack_frame(
+    kind: int,
+    payload: bytes,
+    *,
+    sequence: int,
+    duration_ms: int = 0,
+    flags: int = 0,
+) -> bytes:
+    header = FRAME_HEADER.pack(
+        kind,
+        flags,
+        sequence & 0xFFFFFFFF,
+        max(0, min(int(duration_ms), 0xFFFF)),
+    )
+    return header + payload
+
+
+def unpack_frame(data: bytes) -> Frame:
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError("binary frame shorter than header")
+    kind, flags, sequence, duration_ms = FRAME_HEADER.unpack_from(data)
+    if kind not in (FRAME_AUDIO, FRAME_TTS):
+        raise ValueError(f"unknown binary frame kind {kind}")
+    return Frame(
+        kind=kind,
+        flags=flags,
+        sequence=sequence,
+        duration_ms=duration_ms,
+        payload=memoryview(data)[FRAME_HEADER.size:],
+    )
+
+
+def normalize_protocol(value: object) -> str:
+    protocol = str(value or PROTOCOL_JSON).lower()
+    return protocol if protocol in PROTOCOLS else PROTOCOL_JSON
@@ -4,10 +4,11 @@ Requires:
     pip install google-api-python-client google-auth-oauthlib google-auth-httplib2
 """
 
-import asyncio
 import logging
 import os
 
+from utils.executors import io_executor
+
 logger = logging.getLogger(__name__)
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
@@ -136,7 +137,7 @@ async def execute(payload: dict) -> dict:
             created = _create_event_sync(service, calendar_id, d, start, end, title, attendees)
             return {"conflict": False, "event": created}
 
-        result = await asyncio.to_thread(_run)
+        result = await io_executor.run(_run)
 
         if result.get("conflict"):
             return {
@@ -9,6 +9,7 @@ from pathlib import Path
 import jsonschema
 from openai import AsyncOpenAI, BadRequestError
 
+from extraction.llm_cache import cache_lookup, cache_store
 from utils.timezone import now as now_toronto, TIMEZONE
 
 logger = logging.getLogger(__name__)
@@ -54,10 +55,13 @@ async def extract_autopilot_json(
     schema_name: str = "autopilot_schema.json",
     prompt_name: str = "autopilot_extraction.txt",
     run_id: str = "",
+    use_cache: bool = True,
 ) -> dict:
     """
     Call OpenAI with tool_choice=required to extract structured data.
     Returns validated JSON dict. Raises on persistent validation failure.
+    Identical requests are answered from the LLM response cache unless
+    `use_cache` is False; only first-pass output that validates is cached.
     """
     model = model or os.getenv("OPENAI_AUTOPILOT_EXTRACT_MODEL") or os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
     schema = _load_schema(schema_name)
@@ -78,10 +82,11 @@ async def extract_autopilot_json(
 
     logger.info("[%s] Extraction request: model=%s, transcript_len=%d", run_id, model, len(transcript))
 
-    response = await _call_with_tools(client, model, messages, tools)
-
-    tool_call = response.choices[0].message.tool_calls[0]
-    raw_args = tool_call.function.arguments
+    request = _tool_request(model, messages, tools)
+    cache_key, raw_args = await cache_lookup("autopilot_extract", request, use_cache=use_cache)
+    cached = raw_args is not None
+    if not cached:
+        raw_args = await _call_with_tools(client, request)
     logger.info("[%s] Extraction raw output length: %d", run_id, len(raw_args))
 
     # First attempt: parse and validate
@@ -91,6 +96,8 @@ async def extract_autopilot_json(
         _auto_fix_actions(parsed)
         _validate(parsed, schema)
         logger.info("[%s] Extraction validated on first pass", run_id)
+        if not cached:
+            await cache_store(cache_key, raw_args)
         return parsed
     except (json.JSONDecodeError, jsonschema.ValidationError) as first_err:
         validation_error_msg = str(first_err)
@@ -117,10 +124,7 @@ async def extract_autopilot_json(
 
     logger.info("[%s] Starting repair pass", run_id)
 
-    repair_response = await _call_with_tools(client, model, repair_messages, tools)
-
-    repair_call = repair_response.choices[0].message.tool_calls[0]
-    repair_args = repair_call.function.arguments
+    repair_args = await _call_with_tools(client, _tool_request(model, repair_messages, tools))
 
     try:
         parsed = json.loads(repair_args)
@@ -142,23 +146,30 @@ def _auto_fix_actions(data: dict) -> None:
             action["requires_confirmation"] = True
 
 
-async def _call_with_tools(client: AsyncOpenAI, model: str, messages: list, tools: list):
-    """Call chat completions with tool_choice; fall back to no temperature if model rejects it."""
-    kwargs = dict(
+def _tool_request(model: str, messages: list, tools: list) -> dict:
+    """The chat completions kwargs of one extraction call."""
+    return dict(
         model=model,
         messages=messages,
         tools=tools,
         tool_choice={"type": "function", "function": {"name": "parse_autopilot_conversation"}},
         temperature=0,
     )
+
+
+async def _call_with_tools(client: AsyncOpenAI, request: dict) -> str:
+    """Call chat completions with tool_choice and return the tool call arguments;
+    fall back to no temperature if model rejects it."""
+    kwargs = dict(request)
     try:
-        return await client.chat.completions.create(**kwargs)
+        response = await client.chat.completions.create(**kwargs)
     except BadRequestError as e:
-        if "temperature" in str(e):
-            logger.info("Model %s does not support temperature=0, retrying without it", model)
-            kwargs.pop("temperature")
-            return await client.chat.completions.create(**kwargs)
-        raise
+        if "temperature" not in str(e):
+            raise
+        logger.info("Model %s does not support temperature=0, retrying without it", kwargs["model"])
+        kwargs.pop("temperature")
+        response = await client.chat.completions.create(**kwargs)
+    return response.choices[0].message.tool_calls[0].function.arguments
 
 
 def _validate(data: dict, schema: dict) -> None:
@@ -9,6 +9,7 @@ from pathlib import Path
 
 from openai import AsyncOpenAI, BadRequestError
 
+from extraction.llm_cache import cache_lookup, cache_store
 from utils.timezone import now as now_toronto, TIMEZONE
 
 logger = logging.getLogger(__name__)
@@ -42,22 +43,27 @@ def _build_tools(schema: dict) -> list[dict]:
     ]
 
 
-async def _call_with_tools(client: AsyncOpenAI, model: str, messages: list, tools: list):
-    kwargs = dict(
+def _tool_request(model: str, messages: list, tools: list) -> dict:
+    return dict(
         model=model,
         messages=messages,
         tools=tools,
         tool_choice={"type": "function", "function": {"name": "extract_calendar_event"}},
         temperature=0,
     )
+
+
+async def _call_with_tools(client: AsyncOpenAI, request: dict) -> str:
+    kwargs = dict(request)
     try:
-        return await client.chat.completions.create(**kwargs)
+        response = await client.chat.completions.create(**kwargs)
     except BadRequestError as e:
-        if "temperature" in str(e):
-            logger.info("Model %s rejects temperature=0, retrying without it", model)
-            kwargs.pop("temperature")
-            return await client.chat.completions.create(**kwargs)
-        raise
+        if "temperature" not in str(e):
+            raise
+        logger.info("Model %s rejects temperature=0, retrying without it", kwargs["model"])
+        kwargs.pop("temperature")
+        response = await client.chat.completions.create(**kwargs)
+    return response.choices[0].message.tool_calls[0].function.arguments
 
 
 async def extract_calendar_event(
@@ -67,6 +73,7 @@ async def extract_calendar_event(
     lang: str = "zh",
     model: str | None = None,
     context_event: dict | None = None,
+    use_cache: bool = True,
 ) -> dict:
     """
     Use GPT Tool Calling to extract date/time/title from user input.
@@ -108,12 +115,17 @@ async def extract_calendar_event(
         user_text[:200],
     )
 
-    response = await _call_with_tools(client, model, messages, tools)
-    tool_call = response.choices[0].message.tool_calls[0]
-    raw = tool_call.function.arguments
+    request = _tool_request(model, messages, tools)
+    cache_key, raw = await cache_lookup("calendar_extract", request, use_cache=use_cache)
+    cached = raw is not None
+    if not cached:
+        raw = await _call_with_tools(client, request)
     logger.info("Calendar extraction raw: %s", raw[:500])
 
     parsed = json.loads(raw)
+    if not cached:
+        # Only arguments that parse are worth replaying.
+        await cache_store(cache_key, raw)
 
     if context_event:
         if not parsed.get("date"):
@@ -0,0 +1,224 @@
+"""Response cache for the OpenAI calls made by the extractors and the drafter.
+
+Keys are a SHA-256 over the request: model, messages, tools, tool_choice and
+decoding params (temperature, response_format, ...). So a client retry, a
+replayed run or a resubmitted transcript is answered without another paid
+completion. The prompts inject the current time to the minute, and relative
+requests ("in 30 minutes") resolve against it, so by default the key keeps
+that precision: a replay within the same minute hits, one made later does
+not. LLM_CACHE_TIME_BUCKET_MINUTES floors timestamps in *system* messages to
+a coarser bucket before hashing, trading exact relative times for hit rate.
+User content is hashed verbatim.
+
+Two tiers, like speech/stt_cache.py:
+
+- memory:     LRU bounded by entry count (LLM_CACHE_MEMORY_ENTRIES)
+- persistent: the SQLite `cache` table with LLM_CACHE_TTL_SECONDS, shared by
+              workers and restarts; disabled with LLM_CACHE_PERSIST=false
+
+Only output the caller could use is stored: the extractors cache tool
+arguments once they parse and validate, and the extraction repair pass is
+never cached. LLM_CACHE_ENABLED=false turns the cache off,
+LLM_CACHE_DISABLED_SITES turns off single call sites (e.g. "reply_draft"),
+and every wrapped function takes `use_cache=False` for a fresh completion.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from store.runs import cache_get, cache_set
+from utils.executors import io_executor
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() not in {"0", "false", "no"}
+LLM_CACHE_MEMORY_ENTRIES = max(0, int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512")))
+LLM_CACHE_PERSIST = os.getenv("LLM_CACHE_PERSIST", "true").lower() not in {"0", "false", "no"}
+LLM_CACHE_TTL_SECONDS = max(1, int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")))
+LLM_CACHE_TIME_BUCKET_MINUTES = max(1, int(os.getenv("LLM_CACHE_TIME_BUCKET_MINUTES", "1")))
+LLM_CACHE_DISABLED_SITES = frozenset(
+    s.strip() for s in os.getenv("LLM_CACHE_DISABLED_SITES", "").split(",") if s.strip()
+)
+
+_PERSIST_PREFIX = "llm:"
+_UNCACHED_PARAMS = {"stream", "stream_options", "timeout", "extra_headers"}
+_TIMESTAMP = re.compile(r"\b(\d{4}-\d{2}-\d{2})([ T])(\d{2}):(\d{2})(?::\d{2}(?:\.\d+)?)?")
+
+
+def normalize_timestamps(text: str, bucket_minutes: int = LLM_CACHE_TIME_BUCKET_MINUTES) -> str:
+    """Floor every `YYYY-MM-DD HH:MM[:SS]` in `text` to the time bucket."""
+    def floor(m: re.Match) -> str:
+        minutes = int(m.group(3)) * 60 + int(m.group(4))
+        minutes -= minutes % bucket_minutes
+        return f"{m.group(1)}{m.group(2)}{minutes // 60:02d}:{minutes % 60:02d}"
+
+    return _TIMESTAMP.sub(floor, text)
+
+
+def llm_cache_key(request: dict[str, Any], bucket_minutes: int = LLM_CACHE_TIME_BUCKET_MINUTES) -> str:
+    params = {k: v for k, v in request.items() if k not in _UNCACHED_PARAMS}
+    messages = copy.deepcopy(params.get("messages") or [])
+    for message in messages:
+        if message.get("role") == "system" and isinstance(message.get("content"), str):
+            message["content"] = normalize_timestamps(message["content"], bucket_minutes)
+    params["messages"] = messages
+    header = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(header.encode("utf-8")).hexdigest()
+
+
+class LlmCache:
+    def __init__(
+        self,
+        enabled: bool = LLM_CACHE_ENABLED,
+        memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+        persist: bool = LLM_CACHE_PERSIST,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        disabled_sites: frozenset[str] = LLM_CACHE_DISABLED_SITES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.enabled = enabled
+        self.memory_limit = memory_entries
+        self.persist = persist
+        self.ttl_seconds = ttl_seconds
+        self.disabled_sites = disabled_sites
+        self._clock = clock
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._sites: dict[str, dict[str, int]] = {}
+        self.evictions = 0
+        self.persist_errors = 0
+
+    def enabled_for(self, site: str) -> bool:
+        return self.enabled and site not in self.disabled_sites
+
+    def get(self, key: str, site: str = "") -> str | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._count(site, "memory_hits")
+                return entry[1]
+        value = self._read_persistent(key)
+        with self._lock:
+            if value is None:
+                self._count(site, "misses")
+                return None
+            self._count(site, "persistent_hits")
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._remember(key, value)
+        self._write_persistent(key, value)
+
+    def _count(self, site: str, field: str) -> None:
+        stats = self._sites.setdefault(site, {"memory_hits": 0, "persistent_hits": 0, "misses": 0})
+        stats[field] += 1
+
+    def _remember(self, key: str, value: str) -> None:
+        if self.memory_limit <= 0:
+            return
+        self._memory.pop(key, None)
+        self._memory[key] = (self._clock() + self.ttl_seconds, value)
+        while len(self._memory) > self.memory_limit:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _read_persistent(self, key: str) -> str | None:
+        if not self.persist:
+            return None
+        try:
+            raw = cache_get(_PERSIST_PREFIX + key)
+            return json.loads(raw) if raw is not None else None
+        except Exception:
+            self.persist_errors += 1
+            logger.warning("event=llm_cache_read_failed", exc_info=True)
+            return None
+
+    def _write_persistent(self, key: str, value: str) -> None:
+        if not self.persist:
+            return
+        try:
+            cache_set(_PERSIST_PREFIX + key, json.dumps(value, ensure_ascii=False), ttl=self.ttl_seconds)
+        except Exception:
+            self.persist_errors += 1
+            logger.warning("event=llm_cache_write_failed", exc_info=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            sites = {}
+            for site, stats in self._sites.items():
+                hits = stats["memory_hits"] + stats["persistent_hits"]
+                lookups = hits + stats["misses"]
+                sites[site] = {**stats, "hits": hits, "hit_ratio": round(hits / lookups, 4) if lookups else 0.0}
+            hits = sum(s["hits"] for s in sites.values())
+            lookups = hits + sum(s["misses"] for s in sites.values())
+            return {
+                "enabled": self.enabled,
+                "hits": hits,
+                "misses": lookups - hits,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "sites": sites,
+                "disabled_sites": sorted(self.disabled_sites),
+                "memory_entries": len(self._memory),
+                "memory_limit_entries": self.memory_limit,
+                "evictions": self.evictions,
+                "persist_enabled": self.persist,
+                "persist_errors": self.persist_errors,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+llm_cache = LlmCache()
+
+
+async def cache_lookup(site: str, request: dict[str, Any], *, use_cache: bool = True) -> tuple[str | None, str | None]:
+    """(key, cached output) for `request`; the key is None when the call is uncached.
+
+    Hash `request` (the create() kwargs) before the call runs, so fallbacks
+    that edit it (dropping temperature, ...) keep the original key.
+    """
+    if not use_cache or not llm_cache.enabled_for(site):
+        return None, None
+    key = llm_cache_key(request)
+    cached = await io_executor.run(llm_cache.get, key, site)
+    if cached is not None:
+        logger.info("event=llm_cache_hit site=%s key=%s", site, key[:12])
+    return key, cached
+
+
+async def cache_store(key: str | None, value: str) -> None:
+    """Cache `value` under a `cache_lookup` key; callers store only output they could use."""
+    if key is not None:
+        await io_executor.run(llm_cache.put, key, value)
+
+
+async def cached_completion(
+    site: str,
+    request: dict[str, Any],
+    call: Callable[[], Awaitable[str]],
+    *,
+    use_cache: bool = True,
+) -> str:
+    """Return the cached output for `request`, or run `call` and cache it.
+
+    For outputs that are always usable; callers that parse or validate the
+    output use `cache_lookup`/`cache_store` and store only what passed.
+    """
+    key, cached = await cache_lookup(site, request, use_cache=use_cache)
+    if cached is not None:
+        return cached
+    value = await call()
+    await cache_store(key, value)
+    return value
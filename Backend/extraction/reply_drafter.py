@@ -3,15 +3,21 @@
 import json
 import logging
 import os
+from collections.abc import AsyncIterator
 from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
 from openai import AsyncOpenAI, BadRequestError
 
+from extraction.llm_cache import cache_lookup, cache_store, cached_completion
+
 logger = logging.getLogger(__name__)
 
 PROMPT_DIR = Path(__file__).resolve().parent / "prompt"
 
+_CACHE_SITE = "reply_draft"
+
 
 @lru_cache(maxsize=4)
 def _load_prompt(name: str = "autopilot_reply_draft.txt") -> str:
@@ -20,19 +26,13 @@ def _load_prompt(name: str = "autopilot_reply_draft.txt") -> str:
         return f.read().strip()
 
 
-async def generate_reply_draft(
-    client: AsyncOpenAI,
+def _request_kwargs(
     transcript: str,
     extracted: dict,
     evidence: list[dict],
-    *,
-    model: str | None = None,
-    run_id: str = "",
+    model: str | None,
+    run_id: str,
 ) -> dict:
-    """
-    Generate a reply draft with citations.
-    Returns {"reply_text": "...", "citations": [...]}
-    """
     model = model or os.getenv("OPENAI_AUTOPILOT_REPLY_MODEL") or os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
     system_prompt = _load_prompt("autopilot_reply_draft.txt")
 
@@ -54,7 +54,7 @@ async def generate_reply_draft(
 
     logger.info("[%s] Reply draft request: model=%s", run_id, model)
 
-    kwargs = dict(
+    return dict(
         model=model,
         messages=[
             {"role": "system", "content": system_prompt},
@@ -63,29 +63,209 @@ async def generate_reply_draft(
         temperature=0.2,
         response_format={"type": "json_object"},
     )
+
+
+async def _create(client: AsyncOpenAI, kwargs: dict):
     try:
-        response = await client.chat.completions.create(**kwargs)
+        return await client.chat.completions.create(**kwargs)
     except BadRequestError as e:
         if "temperature" in str(e):
-            logger.info("Model %s does not support temperature, retrying without it", model)
+            logger.info("Model %s does not support temperature, retrying without it", kwargs["model"])
             kwargs.pop("temperature")
-            response = await client.chat.completions.create(**kwargs)
+            return await client.chat.completions.create(**kwargs)
         elif "response_format" in str(e):
-            logger.info("Model %s does not support response_format, retrying without it", model)
+            logger.info("Model %s does not support response_format, retrying without it", kwargs["model"])
             kwargs.pop("response_format", None)
             kwargs.pop("temperature", None)
-            response = await client.chat.completions.create(**kwargs)
+            return await client.chat.completions.create(**kwargs)
         else:
             raise
 
-    raw = response.choices[0].message.content
-    logger.info("[%s] Reply draft generated, length=%d", run_id, len(raw))
 
+def _parse_draft(raw: str) -> dict:
     try:
-        result = json.loads(raw)
+        result = json.loads(_strip_fence(raw))
         return {
             "reply_text": result.get("reply_text", raw),
             "citations": result.get("citations", []),
         }
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, AttributeError):
         return {"reply_text": raw, "citations": []}
+
+
+def _strip_fence(raw: str) -> str:
+    text = raw.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text
+
+
+async def generate_reply_draft(
+    client: AsyncOpenAI,
+    transcript: str,
+    extracted: dict,
+    evidence: list[dict],
+    *,
+    model: str | None = None,
+    run_id: str = "",
+    use_cache: bool = True,
+) -> dict:
+    """
+    Generate a reply draft with citations.
+    Returns {"reply_text": "...", "citations": [...]}
+    """
+    kwargs = _request_kwargs(transcript, extracted, evidence, model, run_id)
+
+    async def call() -> str:
+        response = await _create(client, kwargs)
+        return response.choices[0].message.content
+
+    raw = await cached_completion(_CACHE_SITE, kwargs, call, use_cache=use_cache)
+    logger.info("[%s] Reply draft generated, length=%d", run_id, len(raw))
+    return _parse_draft(raw)
+
+
+async def stream_reply_draft(
+    client: AsyncOpenAI,
+    transcript: str,
+    extracted: dict,
+    evidence: list[dict],
+    *,
+    model: str | None = None,
+    run_id: str = "",
+    use_cache: bool = True,
+) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Streaming generate_reply_draft.
+    Yields ("delta", text) for each newly decoded piece of reply_text as the
+    completion streams in, then ("draft", {"reply_text": ..., "citations": [...]}).
+    A cached draft arrives as a single delta.
+    """
+    kwargs = _request_kwargs(transcript, extracted, evidence, model, run_id)
+    cache_key, cached = await cache_lookup(_CACHE_SITE, kwargs, use_cache=use_cache)
+    if cached is not None:
+        delta = ReplyTextStream().feed(cached)
+        if delta:
+            yield "delta", delta
+        yield "draft", _parse_draft(cached)
+        return
+
+    kwargs["stream"] = True
+    stream = await _create(client, kwargs)
+
+    parser = ReplyTextStream()
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        piece = chunk.choices[0].delta.content
+        if piece:
+            delta = parser.feed(piece)
+            if delta:
+                yield "delta", delta
+
+    logger.info("[%s] Reply draft streamed, length=%d", run_id, len(parser.raw))
+    await cache_store(cache_key, parser.raw)
+    yield "draft", _parse_draft(parser.raw)
+
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class ReplyTextStream:
+    """Incremental decoder for one string field of a streamed JSON object.
+
+    `feed(piece)` takes the next completion delta and returns the characters
+    of the top-level `key` string that it completed (escapes included, even
+    when split across deltas), so reply text can be shown or spoken before
+    the object is closed. Output that does not start like JSON (a model
+    without response_format support) is passed through as the reply itself.
+    """
+
+    def __init__(self, key: str = "reply_text") -> None:
+        self.key = key
+        self._raw: list[str] = []
+        self._mode: str | None = None
+        self._depth = 0
+        self._expect = "key"
+        self._in_string = False
+        self._string_role: str | None = None
+        self._chars: list[str] = []
+        self._last_key: str | None = None
+        self._escape: str | None = None
+        self._high_surrogate: int | None = None
+
+    @property
+    def raw(self) -> str:
+        return "".join(self._raw)
+
+    def feed(self, piece: str) -> str:
+        self._raw.append(piece)
+        out: list[str] = []
+        for ch in piece:
+            if self._mode is None:
+                if ch.isspace():
+                    continue
+                self._mode = "json" if ch in "{`" else "text"
+            if self._mode == "text":
+                out.append(ch)
+            else:
+                self._step(ch, out)
+        return "".join(out)
+
+    def _emit(self, text: str, out: list[str]) -> None:
+        if self._string_role == "capture":
+            out.append(text)
+        elif self._string_role == "key":
+            self._chars.append(text)
+
+    def _step(self, ch: str, out: list[str]) -> None:
+        if self._in_string:
+            if self._escape is not None:
+                self._escape += ch
+                if self._escape[0] != "u":
+                    self._decoded(_ESCAPES.get(self._escape, self._escape), out)
+                elif len(self._escape) == 5:
+                    self._decoded_unicode(int(self._escape[1:], 16), out)
+                return
+            if ch == "\\":
+                self._escape = ""
+            elif ch == '"':
+                if self._string_role == "key":
+                    self._last_key = "".join(self._chars)
+                self._in_string = False
+                self._string_role = None
+            else:
+                self._emit(ch, out)
+            return
+
+        if ch == '"':
+            self._in_string = True
+            self._chars = []
+            if self._depth == 1 and self._expect == "key":
+                self._string_role = "key"
+            elif self._depth == 1 and self._last_key == self.key:
+                self._string_role = "capture"
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+        elif self._depth == 1 and ch == ":":
+            self._expect = "value"
+        elif self._depth == 1 and ch == ",":
+            self._expect = "key"
+            self._last_key = None
+
+    def _decoded(self, text: str, out: list[str]) -> None:
+        self._escape = None
+        self._emit(text, out)
+
+    def _decoded_unicode(self, code: int, out: list[str]) -> None:
+        if 0xD800 <= code < 0xDC00:
+            self._escape = None
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._decoded(chr(code), out)
@@ -0,0 +1,128 @@
+"""Speculative calendar extraction on stable streaming partials.
+
+When a /voice/ws partial transcript has been stable for a few debounce
+rounds, extraction is started in the background. When the final transcript
+arrives, the speculative result is reused if the text is equivalent (same
+words once case, whitespace and punctuation are ignored) and the session
+context has not changed; otherwise the task is cancelled and the caller runs
+extraction as usual.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from opencc import OpenCC
+
+from speech.stats import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+STREAM_SPECULATIVE_EXTRACTION = os.getenv("STREAM_SPECULATIVE_EXTRACTION", "true").lower() not in {"0", "false", "no"}
+STREAM_SPECULATIVE_STABLE_N = max(1, int(os.getenv("STREAM_SPECULATIVE_STABLE_N", "2")))
+
+_IGNORED_RE = re.compile(r"[\s\.,!?;:，。！？；：、\"'“”‘’…\-—]+")
+_t2s = OpenCC("t2s")
+
+
+def extraction_key(text: str, context: dict | None = None) -> str:
+    """Text and context reduced to what can change the extraction result."""
+    words = _IGNORED_RE.sub("", _t2s.convert(text or "")).lower()
+    return words + "\x00" + json.dumps(context, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class SpeculationStats:
+    def __init__(self) -> None:
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.failed = 0
+        self.saved = LatencyStats()
+
+    def snapshot(self) -> dict[str, Any]:
+        decided = self.hits + self.misses
+        return {
+            "enabled": STREAM_SPECULATIVE_EXTRACTION,
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failed": self.failed,
+            "hit_rate": round(self.hits / decided, 4) if decided else 0.0,
+            "saved_ms": self.saved.snapshot(),
+        }
+
+
+speculation_stats = SpeculationStats()
+
+
+class SpeculativeExtraction:
+    """One in-flight speculative extraction per streaming turn."""
+
+    def __init__(
+        self,
+        extract: Callable[[str, dict | None], Awaitable[dict]],
+        stats: SpeculationStats = speculation_stats,
+    ) -> None:
+        self._extract = extract
+        self._stats = stats
+        self._key: str | None = None
+        self._task: asyncio.Task | None = None
+        self._started_at = 0.0
+
+    @property
+    def pending(self) -> bool:
+        return self._task is not None
+
+    def start(self, text: str, context: dict | None = None) -> bool:
+        """Begin extracting `text`; a no-op when the same text is already running."""
+        key = extraction_key(text, context)
+        if key == self._key:
+            return False
+        self.cancel()
+        self._key = key
+        self._started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run(text, context))
+        self._task.add_done_callback(self._log_failure)
+        self._stats.started += 1
+        return True
+
+    async def _run(self, text: str, context: dict | None) -> tuple[dict, float]:
+        result = await self._extract(text, context)
+        return result, time.perf_counter()
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Speculative extraction failed", exc_info=task.exception())
+
+    async def take(self, text: str, context: dict | None = None) -> dict | None:
+        """Return the speculative result for the final text, or None to re-run."""
+        task, key = self._task, self._key
+        self._task, self._key = None, None
+        if task is None:
+            return None
+        if key != extraction_key(text, context):
+            task.cancel()
+            self._stats.misses += 1
+            return None
+
+        asked_at = time.perf_counter()
+        try:
+            result, finished_at = await task
+        except Exception:
+            self._stats.failed += 1
+            self._stats.misses += 1
+            return None
+        self._stats.hits += 1
+        self._stats.saved.observe((min(asked_at, finished_at) - self._started_at) * 1000)
+        return result
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task, self._key = None, None
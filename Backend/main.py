@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import socket
@@ -15,13 +16,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi import Request
 from fastapi.responses import JSONResponse
 
-from api.autopilot import router as autopilot_router
+from api.autopilot import router as autopilot_router, run_autopilot_job
 from api.health    import router as health_router
 from api.settings  import router as settings_router
-from api.voice     import router as voice_router
+from api.voice     import router as voice_router, tts_template_texts
 from rag.config import load_rag_config, validate_rag_config
 from resources.base import ResourceFailed
+from speech.admission import VoiceBusy
+from speech.scheduler import SttOverloaded
+from speech.speech import prewarm_tts
+from store.jobs import job_workers
+from store.voice_sessions import run_session_sweeper, voice_sessions
 import resources
+from utils.executors import shutdown_executors
 from utils.warmup.config import load_config
 from utils.warmup.runtime import create_runtime
 
@@ -32,8 +39,18 @@ async def _lifespan(app: FastAPI):
     runtime = create_runtime(resources.registry, load_config(), process_type="http")
     app.state.warmup_runtime = runtime
     runtime.start()
+    prewarm = None
+    if os.getenv("TTS_PREWARM_TEMPLATES", "true").lower() not in {"0", "false", "no"}:
+        prewarm = asyncio.create_task(prewarm_tts(tts_template_texts()))
+    sweeper = asyncio.create_task(run_session_sweeper(voice_sessions))
+    job_workers.start(run_autopilot_job)
     yield
+    await job_workers.stop()
+    sweeper.cancel()
+    if prewarm is not None:
+        prewarm.cancel()
     await runtime.shutdown()
+    shutdown_executors()
 
 
 app = FastAPI(title="Voice Schedule Assistant", lifespan=_lifespan)
@@ -49,6 +66,22 @@ async def _resource_failed_handler(request: Request, exc: ResourceFailed):
         content={"error": "service_unavailable", "detail": str(exc)},
     )
 
+@app.exception_handler(SttOverloaded)
+async def _stt_overloaded_handler(request: Request, exc: SttOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"error": "overloaded", "detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(VoiceBusy)
+async def _voice_busy_handler(request: Request, exc: VoiceBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"error": "busy", "detail": str(exc), "retry_after_s": exc.retry_after_s},
+        headers={"Retry-After": str(exc.retry_after_s)},
+    )
+
 logger = logging.getLogger(__name__)
 
 app.add_middleware(
@@ -16,6 +16,7 @@ load_dotenv(BACKEND_DIR.parent / ".env")
 
 # ── Eager imports: pay the cost once at startup, not during tool calls ──
 from actions.dispatcher import execute_action
+from api.pipeline import batch_events, create_batch_runs
 from ai_client import get_openai_client
 from extraction.autopilot_extractor import extract_autopilot_json
 from extraction.reply_drafter import generate_reply_draft
@@ -185,6 +186,33 @@ async def draft_reply(
     return json.dumps(result, ensure_ascii=False, indent=2)
 
 
+@mcp.tool()
+async def run_autopilot_batch(transcripts: list[str]) -> str:
+    """Run many transcripts through the full autopilot pipeline in one call.
+
+    Each transcript is analyzed, matched against the knowledge base, drafted a
+    reply for and given action previews, like POST /autopilot/run. Knowledge
+    base lookups for the whole batch share a single embeddings request. Every
+    transcript is recorded as a run (see list_runs); no actions are executed.
+
+    Args:
+        transcripts: Transcript texts to process (default limit 500)
+
+    Returns a JSON list in input order: {"index", "run_id", "result"} per
+    success, {"index", "run_id", "status_code", "detail"} per failure.
+    """
+    client = await get_openai_client()
+    try:
+        run_ids = create_batch_runs(transcripts)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    items: list[dict | None] = [None] * len(run_ids)
+    async for event, data in batch_events(run_ids, transcripts, client):
+        if event == "item":
+            items[data["index"]] = data
+    return json.dumps(items, ensure_ascii=False, indent=2, default=str)
+
+
 @mcp.tool()
 async def list_runs(limit: int = 20, run_type: str | None = None) -> str:
     """List recent autopilot run history from the audit log.
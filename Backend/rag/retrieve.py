@@ -28,6 +28,21 @@ async def retrieve(
     Retrieve top-K chunks from the knowledge base.
     Returns list of {doc, chunk, score, text}.
     """
+    return (await retrieve_many([query], client, top_k=top_k, model=model))[0]
+
+
+async def retrieve_many(
+    queries: list[str],
+    client,
+    *,
+    top_k: int = 5,
+    model: str | None = None,
+) -> list[list[dict]]:
+    """
+    `retrieve` for several queries at once: the queries missing from the cache
+    are embedded in a single embeddings request and searched as one matrix.
+    Returns one result list per query, in order.
+    """
     import faiss
     import resources
     from resources import require
@@ -37,41 +52,46 @@ async def retrieve(
     if refresh is not None:
         snapshot = await refresh()
 
-    cache_key = _query_hash(query, top_k, snapshot.version)
-    if cache_key in _retrieval_cache:
-        logger.info("Retrieval cache hit for query hash %s", cache_key)
-        return _retrieval_cache[cache_key]
-
-    model = model or os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
-
-    # Embed query
-    resp = await client.embeddings.create(model=model, input=[query])
-    q_vec = np.array([resp.data[0].embedding], dtype="float32")
-    faiss.normalize_L2(q_vec)
+    keys = [_query_hash(query, top_k, snapshot.version) for query in queries]
+    results: list[list[dict] | None] = [_retrieval_cache.get(key) for key in keys]
+    misses = list(dict.fromkeys(q for q, r in zip(queries, results) if r is None))
+    for key, r in zip(keys, results):
+        if r is not None:
+            logger.info("Retrieval cache hit for query hash %s", key)
+    if not misses:
+        return results
 
     index = snapshot.index
     meta = snapshot.metadata
-
     actual_k = min(top_k, index.ntotal)
     if actual_k == 0:
-        return []
-
-    scores, indices = index.search(q_vec, actual_k)
-
-    results = []
-    for rank in range(actual_k):
-        idx = int(indices[0][rank])
-        if idx < 0:
-            continue
-        score = float(scores[0][rank])
-        m = meta[idx]
-        results.append({
-            "doc": m["doc"],
-            "chunk": m["chunk_index"],
-            "score": round(score, 4),
-            "text": m["text"],
-        })
-
-    _retrieval_cache[cache_key] = results
-    logger.info("Retrieved %d chunks for query (len=%d)", len(results), len(query))
-    return results
+        return [r if r is not None else [] for r in results]
+
+    model = model or os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+
+    # Embed queries
+    resp = await client.embeddings.create(model=model, input=misses)
+    q_vecs = np.array([d.embedding for d in resp.data], dtype="float32")
+    faiss.normalize_L2(q_vecs)
+
+    scores, indices = index.search(q_vecs, actual_k)
+
+    found: dict[str, list[dict]] = {}
+    for row, query in enumerate(misses):
+        hits = []
+        for rank in range(actual_k):
+            idx = int(indices[row][rank])
+            if idx < 0:
+                continue
+            m = meta[idx]
+            hits.append({
+                "doc": m["doc"],
+                "chunk": m["chunk_index"],
+                "score": round(float(scores[row][rank]), 4),
+                "text": m["text"],
+            })
+        found[query] = hits
+        _retrieval_cache[_query_hash(query, top_k, snapshot.version)] = hits
+        logger.info("Retrieved %d chunks for query (len=%d)", len(hits), len(query))
+
+    return [r if r is not None else found[q] for q, r in zip(queries, results)]
@@ -3,7 +3,7 @@ resources — centralized resource providers for Voice-Autopilot.
 
 Public API
 ----------
-    from resources import whisper, piper_zh, piper_en, faiss, openai
+    from resources import whisper, whisper_partial, piper_zh, piper_en, faiss, openai
     from resources import registry, require, ResourceFailed
 
 All providers are registered in `registry` at import time.
@@ -18,12 +18,19 @@ from .faiss    import FaissProvider
 from .openai   import OpenAIProvider
 
 whisper  = WhisperProvider()
+# Lighter model for streaming partials; skipped unless WHISPER_PARTIAL_MODEL is set.
+whisper_partial = WhisperProvider(
+    "whisper_stt_partial",
+    model_env="WHISPER_PARTIAL_MODEL",
+    default_model="",
+    required=False,
+)
 piper_zh = PiperProvider("zh", required=False)
 piper_en = PiperProvider("en", required=False)
 faiss    = FaissProvider()
 openai   = OpenAIProvider()
 
-for _p in (whisper, piper_zh, piper_en, faiss, openai):
+for _p in (whisper, whisper_partial, piper_zh, piper_en, faiss, openai):
     registry.register(_p)
 
 __all__ = [
@@ -31,6 +38,7 @@ __all__ = [
     "require",
     "ResourceFailed",
     "whisper",
+    "whisper_partial",
     "piper_zh",
     "piper_en",
     "faiss",
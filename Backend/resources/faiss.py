@@ -7,6 +7,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+from utils.executors import io_executor
+
 from .base import ResourceProvider, ResourceStatus
 
 logger = logging.getLogger(__name__)
@@ -102,7 +104,7 @@ class FaissProvider(ResourceProvider[FaissSnapshot]):
         )
 
     async def _load(self) -> FaissSnapshot:
-        return await asyncio.to_thread(self._load_snapshot)
+        return await io_executor.run(self._load_snapshot)
 
     def _replace_snapshot(self, snapshot: FaissSnapshot) -> None:
         self._instance = snapshot
@@ -138,7 +140,7 @@ class FaissProvider(ResourceProvider[FaissSnapshot]):
             try:
                 if self._persisted_version() == current.version:
                     return current
-                snapshot = await asyncio.to_thread(self._load_snapshot)
+                snapshot = await io_executor.run(self._load_snapshot)
             except Exception:
                 logger.warning("event=faiss_snapshot_refresh_failed", exc_info=True)
                 return current
@@ -4,30 +4,29 @@ import os
 import threading
 from pathlib import Path
 
+from speech.workers import SPEECH_TTS_PROCESSES, RemotePiperVoice, SpeechWorkerPool, process_mode
+from utils.executors import PIPER_INTRA_OP_THREADS
+
 from .base import ResourceProvider
 
 
-_G2PW_INIT_LOCK = threading.Lock()
+_ORT_PATCH_LOCK = threading.Lock()
 
 
-def _load_chinese_phonemizer(factory):
-    g2pw_api = importlib.import_module("g2pw.api")
-    onnxruntime = g2pw_api.onnxruntime
+def _with_session_options(onnxruntime, configure, factory):
+    """Run `factory` while every new InferenceSession gets `configure(sess_options)`."""
     original_inference_session = onnxruntime.InferenceSession
 
     def inference_session(*args, sess_options=None, **kwargs):
         if sess_options is not None:
-            sess_options.graph_optimization_level = (
-                onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
-            )
+            configure(sess_options)
         return original_inference_session(
             *args,
             sess_options=sess_options,
             **kwargs,
         )
 
-    # g2pw hard-codes ORT_ENABLE_ALL, which can hang while optimizing its model.
-    with _G2PW_INIT_LOCK:
+    with _ORT_PATCH_LOCK:
         onnxruntime.InferenceSession = inference_session
         try:
             return factory()
@@ -35,14 +34,54 @@ def _load_chinese_phonemizer(factory):
             onnxruntime.InferenceSession = original_inference_session
 
 
+def _load_chinese_phonemizer(factory):
+    g2pw_api = importlib.import_module("g2pw.api")
+    onnxruntime = g2pw_api.onnxruntime
+
+    def configure(sess_options):
+        sess_options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+        )
+
+    # g2pw hard-codes ORT_ENABLE_ALL, which can hang while optimizing its model.
+    return _with_session_options(onnxruntime, configure, factory)
+
+
+def _load_voice(model_path: str):
+    import onnxruntime
+    from piper import PiperVoice
+
+    def configure(sess_options):
+        # Share the cores with the other TTS and STT workers (utils/executors.py).
+        sess_options.intra_op_num_threads = PIPER_INTRA_OP_THREADS
+        sess_options.inter_op_num_threads = 1
+
+    return _with_session_options(
+        onnxruntime,
+        configure,
+        lambda: PiperVoice.load(model_path, use_cuda=False),
+    )
+
+
 class PiperProvider(ResourceProvider):
     def __init__(self, lang: str, required: bool = False) -> None:
         super().__init__(f"piper_tts_{lang}", required)
         self._lang = lang
 
     async def _load(self):
-        from piper import PiperVoice
+        if process_mode():
+            pool = SpeechWorkerPool(
+                self.name,
+                "speech.workers:PiperHandler",
+                {"lang": self._lang},
+                size=SPEECH_TTS_PROCESSES,
+            )
+            await asyncio.to_thread(pool.start)
+            return RemotePiperVoice(pool)
+        return await asyncio.to_thread(self.load_sync)
 
+    def load_sync(self):
+        """Load and prime the voice in this process (also used by speech workers)."""
         models_dir = Path(os.getenv(
             "PIPER_MODELS_DIR",
             str(Path(__file__).resolve().parent.parent / "models" / "piper"),
@@ -61,14 +100,13 @@ class PiperProvider(ResourceProvider):
             )
             prime_text = "Hello"
 
-        voice = await asyncio.to_thread(PiperVoice.load, model_path, use_cuda=False)
+        voice = _load_voice(model_path)
         if self._lang == "zh":
             from piper.phonemize_chinese import ChinesePhonemizer
 
-            voice._chinese_phonemizer = await asyncio.to_thread(
-                _load_chinese_phonemizer,
+            voice._chinese_phonemizer = _load_chinese_phonemizer(
                 lambda: ChinesePhonemizer(voice.download_dir / "g2pW"),
             )
         # Prime ONNX session with a short synthesis
-        await asyncio.to_thread(lambda: list(voice.synthesize(prime_text)))
+        list(voice.synthesize(prime_text))
         return voice
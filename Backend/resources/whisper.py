@@ -1,18 +1,56 @@
 import asyncio
 import os
 
+from speech.workers import SPEECH_STT_PROCESSES, RemoteWhisperModel, SpeechWorkerPool, process_mode
+from utils.executors import WHISPER_CPU_THREADS
+
 from .base import ResourceProvider
 
 
 class WhisperProvider(ResourceProvider):
-    def __init__(self) -> None:
-        super().__init__("whisper_stt", required=True)
+    """A faster-whisper model. The primary tier ("whisper_stt", WHISPER_MODEL)
+    serves finals and uploads; the optional partial tier
+    ("whisper_stt_partial", WHISPER_PARTIAL_MODEL) serves streaming partials."""
+
+    def __init__(
+        self,
+        name: str = "whisper_stt",
+        model_env: str = "WHISPER_MODEL",
+        default_model: str = "small",
+        required: bool = True,
+    ) -> None:
+        super().__init__(name, required=required)
+        self._model_env     = model_env
+        self._default_model = default_model
+
+    @property
+    def model_name(self) -> str:
+        return os.getenv(self._model_env, self._default_model).strip()
 
     async def _load(self):
+        if not self.model_name:
+            raise RuntimeError(f"{self._model_env} is not set")
+        if process_mode():
+            pool = SpeechWorkerPool(
+                self.name,
+                "speech.workers:WhisperHandler",
+                {"name": self.name, "model_env": self._model_env, "default_model": self._default_model},
+                size=SPEECH_STT_PROCESSES,
+            )
+            await asyncio.to_thread(pool.start)
+            return RemoteWhisperModel(pool)
+        # One CTranslate2 worker per scheduler slot so concurrent jobs run in parallel
+        num_workers = max(1, int(os.getenv("STT_WORKERS", "1")))
+        return await asyncio.to_thread(self.load_sync, num_workers)
+
+    def load_sync(self, num_workers: int = 1):
+        """Load and prime the model in this process (also used by speech workers)."""
         import numpy as np
         from faster_whisper import WhisperModel
 
-        model_name   = os.getenv("WHISPER_MODEL",              "small")
+        model_name   = self.model_name
+        if not model_name:
+            raise RuntimeError(f"{self._model_env} is not set")
         device       = os.getenv("WHISPER_DEVICE",             "cpu")
         compute_type = os.getenv("WHISPER_COMPUTE_TYPE",       "int8")
         beam_size    = int(os.getenv("WHISPER_BEAM_SIZE",      "1"))
@@ -20,22 +58,24 @@ class WhisperProvider(ResourceProvider):
         vad_filter   = os.getenv("WHISPER_VAD_FILTER", "true").lower() not in {"0","false","no"}
         no_speech_th = float(os.getenv("WHISPER_NO_SPEECH_THRESHOLD", "0.5"))
 
-        model = await asyncio.to_thread(
-            WhisperModel, model_name, device=device, compute_type=compute_type
+        model = WhisperModel(
+            model_name,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=WHISPER_CPU_THREADS,
+            num_workers=num_workers,
         )
 
         # Prime CTranslate2 JIT kernels with 1s silence
         silence = np.zeros(16_000, dtype=np.float32)
-        await asyncio.to_thread(
-            lambda: list(
-                model.transcribe(
-                    silence,
-                    language="zh",
-                    beam_size=beam_size,
-                    best_of=best_of,
-                    vad_filter=vad_filter,
-                    no_speech_threshold=no_speech_th,
-                )[0]
-            )
+        list(
+            model.transcribe(
+                silence,
+                language="zh",
+                beam_size=beam_size,
+                best_of=best_of,
+                vad_filter=vad_filter,
+                no_speech_threshold=no_speech_th,
+            )[0]
         )
         return model
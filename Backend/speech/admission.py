@@ -0,0 +1,258 @@
+"""Admission control and per-session fairness for voice work.
+
+Without a cap every `/voice/ws` connection and `/voice` upload starts
+partial STT and STREAM_TTS_WORKERS synthesis jobs of its own, and under
+load all of them slow down together. `voice_admission` bounds the number of
+active voice sessions per process (VOICE_MAX_SESSIONS). A session that
+finds no free slot waits up to VOICE_ADMISSION_WAIT_S in a short queue
+(VOICE_ADMISSION_QUEUE); past that it is turned away with `VoiceBusy`,
+which carries a retry hint for the client.
+
+Every admitted session becomes a `Flow` (its key plus a weight) held in a
+contextvar, so tasks spawned for the session inherit it. The STT scheduler
+and the TTS gate order contended work across flows with start-time fair
+queueing: each job gets a virtual start tag that advances by 1/weight per
+job of its flow, and the lowest tag runs next. That is weighted round-robin
+between sessions: a chatty session cannot starve the others, and streams
+(VOICE_WEIGHT_STREAM) can be given a larger share than uploads
+(VOICE_WEIGHT_UPLOAD).
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+from utils.executors import EXECUTOR_TTS_WORKERS
+
+VOICE_MAX_SESSIONS = max(0, int(os.getenv("VOICE_MAX_SESSIONS", "32")))
+VOICE_ADMISSION_QUEUE = max(0, int(os.getenv("VOICE_ADMISSION_QUEUE", "8")))
+VOICE_ADMISSION_WAIT_S = max(0.0, float(os.getenv("VOICE_ADMISSION_WAIT_S", "2")))
+VOICE_RETRY_AFTER_S = max(1, int(os.getenv("VOICE_RETRY_AFTER_S", "5")))
+VOICE_WEIGHT_STREAM = max(0.1, float(os.getenv("VOICE_WEIGHT_STREAM", "2")))
+VOICE_WEIGHT_UPLOAD = max(0.1, float(os.getenv("VOICE_WEIGHT_UPLOAD", "1")))
+
+_KIND_WEIGHTS = {"stream": VOICE_WEIGHT_STREAM, "upload": VOICE_WEIGHT_UPLOAD}
+
+
+class VoiceBusy(Exception):
+    """Raised when no voice session slot became free in time."""
+
+    def __init__(self, retry_after_s: int = VOICE_RETRY_AFTER_S) -> None:
+        super().__init__("Voice capacity exhausted, retry shortly")
+        self.retry_after_s = retry_after_s
+
+    def payload(self) -> dict[str, Any]:
+        return {
+            "type": "busy",
+            "code": "busy",
+            "message": str(self),
+            "retry_after_s": self.retry_after_s,
+        }
+
+
+@dataclass(frozen=True)
+class Flow:
+    key: str
+    weight: float = 1.0
+
+
+_current_flow: ContextVar[Flow | None] = ContextVar("voice_flow", default=None)
+
+
+def current_flow() -> Flow | None:
+    return _current_flow.get()
+
+
+class FairQueue:
+    """Start-time fair queueing tags; lower tags are served first."""
+
+    _PRUNE_AT = 1024
+
+    def __init__(self) -> None:
+        self._vclock = 0.0
+        self._finish: dict[str, float] = {}
+
+    def stamp(self, flow: Flow | None) -> float:
+        """Tag a new job of `flow`; jobs outside any flow run at the current clock."""
+        if flow is None:
+            return self._vclock
+        start = max(self._vclock, self._finish.get(flow.key, 0.0))
+        self._finish[flow.key] = start + 1.0 / flow.weight
+        return start
+
+    def advance(self, tag: float) -> None:
+        """Move the virtual clock to the tag of the job entering service."""
+        self._vclock = max(self._vclock, tag)
+        if len(self._finish) > self._PRUNE_AT:
+            self._finish = {k: v for k, v in self._finish.items() if v > self._vclock}
+
+
+class FairGate:
+    """A semaphore whose contended slots go to the flow with the lowest tag."""
+
+    def __init__(self, slots: int) -> None:
+        self.slots = max(1, slots)
+        self._fair = FairQueue()
+        self._seq = itertools.count()
+        self._waiters: list[tuple[float, int, asyncio.Future]] = []
+        self.active = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, fut in self._waiters if not fut.done())
+
+    async def acquire(self, flow: Flow | None = None) -> None:
+        tag = self._fair.stamp(flow if flow is not None else current_flow())
+        if self.active < self.slots and not self.queued:
+            self.active += 1
+            self._fair.advance(tag)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (tag, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            tag, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                # The slot passes straight to the waiter; `active` is unchanged.
+                self._fair.advance(tag)
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, flow: Flow | None = None) -> AsyncIterator[None]:
+        await self.acquire(flow)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"slots": self.slots, "active": self.active, "queued": self.queued}
+
+
+class AdmissionTicket:
+    """One admitted voice session; `release()` frees its slot (idempotent)."""
+
+    def __init__(self, controller: "AdmissionController", flow: Flow, kind: str, token: Token) -> None:
+        self.controller = controller
+        self.flow = flow
+        self.kind = kind
+        self._token = token
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        with suppress(ValueError):
+            _current_flow.reset(self._token)
+        self.controller._release(self.kind)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_sessions: int = VOICE_MAX_SESSIONS,
+        max_waiting: int = VOICE_ADMISSION_QUEUE,
+        wait_s: float = VOICE_ADMISSION_WAIT_S,
+        retry_after_s: int = VOICE_RETRY_AFTER_S,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.max_waiting = max_waiting
+        self.wait_s = wait_s
+        self.retry_after_s = retry_after_s
+        self._waiters: deque[asyncio.Future] = deque()
+        self.active = 0
+        self.active_by_kind: dict[str, int] = {}
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for fut in self._waiters if not fut.done())
+
+    def _busy(self) -> VoiceBusy:
+        self.rejected += 1
+        return VoiceBusy(self.retry_after_s)
+
+    async def _wait_for_slot(self) -> None:
+        if self.queued >= self.max_waiting or self.wait_s <= 0:
+            raise self._busy()
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.queued_total += 1
+        try:
+            await asyncio.wait_for(fut, self.wait_s)
+        except asyncio.TimeoutError:
+            raise self._busy() from None
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self._hand_over()
+            raise
+        finally:
+            with suppress(ValueError):
+                self._waiters.remove(fut)
+
+    async def acquire(self, kind: str = "stream", key: str | None = None) -> AdmissionTicket:
+        """Admit one session or raise VoiceBusy; binds its Flow to this context."""
+        if self.max_sessions and self.active >= self.max_sessions:
+            await self._wait_for_slot()
+        else:
+            self.active += 1
+        self.admitted += 1
+        self.active_by_kind[kind] = self.active_by_kind.get(kind, 0) + 1
+        flow = Flow(key or uuid.uuid4().hex, _KIND_WEIGHTS.get(kind, 1.0))
+        return AdmissionTicket(self, flow, kind, _current_flow.set(flow))
+
+    @asynccontextmanager
+    async def admit(self, kind: str = "stream", key: str | None = None) -> AsyncIterator[AdmissionTicket]:
+        ticket = await self.acquire(kind, key)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _hand_over(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    def _release(self, kind: str) -> None:
+        self.active_by_kind[kind] = max(0, self.active_by_kind.get(kind, 0) - 1)
+        self._hand_over()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "max_sessions": self.max_sessions,
+            "admitted": self.active,
+            "admitted_by_kind": dict(self.active_by_kind),
+            "queued": self.queued,
+            "queue_max": self.max_waiting,
+            "admitted_total": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected": self.rejected,
+            "tts_gate": tts_gate.snapshot(),
+        }
+
+
+voice_admission = AdmissionController()
+tts_gate = FairGate(EXECUTOR_TTS_WORKERS)
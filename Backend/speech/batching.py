@@ -0,0 +1,137 @@
+"""Cross-session micro-batching for streaming STT partials.
+
+With many /voice/ws sessions open, each partial is a short, independent
+Whisper call that leaves the CPU's vector units underused. When
+STT_BATCH_MAX_SIZE > 1, partial requests that arrive within
+STT_BATCH_MAX_WAIT_MS of each other (same language) are gathered and decoded
+in one `transcribe_words_batch` call, which runs as a single partial-priority
+job on the STT scheduler. Each session's words are routed back to the
+coroutine that submitted them.
+
+Final passes never go through the batcher: they keep their prompt and run at
+final priority on their own.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+
+from speech.admission import Flow
+from speech.scheduler import PRIORITY_PARTIAL, SttScheduler, SttSuperseded, stt_scheduler
+from speech.speech import transcribe_words_batch
+
+STT_BATCH_MAX_SIZE = max(1, int(os.getenv("STT_BATCH_MAX_SIZE", "1")))
+STT_BATCH_MAX_WAIT_MS = max(0, int(os.getenv("STT_BATCH_MAX_WAIT_MS", "30")))
+
+# A batch mixes partials of many sessions, so it is not charged to any one of them.
+_BATCH_FLOW = Flow("partial-batch")
+
+
+@dataclass
+class _Pending:
+    samples: np.ndarray
+    session_id: str | None
+    future: asyncio.Future
+
+
+class PartialBatcher:
+    def __init__(
+        self,
+        max_size: int = STT_BATCH_MAX_SIZE,
+        max_wait_ms: int = STT_BATCH_MAX_WAIT_MS,
+        *,
+        run_batch: Callable[[list[np.ndarray], str], list[Any]] = transcribe_words_batch,
+        scheduler: SttScheduler = stt_scheduler,
+    ) -> None:
+        self.max_size = max_size
+        self.max_wait_s = max_wait_ms / 1000
+        self._run_batch = run_batch
+        self._scheduler = scheduler
+        self._pending: dict[str, list[_Pending]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+        self.superseded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 1
+
+    async def submit(self, samples: np.ndarray, lang: str, *, session_id: str | None = None) -> Any:
+        """Queue one partial window and wait for its share of the batch result."""
+        loop = asyncio.get_running_loop()
+        pending = self._pending.setdefault(lang, [])
+        if session_id is not None:
+            for stale in [p for p in pending if p.session_id == session_id]:
+                pending.remove(stale)
+                self.superseded += 1
+                if not stale.future.done():
+                    stale.future.set_exception(SttSuperseded(session_id))
+
+        item = _Pending(samples=samples, session_id=session_id, future=loop.create_future())
+        pending.append(item)
+        if len(pending) >= self.max_size:
+            self._flush(lang)
+        elif lang not in self._timers:
+            self._timers[lang] = loop.call_later(self.max_wait_s, self._flush, lang)
+
+        try:
+            return await item.future
+        except asyncio.CancelledError:
+            queued = self._pending.get(lang)
+            if queued and item in queued:
+                queued.remove(item)
+            raise
+
+    def _flush(self, lang: str) -> None:
+        timer = self._timers.pop(lang, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._pending.pop(lang, [])
+        if not items:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(lang, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, lang: str, items: list[_Pending]) -> None:
+        self.batches += 1
+        self.items += len(items)
+        self.largest = max(self.largest, len(items))
+        try:
+            results = await self._scheduler.submit(
+                self._run_batch,
+                [item.samples for item in items],
+                lang,
+                priority=PRIORITY_PARTIAL,
+                flow=_BATCH_FLOW,
+            )
+        except Exception as exc:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+        for item, words in zip(items, results):
+            if not item.future.done():
+                item.future.set_result(words)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_size": self.max_size,
+            "max_wait_ms": round(self.max_wait_s * 1000),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_size": round(self.items / self.batches, 3) if self.batches else 0.0,
+            "largest": self.largest,
+            "superseded": self.superseded,
+            "pending": sum(len(items) for items in self._pending.values()),
+        }
+
+
+partial_batcher = PartialBatcher()
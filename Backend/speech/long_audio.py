@@ -0,0 +1,164 @@
+"""Chunked, parallel transcription for long uploads.
+
+A single `model.transcribe` call over a long sales call runs on one
+CTranslate2 worker at roughly real-time-factor x duration. Past
+STT_LONG_AUDIO_MIN_S the samples are instead split near STT_LONG_CHUNK_S
+boundaries, each cut placed inside the longest VAD-silent run found in the
+last STT_LONG_SEARCH_S before the boundary. Chunks are padded with
+STT_LONG_OVERLAP_S of audio on both sides so a word clipped by the cut is
+still heard whole by one neighbour, then transcribed in parallel through the
+STT scheduler (at most `workers` in flight, so a long upload never fills the
+queue). Stitching keeps each word only in the chunk that owns its midpoint,
+which resolves the overlap by timestamp rather than by text matching.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+from collections.abc import Awaitable, Callable
+from typing import NamedTuple
+
+import numpy as np
+
+from speech.scheduler import SttScheduler, stt_scheduler
+from speech.speech import STT_SAMPLE_RATE, transcribe_words
+from speech.vad import EnergyDetector
+
+logger = logging.getLogger(__name__)
+
+STT_LONG_AUDIO_MIN_S = float(os.getenv("STT_LONG_AUDIO_MIN_S", "60"))
+STT_LONG_CHUNK_S = max(5.0, float(os.getenv("STT_LONG_CHUNK_S", "30")))
+STT_LONG_OVERLAP_S = max(0.0, float(os.getenv("STT_LONG_OVERLAP_S", "1.0")))
+STT_LONG_SEARCH_S = max(0.0, float(os.getenv("STT_LONG_SEARCH_S", "8")))
+
+ProgressCallback = Callable[[int, int], Awaitable[None] | None]
+
+
+class Chunk(NamedTuple):
+    """Sample ranges: [start, end) is decoded, [keep_start, keep_end) is owned."""
+
+    start: int
+    end: int
+    keep_start: int
+    keep_end: int
+
+
+def is_long_audio(samples: np.ndarray, sample_rate: int = STT_SAMPLE_RATE) -> bool:
+    return STT_LONG_AUDIO_MIN_S > 0 and samples.size > STT_LONG_AUDIO_MIN_S * sample_rate
+
+
+def _silent_cut(voiced: np.ndarray, rms: np.ndarray, lo: int, hi: int) -> int:
+    """Frame index to cut at: middle of the longest unvoiced run in [lo, hi),
+    or the quietest frame when the window is all speech."""
+    best_len, best_mid = 0, -1
+    run_start = None
+    for idx in range(lo, hi + 1):
+        silent = idx < hi and not voiced[idx]
+        if silent and run_start is None:
+            run_start = idx
+        elif not silent and run_start is not None:
+            if idx - run_start > best_len:
+                best_len, best_mid = idx - run_start, (run_start + idx) // 2
+            run_start = None
+    if best_mid >= 0:
+        return best_mid
+    return lo + int(np.argmin(rms[lo:hi]))
+
+
+def plan_chunks(
+    samples: np.ndarray,
+    *,
+    sample_rate: int = STT_SAMPLE_RATE,
+    chunk_s: float = STT_LONG_CHUNK_S,
+    overlap_s: float = STT_LONG_OVERLAP_S,
+    search_s: float = STT_LONG_SEARCH_S,
+    detector=None,
+) -> list[Chunk]:
+    total = samples.size
+    chunk = int(chunk_s * sample_rate)
+    if total <= chunk:
+        return [Chunk(0, total, 0, total)]
+
+    detector = detector or EnergyDetector(sample_rate=sample_rate)
+    frame = detector.frame_samples
+    n_frames = total // frame
+    frames = samples[: n_frames * frame].reshape(n_frames, frame)
+    voiced = np.asarray(detector.classify(frames), dtype=bool)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+    search = max(1, int(min(search_s, chunk_s / 2) * sample_rate) // frame)
+    cuts: list[int] = []
+    pos = 0
+    while total - pos > chunk:
+        hi = min(n_frames, (pos + chunk) // frame)
+        lo = max(pos // frame + 1, hi - search)
+        cut = _silent_cut(voiced, rms, lo, hi) * frame if lo < hi else pos + chunk
+        cuts.append(cut)
+        pos = cut
+
+    overlap = int(overlap_s * sample_rate)
+    bounds = [0, *cuts, total]
+    return [
+        Chunk(max(0, keep_start - overlap), min(total, keep_end + overlap), keep_start, keep_end)
+        for keep_start, keep_end in zip(bounds, bounds[1:])
+    ]
+
+
+def stitch_words(
+    chunks: list[Chunk],
+    words_per_chunk: list[list[tuple[float, float, str]]],
+    sample_rate: int = STT_SAMPLE_RATE,
+) -> list[tuple[float, float, str]]:
+    """Shift chunk-relative words to absolute time, keeping each in one chunk."""
+    stitched: list[tuple[float, float, str]] = []
+    last = len(chunks) - 1
+    for idx, (chunk, words) in enumerate(zip(chunks, words_per_chunk)):
+        offset = chunk.start / sample_rate
+        keep_start = chunk.keep_start / sample_rate
+        keep_end = chunk.keep_end / sample_rate if idx < last else float("inf")
+        for start, end, text in words:
+            start, end = start + offset, end + offset
+            if keep_start <= (start + end) / 2 < keep_end:
+                stitched.append((start, end, text))
+    return stitched
+
+
+async def transcribe_long(
+    samples: np.ndarray,
+    lang: str = "zh",
+    *,
+    on_progress: ProgressCallback | None = None,
+    chunk_s: float = STT_LONG_CHUNK_S,
+    scheduler: SttScheduler = stt_scheduler,
+    transcribe: Callable[..., list[tuple[float, float, str]]] = transcribe_words,
+) -> str:
+    chunks = plan_chunks(samples, chunk_s=chunk_s)
+    total = len(chunks)
+    slots = asyncio.Semaphore(scheduler.workers)
+    done = 0
+
+    async def report() -> None:
+        if on_progress is None:
+            return
+        result = on_progress(done, total)
+        if inspect.isawaitable(result):
+            await result
+
+    async def run(chunk: Chunk) -> list[tuple[float, float, str]]:
+        nonlocal done
+        async with slots:
+            words = await scheduler.submit(transcribe, samples[chunk.start:chunk.end], lang, None)
+        done += 1
+        await report()
+        return words
+
+    logger.info(
+        "event=stt_long_audio duration_s=%.1f chunks=%d",
+        samples.size / STT_SAMPLE_RATE,
+        total,
+    )
+    await report()
+    results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+    words = stitch_words(chunks, results)
+    return "".join(text for _, _, text in words).strip()
@@ -0,0 +1,209 @@
+"""Priority scheduler in front of the Whisper model.
+
+All STT inference goes through `stt_scheduler.submit()` and runs on the
+speech-stt executor. At most STT_WORKERS jobs run at once (the Whisper
+model is loaded with the same CTranslate2 `num_workers`), everything else
+waits in a bounded queue ordered by priority:
+
+- PRIORITY_FINAL: final streaming passes, /voice and /autopilot audio
+- PRIORITY_PARTIAL: streaming partials, dropped first under pressure
+
+Within a priority, queued jobs are ordered by start-time fair queueing
+over the voice session flows (speech/admission.py), so sessions take turns
+in proportion to their weight instead of in arrival order. A newer request
+from the same session supersedes its queued partial, and a full queue
+rejects with SttOverloaded instead of growing without bound.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from speech.admission import FairQueue, Flow, current_flow
+from speech.stats import LatencyStats
+from utils.executors import NamedExecutor, stt_executor
+
+STT_WORKERS = max(1, int(os.getenv("STT_WORKERS", "1")))
+STT_QUEUE_MAX = max(1, int(os.getenv("STT_QUEUE_MAX", "32")))
+
+PRIORITY_FINAL = 0
+PRIORITY_PARTIAL = 1
+
+_PRIORITY_NAMES = {PRIORITY_FINAL: "final", PRIORITY_PARTIAL: "partial"}
+
+
+class SttOverloaded(Exception):
+    """Raised when the STT queue is full and the request was not admitted."""
+
+
+class SttSuperseded(Exception):
+    """Raised to a queued partial replaced by a newer request of its session."""
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    tag: float
+    seq: int
+    fn: Callable[..., Any] = field(compare=False)
+    args: tuple = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    session_id: str | None = field(compare=False, default=None)
+    enqueued_at: float = field(compare=False, default=0.0)
+    dropped: bool = field(compare=False, default=False)
+    started: bool = field(compare=False, default=False)
+
+
+class SttScheduler:
+    def __init__(
+        self,
+        workers: int = STT_WORKERS,
+        max_queue: int = STT_QUEUE_MAX,
+        executor: NamedExecutor = stt_executor,
+    ) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = executor
+        self._heap: list[_Job] = []
+        self._queued = 0
+        self._active = 0
+        self._seq = itertools.count()
+        self._fair = FairQueue()
+        self._partials: dict[str, _Job] = {}
+        self._wait = {name: LatencyStats() for name in _PRIORITY_NAMES.values()}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.superseded = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def _drop(self, job: _Job, exc: Exception) -> None:
+        job.dropped = True
+        self._queued -= 1
+        if job.session_id is not None and self._partials.get(job.session_id) is job:
+            del self._partials[job.session_id]
+        if not job.future.done():
+            job.future.set_exception(exc)
+
+    def _evict_partial(self) -> bool:
+        candidates = [j for j in self._heap if not j.dropped and j.priority == PRIORITY_PARTIAL]
+        if not candidates:
+            return False
+        victim = max(candidates, key=lambda j: j.seq)
+        self.rejected += 1
+        self._drop(victim, SttOverloaded("STT queue is full"))
+        return True
+
+    async def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: int = PRIORITY_FINAL,
+        session_id: str | None = None,
+        flow: Flow | None = None,
+    ) -> Any:
+        """Run `fn(*args)` in a worker thread once a slot is free.
+
+        `flow` defaults to the voice session bound to the calling context.
+        """
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+
+        if session_id is not None:
+            queued = self._partials.pop(session_id, None)
+            if queued is not None and not queued.dropped:
+                self.superseded += 1
+                self._drop(queued, SttSuperseded(session_id))
+
+        job = _Job(
+            priority=priority,
+            tag=self._fair.stamp(flow if flow is not None else current_flow()),
+            seq=next(self._seq),
+            fn=fn,
+            args=args,
+            future=loop.create_future(),
+            session_id=session_id,
+            enqueued_at=time.monotonic(),
+        )
+
+        if self._active < self.workers and self._queued == 0:
+            self._start(job)
+        else:
+            if self._queued >= self.max_queue:
+                if priority == PRIORITY_PARTIAL or not self._evict_partial():
+                    self.rejected += 1
+                    raise SttOverloaded("STT queue is full")
+            heapq.heappush(self._heap, job)
+            self._queued += 1
+            if priority == PRIORITY_PARTIAL and session_id is not None:
+                self._partials[session_id] = job
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            if not job.started and not job.dropped:
+                job.dropped = True
+                self._queued -= 1
+                if session_id is not None and self._partials.get(session_id) is job:
+                    del self._partials[session_id]
+            raise
+
+    def _start(self, job: _Job) -> None:
+        job.started = True
+        self._fair.advance(job.tag)
+        self._active += 1
+        wait_ms = (time.monotonic() - job.enqueued_at) * 1000
+        self._wait[_PRIORITY_NAMES.get(job.priority, "final")].observe(wait_ms)
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        task.add_done_callback(lambda _: self._release())
+
+    async def _run(self, job: _Job) -> None:
+        try:
+            result = await self._executor.run(job.fn, *job.args)
+        except Exception as exc:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(exc)
+        else:
+            self.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._heap and self._active < self.workers:
+            job = heapq.heappop(self._heap)
+            if job.dropped:
+                continue
+            self._queued -= 1
+            if job.session_id is not None and self._partials.get(job.session_id) is job:
+                del self._partials[job.session_id]
+            self._start(job)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "active": self._active,
+            "queue_depth": self._queued,
+            "queue_max": self.max_queue,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "superseded": self.superseded,
+            "wait_ms": {name: stats.snapshot() for name, stats in self._wait.items()},
+        }
+
+
+stt_scheduler = SttScheduler()
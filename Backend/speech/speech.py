@@ -1,15 +1,32 @@
 import asyncio
+import bisect
+import functools
 import io
+import logging
 import os
 import re
-import tempfile
+import struct
+import threading
+import time
 import wave
+from collections.abc import AsyncIterator, Callable
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO
 
+import numpy as np
 from opencc import OpenCC
 
+from speech.admission import tts_gate
+from speech.scheduler import stt_scheduler
+from speech.stats import stt_tier_latency, tts_latency
+from speech.stt_cache import stt_cache, stt_cache_key
+from speech.tts_cache import tts_cache, tts_cache_key
+from utils.executors import io_executor, tts_executor
 from utils.lang import normalize_lang as _normalize_lang
 
+logger = logging.getLogger(__name__)
+
 cc = OpenCC("t2s")
 
 # STT
@@ -17,14 +34,169 @@ STT_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "1"))
 STT_BEST_OF = int(os.getenv("WHISPER_BEST_OF", "1"))
 STT_VAD_FILTER = os.getenv("WHISPER_VAD_FILTER", "true").lower() not in {"0", "false", "no"}
 STT_NO_SPEECH_THRESHOLD = float(os.getenv("WHISPER_NO_SPEECH_THRESHOLD", "0.5"))
+STT_SAMPLE_RATE = 16000
+
+
+AUDIO_FORMATS = ("auto", "webm", "ogg", "wav", "pcm16")
+_EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+_READ_CHUNK_BYTES = 1 << 20
+
+
+def _resample(samples: np.ndarray, source_rate: int, target_rate: int = STT_SAMPLE_RATE) -> np.ndarray:
+  if source_rate == target_rate or samples.size == 0:
+    return samples
+  duration = samples.size / source_rate
+  target_size = max(1, int(round(duration * target_rate)))
+  positions = np.linspace(0, samples.size - 1, target_size, dtype=np.float64)
+  return np.interp(positions, np.arange(samples.size), samples).astype(np.float32)
+
+
+def pcm16_to_float32(data: bytes | bytearray | memoryview, sample_rate: int = STT_SAMPLE_RATE, channels: int = 1) -> np.ndarray:
+  """View little-endian PCM16 without copying, then scale to float32 mono."""
+  view = memoryview(data).cast("B")
+  usable = len(view) - (len(view) % (2 * channels))
+  ints = np.frombuffer(view[:usable], dtype="<i2")
+  if channels > 1:
+    ints = ints.reshape(-1, channels).mean(axis=1)
+  samples = ints.astype(np.float32) * (1.0 / 32768.0)
+  return _resample(samples, sample_rate)
+
+
+def _sniff_format(view: memoryview) -> str:
+  head = bytes(view[:4])
+  if head == b"RIFF":
+    return "wav"
+  if head == b"OggS":
+    return "ogg"
+  return "webm"
+
+
+def _decode_wav(view: memoryview) -> np.ndarray | None:
+  try:
+    with wave.open(io.BytesIO(view), "rb") as wav_file:
+      if wav_file.getsampwidth() != 2 or wav_file.getcomptype() != "NONE":
+        return None
+      frames = wav_file.readframes(wav_file.getnframes())
+      return pcm16_to_float32(frames, wav_file.getframerate(), wav_file.getnchannels())
+  except (wave.Error, EOFError):
+    return None
+
+
+def decode_audio(
+  data: bytes | bytearray | memoryview,
+  fmt: str = "auto",
+  sample_rate: int = STT_SAMPLE_RATE,
+) -> np.ndarray:
+  """Decode webm/opus, ogg, wav or raw PCM16 bytes to 16 kHz mono float32 in memory.
+
+  `sample_rate` only applies to raw PCM16 input; containers carry their own.
+  Raw PCM is viewed in place, so a memoryview of a session buffer is never copied.
+  """
+  view = memoryview(data).cast("B")
+  if len(view) == 0:
+    return np.zeros(0, dtype=np.float32)
+  if fmt == "pcm16":
+    return pcm16_to_float32(view, sample_rate)
+  if fmt == "auto":
+    fmt = _sniff_format(view)
+  if fmt == "wav":
+    samples = _decode_wav(view)
+    if samples is not None:
+      return samples
+  from faster_whisper.audio import decode_audio as _decode_container
+
+  return _decode_container(io.BytesIO(view), sampling_rate=STT_SAMPLE_RATE)
+
+
+@contextmanager
+def _open_binary(source: str | Path | BinaryIO):
+  if isinstance(source, (str, Path)):
+    with open(source, "rb") as handle:
+      yield handle
+  else:
+    source.seek(0)
+    yield source
+
+
+def _read_pcm16(handle: BinaryIO, sample_rate: int, channels: int = 1, frames: int | None = None) -> np.ndarray:
+  step = _READ_CHUNK_BYTES - _READ_CHUNK_BYTES % (2 * channels)
+  remaining = None if frames is None else frames * 2 * channels
+  parts: list[np.ndarray] = []
+  while remaining is None or remaining > 0:
+    chunk = handle.read(step if remaining is None else min(step, remaining))
+    if not chunk:
+      break
+    if remaining is not None:
+      remaining -= len(chunk)
+    parts.append(pcm16_to_float32(chunk, sample_rate, channels))
+  return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def decode_audio_file(
+  source: str | Path | BinaryIO,
+  fmt: str = "auto",
+  sample_rate: int = STT_SAMPLE_RATE,
+) -> np.ndarray:
+  """Decode audio from a path or an open binary file to 16 kHz mono float32.
+
+  Unlike `decode_audio` the encoded bytes are never held in memory: PCM16
+  and WAV data are read in 1 MiB pieces and containers are demuxed by PyAV
+  straight from the file, so only the decoded samples are kept.
+  """
+  with _open_binary(source) as handle:
+    if fmt == "auto":
+      fmt = _sniff_format(memoryview(handle.read(4)))
+      handle.seek(0)
+    if fmt == "pcm16":
+      return _read_pcm16(handle, sample_rate)
+    if fmt == "wav":
+      try:
+        with wave.open(handle, "rb") as wav_file:
+          if wav_file.getsampwidth() == 2 and wav_file.getcomptype() == "NONE":
+            # wave.open has positioned the handle at the first frame.
+            return _read_pcm16(handle, wav_file.getframerate(), wav_file.getnchannels(), wav_file.getnframes())
+      except (wave.Error, EOFError):
+        pass
+      handle.seek(0)
+    from faster_whisper.audio import decode_audio as _decode_container
+
+    return _decode_container(handle, sampling_rate=STT_SAMPLE_RATE)
+
+
+def _stt_model(partial: bool = False):
+  """Return (tier, model): the partial tier only when asked for and loaded."""
+  import resources as _res
+  if partial and _res.whisper_partial.is_ready:
+    return "partial", _res.whisper_partial.get()
+  return "primary", _res.whisper.get()
 
 
-def transcribe_audio(path: str, lang: str = "zh") -> str:
+def _stt_model_id(partial: bool = False) -> str:
   import resources as _res
-  model = _res.whisper.get()
+  provider = _res.whisper_partial if partial and _res.whisper_partial.is_ready else _res.whisper
+  return getattr(provider, "model_name", provider.name)
+
+
+def stt_result_key(samples: np.ndarray, lang: str, kind: str, prompt: str | None = None, partial: bool = False) -> str:
+  """Cache key for a Whisper result over `samples` with the current settings."""
+  params = {
+    "kind": kind,
+    "prompt": prompt or "",
+    "beam_size": STT_BEAM_SIZE,
+    "best_of": STT_BEST_OF,
+    "vad_filter": STT_VAD_FILTER,
+    "no_speech_threshold": STT_NO_SPEECH_THRESHOLD,
+  }
+  return stt_cache_key(samples, _stt_model_id(partial), _normalize_lang(lang), params)
+
+
+def transcribe_audio(audio: str | np.ndarray, lang: str = "zh") -> str:
+  """Transcribe a file path or 16 kHz float32 samples."""
+  tier, model = _stt_model()
+  started = time.perf_counter()
   normalized = _normalize_lang(lang)
   segments, _ = model.transcribe(
-    path,
+    audio,
     language=normalized,
     beam_size=STT_BEAM_SIZE,
     best_of=STT_BEST_OF,
@@ -32,22 +204,117 @@ def transcribe_audio(path: str, lang: str = "zh") -> str:
     no_speech_threshold=STT_NO_SPEECH_THRESHOLD,
   )
   text = "".join(seg.text for seg in segments)
+  stt_tier_latency.observe(tier, (time.perf_counter() - started) * 1000)
   if normalized == "zh":
     text = cc.convert(text)
   return text.strip()
 
 
-def transcribe_audio_bytes(audio_bytes: bytes, lang: str = "zh", suffix: str = ".webm") -> str:
-  with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
-    f.write(audio_bytes)
-    tmp_path = f.name
-  try:
-    return transcribe_audio(tmp_path, lang=lang)
-  finally:
-    try:
-      os.remove(tmp_path)
-    except Exception:
-      pass
+def transcribe_audio_bytes(
+  audio_bytes: bytes | bytearray | memoryview,
+  lang: str = "zh",
+  fmt: str = "auto",
+  sample_rate: int = STT_SAMPLE_RATE,
+) -> str:
+  """Decode in memory and hand the samples straight to Whisper (no temp file)."""
+  return transcribe_audio(decode_audio(audio_bytes, fmt, sample_rate), lang=lang)
+
+
+def transcribe_words(
+  audio,
+  lang: str = "zh",
+  initial_prompt: str | None = None,
+  partial: bool = False,
+) -> list[tuple[float, float, str]]:
+  """Transcribe decoded samples and return (start_s, end_s, text) per word.
+
+  `partial` jobs run on the lighter partial-tier model when it is loaded.
+  """
+  tier, model = _stt_model(partial)
+  started = time.perf_counter()
+  normalized = _normalize_lang(lang)
+  segments, _ = model.transcribe(
+    audio,
+    language=normalized,
+    beam_size=STT_BEAM_SIZE,
+    best_of=STT_BEST_OF,
+    vad_filter=STT_VAD_FILTER,
+    no_speech_threshold=STT_NO_SPEECH_THRESHOLD,
+    condition_on_previous_text=False,
+    initial_prompt=initial_prompt or None,
+    word_timestamps=True,
+  )
+  words: list[tuple[float, float, str]] = []
+  for seg in segments:
+    for word in seg.words or []:
+      text = cc.convert(word.word) if normalized == "zh" else word.word
+      words.append((float(word.start), float(word.end), text))
+  stt_tier_latency.observe(tier, (time.perf_counter() - started) * 1000)
+  return words
+
+
+def transcribe_words_batch(windows: list[np.ndarray], lang: str = "zh") -> list[list[tuple[float, float, str]]]:
+  """Decode several short windows in one batched pass, one word list per window.
+
+  The windows are laid end to end and handed to faster-whisper's
+  BatchedInferencePipeline as clip_timestamps, so each one becomes a row of
+  the same encoder/decoder batch. Words are routed back to their window by
+  offset. A window longer than 30 s is decoded from its last 30 s; its word
+  times are still relative to the start of the window as passed in. The
+  batch shares a single prompt, so no per-window prompt is used.
+  Batches only carry partials, so they run on the partial tier when loaded.
+  A model living in a speech worker process builds the pipeline on its side.
+  """
+  tier, model = _stt_model(partial=True)
+  normalized = _normalize_lang(lang)
+  max_samples = 30 * STT_SAMPLE_RATE
+
+  clips: list[dict[str, float]] = []
+  owners: list[int] = []
+  dropped: list[float] = []
+  parts: list[np.ndarray] = []
+  cursor = 0
+  for idx, window in enumerate(windows):
+    window = np.asarray(window, dtype=np.float32)
+    head = max(0, window.size - max_samples)
+    window = window[head:]
+    if not window.size:
+      continue
+    clips.append({"start": cursor / STT_SAMPLE_RATE, "end": (cursor + window.size) / STT_SAMPLE_RATE})
+    owners.append(idx)
+    dropped.append(head / STT_SAMPLE_RATE)
+    parts.append(window)
+    cursor += window.size
+
+  results: list[list[tuple[float, float, str]]] = [[] for _ in windows]
+  if not clips:
+    return results
+
+  started = time.perf_counter()
+  kwargs = dict(
+    language=normalized,
+    beam_size=STT_BEAM_SIZE,
+    best_of=STT_BEST_OF,
+    no_speech_threshold=STT_NO_SPEECH_THRESHOLD,
+    clip_timestamps=clips,
+    batch_size=len(clips),
+    word_timestamps=True,
+  )
+  if getattr(model, "remote", False):
+    segments, _ = model.transcribe(np.concatenate(parts), batched=True, **kwargs)
+  else:
+    from faster_whisper import BatchedInferencePipeline
+
+    segments, _ = BatchedInferencePipeline(model).transcribe(np.concatenate(parts), **kwargs)
+  starts = [clip["start"] for clip in clips]
+  for seg in segments:
+    slot = max(0, bisect.bisect_right(starts, float(seg.start) + 1e-3) - 1)
+    offset = starts[slot] - dropped[slot]
+    for word in seg.words or []:
+      text = cc.convert(word.word) if normalized == "zh" else word.word
+      results[owners[slot]].append((float(word.start) - offset, float(word.end) - offset, text))
+  stt_tier_latency.observe(tier, (time.perf_counter() - started) * 1000)
+  return results
 
 
 async def transcribe_audio_async(path: str, lang: str = "zh") -> str:
@@ -55,37 +322,67 @@ async def transcribe_audio_async(path: str, lang: str = "zh") -> str:
   from resources import require
 
   await require(_res.whisper)
-  return await asyncio.to_thread(transcribe_audio, path, lang)
+  return await stt_scheduler.submit(transcribe_audio, path, lang)
 
 
 async def transcribe_audio_bytes_async(
-  audio_bytes: bytes,
+  audio_bytes: bytes | bytearray | memoryview,
+  lang: str = "zh",
+  fmt: str = "auto",
+  sample_rate: int = STT_SAMPLE_RATE,
+  on_progress=None,
+) -> str:
+  """Decode off the loop, answer from the STT cache when this audio was seen
+  before, else transcribe; long recordings are split into chunks and
+  transcribed in parallel (see speech/long_audio.py).
+
+  `on_progress(done, total)` is called per finished chunk in long-audio mode.
+  """
+  return await _transcribe_decoded(functools.partial(decode_audio, audio_bytes, fmt, sample_rate), lang, on_progress)
+
+
+async def transcribe_audio_file_async(
+  source: str | Path | BinaryIO,
   lang: str = "zh",
-  suffix: str = ".webm",
+  fmt: str = "auto",
+  sample_rate: int = STT_SAMPLE_RATE,
+  on_progress=None,
 ) -> str:
+  """`transcribe_audio_bytes_async` for audio spooled to disk (a temp file or
+  an upload's file object), decoded without reading it into memory first."""
+  return await _transcribe_decoded(functools.partial(decode_audio_file, source, fmt, sample_rate), lang, on_progress)
+
+
+async def _transcribe_decoded(decode: Callable[[], np.ndarray], lang: str, on_progress=None) -> str:
   import resources as _res
   from resources import require
+  from speech.long_audio import is_long_audio, transcribe_long
 
   await require(_res.whisper)
-  return await asyncio.to_thread(transcribe_audio_bytes, audio_bytes, lang, suffix)
-
-
-async def transcribe_audio_base64(audio_b64: str, lang: str = "en") -> str:
-  """Decode base64 audio, write to a temp file, and run Whisper STT."""
-  import asyncio
+  samples = await io_executor.run(decode)
+  long_audio = is_long_audio(samples)
+
+  def lookup() -> tuple[str, str | None]:
+    key = stt_result_key(samples, lang, "long_text" if long_audio else "text")
+    return key, stt_cache.get(key)
+
+  key, cached = await io_executor.run(lookup)
+  if cached is not None:
+    return cached
+  if long_audio:
+    text = await transcribe_long(samples, lang, on_progress=on_progress)
+  else:
+    text = await stt_scheduler.submit(transcribe_audio, samples, lang)
+  await io_executor.run(stt_cache.put, key, text)
+  return text
+
+
+async def transcribe_audio_base64(audio_b64: str, lang: str = "en", fmt: str = "auto", on_progress=None) -> str:
+  """Decode base64 audio in memory and run Whisper STT."""
   import base64
 
   audio_bytes = base64.b64decode(audio_b64)
-  with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as f:
-    f.write(audio_bytes)
-    tmp_path = f.name
-  try:
-    return await transcribe_audio_async(tmp_path, lang)
-  finally:
-    try:
-      os.remove(tmp_path)
-    except Exception:
-      pass
+  return await transcribe_audio_bytes_async(audio_bytes, lang, fmt, on_progress=on_progress)
 
 
 def common_prefix_length(left: str, right: str) -> int:
@@ -123,6 +420,23 @@ TTS_FIRST_SEGMENT_CHARS = int(os.getenv("TTS_FIRST_SEGMENT_CHARS", "16"))
 TTS_MIN_PUNCT_BREAK_CHARS = int(os.getenv("TTS_MIN_PUNCT_BREAK_CHARS", "8"))
 _TTS_BREAK_PUNCT = set("?!?!?;;,,?.")
 
+# TTS output codecs. "wav" stays the default; "pcm16" is the bare samples;
+# "ogg"/"webm" are Opus in that container (several times smaller for speech).
+TTS_FORMATS = ("wav", "pcm16", "ogg", "webm")
+TTS_MIME_TYPES = {
+  "wav": "audio/wav",
+  "pcm16": "audio/L16",
+  "ogg": "audio/ogg; codecs=opus",
+  "webm": "audio/webm; codecs=opus",
+}
+TTS_OUTPUT_FORMAT = os.getenv("TTS_OUTPUT_FORMAT", "wav").lower()
+TTS_OPUS_BITRATE = int(os.getenv("TTS_OPUS_BITRATE", "24000"))
+
+
+def normalize_tts_format(fmt: str | None) -> str:
+  value = (fmt or TTS_OUTPUT_FORMAT or "wav").lower()
+  return value if value in TTS_FORMATS else "wav"
+
 
 def _get_piper_voice(lang: str):
   import resources as _res
@@ -143,30 +457,76 @@ def segment_tts_text(
   normalized = _normalize_tts_text(text)
   if not normalized:
     return []
+  segmenter = TtsSegmenter(max_chars, first_segment_chars)
+  return segmenter.feed(normalized) + segmenter.flush()
+
+
+class TtsSegmenter:
+  """Incremental `segment_tts_text` for text that arrives in pieces.
+
+  Feed LLM deltas (e.g. from `stream_reply_draft`) as they stream in and
+  synthesize each returned segment right away; `flush()` returns the tail.
+  """
+
+  def __init__(
+    self,
+    max_chars: int = TTS_SEGMENT_MAX_CHARS,
+    first_segment_chars: int = TTS_FIRST_SEGMENT_CHARS,
+  ) -> None:
+    self._target = max(8, first_segment_chars)
+    self._regular_target = max(12, max_chars)
+    self._min_punct_break = max(4, TTS_MIN_PUNCT_BREAK_CHARS)
+    self._buff: list[str] = []
+
+  def feed(self, text: str) -> list[str]:
+    segments: list[str] = []
+    for ch in text:
+      if ch.isspace():
+        if self._buff and self._buff[-1] == " ":
+          continue
+        ch = " "
+      self._buff.append(ch)
+      current = "".join(self._buff).strip()
+      if not current:
+        continue
+      by_punct = ch in _TTS_BREAK_PUNCT and len(current) >= self._min_punct_break
+      by_length = len(current) >= self._target
+      if by_punct or by_length:
+        segments.append(current)
+        self._buff = []
+        self._target = self._regular_target
+    return segments
+
+  def flush(self) -> list[str]:
+    tail = "".join(self._buff).strip()
+    self._buff = []
+    return [tail] if tail else []
+
+
+def _pcm_to_wav(pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+  buf = io.BytesIO()
+  with wave.open(buf, "wb") as wav_file:
+    wav_file.setnchannels(channels)
+    wav_file.setsampwidth(sample_width)
+    wav_file.setframerate(sample_rate)
+    wav_file.writeframes(pcm)
+  return buf.getvalue()
 
-  first_target = max(8, first_segment_chars)
-  regular_target = max(12, max_chars)
-  min_punct_break = max(4, TTS_MIN_PUNCT_BREAK_CHARS)
-
-  segments: list[str] = []
-  buff: list[str] = []
-  target = first_target
-  for ch in normalized:
-    buff.append(ch)
-    current = "".join(buff).strip()
-    if not current:
-      continue
-    by_punct = ch in _TTS_BREAK_PUNCT and len(current) >= min_punct_break
-    by_length = len(current) >= target
-    if by_punct or by_length:
-      segments.append(current)
-      buff = []
-      target = regular_target
 
-  tail = "".join(buff).strip()
-  if tail:
-    segments.append(tail)
-  return [seg for seg in segments if seg]
+def _wav_to_pcm(data: bytes) -> tuple[int, bytes]:
+  with wave.open(io.BytesIO(data), "rb") as wav_file:
+    return wav_file.getframerate(), wav_file.readframes(wav_file.getnframes())
+
+
+def streaming_wav_header(sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+  """RIFF header with open-ended sizes, for a WAV sent before its length is known."""
+  block_align = channels * sample_width
+  return struct.pack(
+    "<4sI4s4sIHHIIHH4sI",
+    b"RIFF", 0xFFFFFFFF, b"WAVE",
+    b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8,
+    b"data", 0xFFFFFFFF,
+  )
 
 
 def _synthesize_speech_sync(text: str, lang: str = "zh") -> bytes:
@@ -176,21 +536,176 @@ def _synthesize_speech_sync(text: str, lang: str = "zh") -> bytes:
   if not chunks:
     raise RuntimeError("Piper produced no audio chunks")
   first = chunks[0]
+  return _pcm_to_wav(
+    b"".join(chunk.audio_int16_bytes for chunk in chunks),
+    first.sample_rate,
+    first.sample_channels,
+    first.sample_width,
+  )
+
+
+def _encode_opus(pcm: bytes, sample_rate: int, container: str) -> bytes:
+  import av
+
+  samples = np.frombuffer(pcm, dtype="<i2").reshape(1, -1)
   buf = io.BytesIO()
-  with wave.open(buf, "wb") as wav_file:
-    wav_file.setnchannels(first.sample_channels)
-    wav_file.setsampwidth(first.sample_width)
-    wav_file.setframerate(first.sample_rate)
-    for chunk in chunks:
-      wav_file.writeframes(chunk.audio_int16_bytes)
+  with av.open(buf, "w", format=container) as out:
+    stream = out.add_stream("libopus", rate=48000)
+    stream.bit_rate = TTS_OPUS_BITRATE
+    stream.layout = "mono"
+    frame = av.AudioFrame.from_ndarray(samples, format="s16", layout="mono")
+    frame.sample_rate = sample_rate
+    for packet in stream.encode(frame):
+      out.mux(packet)
+    for packet in stream.encode(None):
+      out.mux(packet)
   return buf.getvalue()
 
 
-async def synthesize_speech(text: str, lang: str = "zh") -> bytes:
+def encode_audio(pcm: bytes, sample_rate: int, fmt: str = "wav") -> bytes:
+  """Encode mono int16 PCM into one of TTS_FORMATS."""
+  if fmt == "wav":
+    return _pcm_to_wav(pcm, sample_rate)
+  if fmt == "pcm16":
+    return bytes(pcm)
+  if fmt in ("ogg", "webm"):
+    return _encode_opus(pcm, sample_rate, fmt)
+  raise ValueError(f"Unsupported TTS format: {fmt}")
+
+
+def _tts_key(text: str, lang: str, fmt: str = "wav") -> str:
+  normalized = _normalize_lang(lang)
+  model = _PIPER_MODEL_BY_LANG.get(normalized, PIPER_EN_MODEL)
+  params: dict = {"format": fmt}
+  if fmt in ("ogg", "webm"):
+    params["bitrate"] = TTS_OPUS_BITRATE
+  return tts_cache_key(model, normalized, _normalize_tts_text(text), params)
+
+
+def _synthesize_speech_cached(text: str, lang: str, fmt: str = "wav") -> bytes:
+  # Runs in the TTS worker thread; other formats are encoded from the cached WAV.
+  key = _tts_key(text, lang, fmt)
+  cached = tts_cache.get(key, fmt)
+  if cached is not None:
+    return cached
+  if fmt == "wav":
+    audio = _synthesize_speech_sync(text, lang)
+  else:
+    sample_rate, pcm = _wav_to_pcm(_synthesize_speech_cached(text, lang, "wav"))
+    audio = encode_audio(pcm, sample_rate, fmt)
+  tts_cache.put(key, audio, fmt)
+  return audio
+
+
+async def synthesize_speech(text: str, lang: str = "zh", fmt: str | None = None) -> bytes:
   import resources as _res
   from resources import require
 
   normalized = _normalize_lang(lang)
   provider = _res.piper_zh if normalized == "zh" else _res.piper_en
   await require(provider)
-  return await asyncio.to_thread(_synthesize_speech_sync, text, lang)
+  fmt = normalize_tts_format(fmt)
+  cached = tts_cache.get_memory(_tts_key(text, normalized, fmt))
+  if cached is not None:
+    return cached
+  async with tts_gate.slot():
+    return await tts_executor.run(_synthesize_speech_cached, text, lang, fmt)
+
+
+async def stream_speech(text: str, lang: str = "zh") -> AsyncIterator[tuple[int, bytes]]:
+  """Yield (sample_rate, mono int16 PCM) chunks as Piper produces them.
+
+  Piper emits one chunk per sentence, so the first audio is available after
+  the first sentence rather than the whole text. The assembled WAV goes into
+  the TTS cache; a cache hit yields the cached audio as a single chunk.
+  """
+  import resources as _res
+  from resources import require
+
+  normalized = _normalize_lang(lang)
+  provider = _res.piper_zh if normalized == "zh" else _res.piper_en
+  await require(provider)
+  key = _tts_key(text, normalized)
+  started = time.perf_counter()
+  cached = tts_cache.get_memory(key)
+  if cached is not None:
+    tts_latency.first_chunk.observe((time.perf_counter() - started) * 1000)
+    yield _wav_to_pcm(cached)
+    return
+
+  loop = asyncio.get_running_loop()
+  queue: asyncio.Queue = asyncio.Queue()
+  stop = threading.Event()
+
+  def push(kind: str, payload) -> None:
+    if not stop.is_set():
+      loop.call_soon_threadsafe(queue.put_nowait, (kind, payload))
+
+  def produce() -> None:
+    try:
+      cached = tts_cache.get(key)
+      if cached is not None:
+        push("chunk", _wav_to_pcm(cached))
+      else:
+        parts: list[bytes] = []
+        rate = 0
+        for chunk in _get_piper_voice(normalized).synthesize(text):
+          if stop.is_set():
+            return
+          rate = chunk.sample_rate
+          parts.append(chunk.audio_int16_bytes)
+          push("chunk", (rate, chunk.audio_int16_bytes))
+        if not parts:
+          raise RuntimeError("Piper produced no audio chunks")
+        tts_cache.put(key, _pcm_to_wav(b"".join(parts), rate))
+      push("done", None)
+    except Exception as exc:
+      push("error", exc)
+
+  await tts_gate.acquire()
+  holding = True
+  tts_executor.submit(produce)
+  first = True
+  try:
+    while True:
+      kind, payload = await queue.get()
+      if kind in ("done", "error"):
+        # Synthesis is over; let the next session's job start while this
+        # one still forwards its chunks.
+        holding = False
+        tts_gate.release()
+      if kind == "done":
+        return
+      if kind == "error":
+        raise payload
+      if first:
+        tts_latency.first_chunk.observe((time.perf_counter() - started) * 1000)
+        first = False
+      yield payload
+  finally:
+    stop.set()
+    if holding:
+      tts_gate.release()
+
+
+async def prewarm_tts(texts_by_lang: dict[str, list[str]]) -> int:
+  """Synthesize fixed replies (and their stream segments) into the TTS cache."""
+  import resources as _res
+  from resources import ResourceFailed, require
+
+  warmed = 0
+  for lang, texts in texts_by_lang.items():
+    normalized = _normalize_lang(lang)
+    provider = _res.piper_zh if normalized == "zh" else _res.piper_en
+    try:
+      await require(provider)
+    except ResourceFailed:
+      continue
+    pieces = dict.fromkeys(piece for text in texts for piece in (text, *segment_tts_text(text)))
+    for piece in pieces:
+      try:
+        await synthesize_speech(piece, lang=normalized, fmt=normalize_tts_format(None))
+        warmed += 1
+      except Exception:
+        logger.warning("event=tts_prewarm_failed lang=%s text=%r", normalized, piece, exc_info=True)
+  return warmed
@@ -0,0 +1,70 @@
+"""Small latency accumulators shared by the speech pipeline's /metrics output."""
+
+from collections import deque
+from typing import Any
+
+import numpy as np
+
+
+class LatencyStats:
+    """Running count/avg/max plus p50/p95 over the most recent observations."""
+
+    def __init__(self, window: int = 512) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, value_ms: float) -> None:
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+        self._recent.append(value_ms)
+
+    def snapshot(self) -> dict[str, Any]:
+        avg = self.total_ms / self.count if self.count else 0.0
+        p50 = p95 = 0.0
+        if self._recent:
+            p50, p95 = np.percentile(np.fromiter(self._recent, dtype=np.float64), [50, 95])
+        return {
+            "count": self.count,
+            "avg_ms": round(avg, 3),
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+        }
+
+
+class TtsLatency:
+    """first_chunk_ms: text handed to Piper -> first PCM chunk out.
+    first_audio_ms: reply text ready -> first audio sent on the websocket."""
+
+    def __init__(self) -> None:
+        self.first_chunk = LatencyStats()
+        self.first_audio = LatencyStats()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "first_chunk_ms": self.first_chunk.snapshot(),
+            "first_audio_ms": self.first_audio.snapshot(),
+        }
+
+
+tts_latency = TtsLatency()
+
+
+class SttTierLatency:
+    """Whisper inference time per model tier: "primary" (WHISPER_MODEL) and
+    "partial" (WHISPER_PARTIAL_MODEL, streaming partials only)."""
+
+    def __init__(self) -> None:
+        self.tiers = {"primary": LatencyStats(), "partial": LatencyStats()}
+
+    def observe(self, tier: str, value_ms: float) -> None:
+        self.tiers[tier].observe(value_ms)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {tier: stats.snapshot() for tier, stats in self.tiers.items()}
+
+
+stt_tier_latency = SttTierLatency()
@@ -0,0 +1,450 @@
+"""Incremental streaming transcription for /voice/ws.
+
+Rather than re-transcribing the whole utterance on every update, the engine
+keeps a committed prefix (words confirmed by two consecutive hypotheses, the
+"local agreement" policy) and only decodes the uncommitted tail of the audio.
+The window is trimmed at committed word boundaries once it grows past
+STREAM_STT_WINDOW_MAX_MS, so the cost of one update stays bounded no matter
+how long the user keeps talking.
+
+Memory per session is capped by STREAM_SESSION_AUDIO_BYTES: raw PCM lives in
+a `PcmBuffer` that drops its oldest samples past the budget, and an encoded
+container stream stops accepting audio (`over_budget`) once it reaches it.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import re
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import numpy as np
+
+from speech.batching import partial_batcher
+from speech.scheduler import (
+    PRIORITY_FINAL,
+    PRIORITY_PARTIAL,
+    SttOverloaded,
+    SttSuperseded,
+    stt_scheduler,
+)
+from speech.speech import STT_SAMPLE_RATE, decode_audio, pcm16_to_float32, stt_result_key, transcribe_words
+from speech.stt_cache import stt_cache
+from speech.vad import VadTracker
+from utils.executors import io_executor
+
+logger = logging.getLogger(__name__)
+
+STREAM_STT_WINDOW_MAX_MS = int(os.getenv("STREAM_STT_WINDOW_MAX_MS", "12000"))
+STREAM_STT_PROMPT_CHARS = int(os.getenv("STREAM_STT_PROMPT_CHARS", "200"))
+STREAM_SESSION_AUDIO_BYTES = max(1 << 16, int(os.getenv("STREAM_SESSION_AUDIO_BYTES", str(8 << 20))))
+
+# Hypotheses are re-decoded from slightly before the last committed word, so
+# words overlapping the committed tail are dropped by time and by n-gram match.
+_OVERLAP_TOLERANCE_S = 0.1
+_OVERLAP_MAX_NGRAM = 5
+_WORD_NORMALIZE_RE = re.compile(r"[\s\.,!?;:，。！？；：、\"'“”]+")
+
+
+class PcmBuffer:
+    """Decoded float32 samples of one stream, capped at `capacity` samples.
+
+    Appends go into one growable array; past the cap the oldest samples are
+    dropped by moving the head forward, and the live region is moved back to
+    the front only when the array's slack runs out. `view()` is a contiguous
+    zero-copy slice whose first sample has absolute index `start`. The array
+    is reused across `clear()`, so later turns do not reallocate.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        self._slack = max(1, self.capacity // 4)
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._head = 0
+        self._size = 0
+        self.start = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def end(self) -> int:
+        return self.start + self._size
+
+    def append(self, samples: np.ndarray) -> None:
+        n = samples.size
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Only the newest `capacity` samples of this append survive.
+            self._drop(self._size)
+            skipped = n - self.capacity
+            self.start += skipped
+            self.dropped += skipped
+            samples = samples[skipped:]
+            n = self.capacity
+        elif self._size + n > self.capacity:
+            self._drop(self._size + n - self.capacity)
+        if self._head + self._size + n > self._buf.size:
+            self._make_room(n)
+        tail = self._head + self._size
+        self._buf[tail:tail + n] = samples
+        self._size += n
+
+    def _drop(self, count: int) -> None:
+        count = min(count, self._size)
+        self._head += count
+        self._size -= count
+        self.start += count
+        self.dropped += count
+
+    def _make_room(self, n: int) -> None:
+        limit = self.capacity + self._slack
+        if self._buf.size < limit:
+            grown = np.zeros(min(limit, max(self._size + n, 2 * self._buf.size)), dtype=np.float32)
+            grown[:self._size] = self._buf[self._head:self._head + self._size]
+            self._buf = grown
+        else:
+            self._buf[:self._size] = self._buf[self._head:self._head + self._size]
+        self._head = 0
+
+    def view(self) -> np.ndarray:
+        return self._buf[self._head:self._head + self._size]
+
+    def clear(self) -> None:
+        self._head = self._size = self.start = self.dropped = 0
+
+
+@dataclass(frozen=True)
+class TimedWord:
+    start: float
+    end: float
+    text: str
+
+
+def _norm(text: str) -> str:
+    return _WORD_NORMALIZE_RE.sub("", text).lower()
+
+
+def join_words(words: list[TimedWord]) -> str:
+    return "".join(w.text for w in words).strip()
+
+
+class LocalAgreement:
+    """Commit the longest word prefix shared by consecutive hypotheses."""
+
+    def __init__(self) -> None:
+        self.committed: list[TimedWord] = []
+        self._hypothesis: list[TimedWord] = []
+
+    @property
+    def pending(self) -> list[TimedWord]:
+        return list(self._hypothesis)
+
+    def _drop_committed_overlap(self, words: list[TimedWord]) -> list[TimedWord]:
+        if not self.committed:
+            return list(words)
+        last_end = self.committed[-1].end
+        words = [w for w in words if w.start >= last_end - _OVERLAP_TOLERANCE_S]
+        if words and abs(words[0].start - last_end) < 1.0:
+            limit = min(len(self.committed), len(words), _OVERLAP_MAX_NGRAM)
+            for n in range(limit, 0, -1):
+                tail = [_norm(w.text) for w in self.committed[-n:]]
+                head = [_norm(w.text) for w in words[:n]]
+                if tail == head:
+                    return words[n:]
+        return words
+
+    def insert(self, words: list[TimedWord]) -> list[TimedWord]:
+        """Feed a new hypothesis; return the words committed by it."""
+        words = self._drop_committed_overlap(words)
+        agreed: list[TimedWord] = []
+        for previous, current in zip(self._hypothesis, words):
+            if _norm(previous.text) != _norm(current.text):
+                break
+            agreed.append(current)
+        self.committed.extend(agreed)
+        self._hypothesis = words[len(agreed):]
+        return agreed
+
+    def finish(self, words: list[TimedWord]) -> list[TimedWord]:
+        """Accept a final hypothesis unconditionally after the committed prefix."""
+        words = self._drop_committed_overlap(words)
+        self.committed.extend(words)
+        self._hypothesis = []
+        return self.committed
+
+
+async def _default_transcribe(
+    samples,
+    lang: str,
+    prompt: str,
+    final: bool = False,
+    *,
+    session_id: str | None = None,
+) -> list[TimedWord]:
+    import resources as _res
+    from resources import require
+
+    await require(_res.whisper)
+    if not final and partial_batcher.enabled:
+        raw = await partial_batcher.submit(samples, lang, session_id=session_id)
+        return [TimedWord(start, end, text) for start, end, text in raw]
+    if not final:
+        # Partial windows grow with every update and are never decoded twice,
+        # so they stay out of the shared STT cache.
+        raw = await stt_scheduler.submit(
+            transcribe_words, samples, lang, prompt, True, priority=PRIORITY_PARTIAL, session_id=session_id
+        )
+        return [TimedWord(start, end, text) for start, end, text in raw]
+    # A final re-sent for the same audio (client retry, reconnect) is a cache hit.
+    key = stt_result_key(samples, lang, "words", prompt)
+    raw = stt_cache.get(key, persistent=False)
+    if raw is None:
+        raw = await stt_scheduler.submit(
+            transcribe_words, samples, lang, prompt, False, priority=PRIORITY_FINAL, session_id=session_id
+        )
+        stt_cache.put(key, raw, persist=False)
+    return [TimedWord(start, end, text) for start, end, text in raw]
+
+
+async def _default_decode(audio: bytes, fmt: str = "auto"):
+    return await io_executor.run(decode_audio, audio, fmt)
+
+
+class StreamingTranscriber:
+    """Per-session incremental STT state for a /voice/ws stream.
+
+    `append()` buffers incoming audio, `start_update()` launches a background
+    decode of the uncommitted window and pushes the resulting partial text to
+    `on_partial`, and `finalize()` decodes only the remaining tail.
+
+    With `audio_format="pcm16"` each chunk is converted to float32 as it
+    arrives (straight from the frame's memoryview), so no container decode
+    runs at all. Container formats (webm/ogg) are decoded in memory from a
+    snapshot of the encoded buffer on each update.
+
+    When a `VadTracker` is attached, updates skip Whisper if no new speech
+    arrived since the previous one, and the final pass is trimmed to the
+    detected speech span. A blocking detector (Silero) is not run by
+    `append()`: its samples are queued and classified on the io executor by
+    `feed_vad()`.
+    """
+
+    def __init__(
+        self,
+        lang: str,
+        *,
+        on_partial: Callable[[str], Awaitable[None]] | None = None,
+        decode: Callable[[bytes], Awaitable[object]] | None = None,
+        transcribe: Callable[..., Awaitable[list[TimedWord]]] | None = None,
+        window_max_ms: int = STREAM_STT_WINDOW_MAX_MS,
+        sample_rate: int = STT_SAMPLE_RATE,
+        audio_format: str = "webm",
+        input_sample_rate: int = STT_SAMPLE_RATE,
+        vad: VadTracker | None = None,
+        session_id: str | None = None,
+        max_bytes: int = STREAM_SESSION_AUDIO_BYTES,
+    ) -> None:
+        self.lang = lang
+        self.on_partial = on_partial
+        self.vad = vad
+        self.audio_format = audio_format
+        self._decode = decode or functools.partial(_default_decode, fmt=audio_format)
+        self._transcribe = transcribe or functools.partial(_default_transcribe, session_id=session_id)
+        self._window_max_s = max(1.0, window_max_ms / 1000)
+        self._sample_rate = sample_rate
+        self._input_sample_rate = input_sample_rate
+        self.max_bytes = max_bytes
+        self.over_budget = False
+        self._audio = bytearray()
+        self._pcm = PcmBuffer(max_bytes // np.dtype(np.float32).itemsize)
+        self._pcm_remainder = b""
+        self._received_bytes = 0
+        self._vad_pending: list[np.ndarray] = []
+        self._vad_lock = asyncio.Lock()
+        self._agreement = LocalAgreement()
+        self._offset_s = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self._received_bytes
+
+    @property
+    def is_raw_pcm(self) -> bool:
+        return self.audio_format == "pcm16"
+
+    @property
+    def busy(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def committed_text(self) -> str:
+        return join_words(self._agreement.committed)
+
+    @property
+    def text(self) -> str:
+        return join_words(self._agreement.committed + self._agreement.pending)
+
+    def append(self, chunk: bytes | memoryview) -> None:
+        self._received_bytes += len(chunk)
+        if not self.is_raw_pcm:
+            # A container can't be trimmed from the front; stop at the budget.
+            if len(self._audio) + len(chunk) > self.max_bytes:
+                self.over_budget = True
+                return
+            self._audio.extend(chunk)
+            return
+        view = memoryview(chunk).cast("B")
+        if self._pcm_remainder:
+            view = memoryview(self._pcm_remainder + bytes(view))
+        usable = len(view) - (len(view) % 2)
+        self._pcm_remainder = bytes(view[usable:])
+        if usable:
+            samples = pcm16_to_float32(view[:usable], self._input_sample_rate)
+            self._pcm.append(samples)
+            if self.vad is None:
+                return
+            if self.vad.blocking:
+                self._vad_pending.append(samples)
+            else:
+                self.vad.feed(samples)
+
+    async def feed_vad(self) -> None:
+        """Classify the samples `append()` queued for a blocking detector."""
+        if self.vad is None or not self._vad_pending:
+            return
+        async with self._vad_lock:
+            if not self._vad_pending:
+                return
+            samples = np.concatenate(self._vad_pending)
+            self._vad_pending.clear()
+            await io_executor.run(self.vad.feed, samples)
+
+    async def _samples(self):
+        if not self.is_raw_pcm:
+            samples = await self._decode(bytes(self._audio))
+            if self.vad is not None:
+                async with self._vad_lock:
+                    fresh = samples[self.vad.samples_seen:]
+                    if self.vad.blocking:
+                        await io_executor.run(self.vad.feed, fresh)
+                    else:
+                        self.vad.feed(fresh)
+            return samples
+        await self.feed_vad()
+        return self._pcm.view()
+
+    def _base(self) -> int:
+        """Absolute index of the first sample `_samples()` returns."""
+        return self._pcm.start if self.is_raw_pcm else 0
+
+    def _prompt(self) -> str:
+        return self.committed_text[-STREAM_STT_PROMPT_CHARS:]
+
+    async def _hypothesis(
+        self,
+        samples,
+        start_s: float,
+        end_s: float | None = None,
+        final: bool = False,
+    ) -> list[TimedWord]:
+        base = self._base()
+        start_s = max(start_s, base / self._sample_rate)
+        start = int(start_s * self._sample_rate) - base
+        end = None if end_s is None else max(0, int(end_s * self._sample_rate) - base)
+        window = samples[start:end]
+        if len(window) == 0:
+            return []
+        if self.is_raw_pcm:
+            # The PCM buffer is rewritten by later appends; hand off a copy
+            # of just this window.
+            window = window.copy()
+        words = await self._transcribe(window, self.lang, self._prompt(), final)
+        return [TimedWord(w.start + start_s, w.end + start_s, w.text) for w in words]
+
+    def _trim_window(self, total_samples: int) -> None:
+        if not self._agreement.committed:
+            return
+        window_s = total_samples / self._sample_rate - self._offset_s
+        if window_s > self._window_max_s:
+            self._offset_s = max(self._offset_s, self._agreement.committed[-1].end)
+
+    async def _update(self) -> None:
+        samples = await self._samples()
+        total = self._base() + len(samples)
+        if self.vad is not None and not self.vad.take_new_speech():
+            return
+        words = await self._hypothesis(samples, self._offset_s)
+        if not words and not self._agreement.pending:
+            return
+        self._agreement.insert(words)
+        self._trim_window(total)
+        if self.on_partial is not None and self.text:
+            await self.on_partial(self.text)
+
+    def _on_update_done(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if isinstance(exc, (SttOverloaded, SttSuperseded)):
+            logger.debug("Partial STT skipped: %s", type(exc).__name__)
+        elif exc is not None:
+            logger.error("Partial STT failed", exc_info=exc)
+
+    def start_update(self) -> bool:
+        """Start a background partial decode unless one is already running."""
+        if self.busy or not self._received_bytes:
+            return False
+        self._task = asyncio.create_task(self._update())
+        self._task.add_done_callback(self._on_update_done)
+        return True
+
+    async def finalize(self) -> str:
+        """Wait for the in-flight update, then decode only the uncommitted tail."""
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception:
+                pass
+            self._task = None
+        if not self._received_bytes:
+            return self.committed_text
+        samples = await self._samples()
+        start_s, end_s = self._offset_s, None
+        if self.vad is not None:
+            bounds = self.vad.speech_bounds()
+            if bounds is None:
+                return self.committed_text
+            start_s = max(start_s, bounds[0])
+            end_s = bounds[1]
+        words = await self._hypothesis(samples, start_s, end_s, final=True)
+        return join_words(self._agreement.finish(words))
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def reset(self) -> None:
+        """Start the next utterance of a multi-turn session on this transcriber.
+
+        Drops the audio and hypotheses of the previous turn but keeps the
+        configured decoder, the VAD tracker (and its loaded detector) and
+        the buffers' allocations.
+        """
+        self.cancel()
+        self._task = None
+        self._audio.clear()
+        self._pcm.clear()
+        self.over_budget = False
+        self._pcm_remainder = b""
+        self._received_bytes = 0
+        self._vad_pending.clear()
+        self._agreement = LocalAgreement()
+        self._offset_s = 0.0
+        if self.vad is not None:
+            self.vad.reset()
@@ -0,0 +1,137 @@
+"""Cache for Whisper results keyed by the decoded audio.
+
+Keys are a SHA-256 over the 16 kHz float32 samples plus everything that can
+change the output: model name, language, decoding params, output kind (text
+or word timings) and prompt. So a retried upload, a resubmitted clip or a
+streaming final that decodes exactly the window a partial already decoded is
+answered without scheduling inference. Two tiers:
+
+- memory:     LRU bounded by entry count (STT_CACHE_MEMORY_ENTRIES)
+- persistent: the SQLite `cache` table with STT_CACHE_TTL_SECONDS, shared by
+              workers and restarts; disabled with STT_CACHE_PERSIST=false
+
+Streaming windows are only remembered in memory (`persist=False`); they are
+too frequent to write through to SQLite.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from store.runs import cache_get, cache_set
+
+logger = logging.getLogger(__name__)
+
+STT_CACHE_MEMORY_ENTRIES = max(0, int(os.getenv("STT_CACHE_MEMORY_ENTRIES", "256")))
+STT_CACHE_PERSIST = os.getenv("STT_CACHE_PERSIST", "true").lower() not in {"0", "false", "no"}
+STT_CACHE_TTL_SECONDS = max(1, int(os.getenv("STT_CACHE_TTL_SECONDS", "86400")))
+
+_PERSIST_PREFIX = "stt:"
+
+
+def stt_cache_key(samples: np.ndarray, model: str, lang: str, params: dict[str, Any] | None = None) -> str:
+    header = json.dumps(
+        {"model": model, "lang": lang, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha256(header.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(memoryview(np.ascontiguousarray(samples, dtype=np.float32)).cast("B"))
+    return digest.hexdigest()
+
+
+class SttCache:
+    def __init__(
+        self,
+        memory_entries: int = STT_CACHE_MEMORY_ENTRIES,
+        persist: bool = STT_CACHE_PERSIST,
+        ttl_seconds: int = STT_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.memory_limit = memory_entries
+        self.persist = persist
+        self.ttl_seconds = ttl_seconds
+        self._memory: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.persist_errors = 0
+
+    def get(self, key: str, persistent: bool = True) -> Any | None:
+        """Memory tier first; `persistent=False` keeps the lookup off SQLite."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+        value = self._read_persistent(key) if persistent else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.persistent_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any, persist: bool = True) -> None:
+        with self._lock:
+            self._remember(key, value)
+        if persist:
+            self._write_persistent(key, value)
+
+    def _remember(self, key: str, value: Any) -> None:
+        if self.memory_limit <= 0:
+            return
+        self._memory.pop(key, None)
+        self._memory[key] = value
+        while len(self._memory) > self.memory_limit:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _read_persistent(self, key: str) -> Any | None:
+        if not self.persist:
+            return None
+        try:
+            raw = cache_get(_PERSIST_PREFIX + key)
+            return json.loads(raw) if raw is not None else None
+        except Exception:
+            self.persist_errors += 1
+            logger.warning("event=stt_cache_read_failed", exc_info=True)
+            return None
+
+    def _write_persistent(self, key: str, value: Any) -> None:
+        if not self.persist:
+            return
+        try:
+            cache_set(_PERSIST_PREFIX + key, json.dumps(value, ensure_ascii=False), ttl=self.ttl_seconds)
+        except Exception:
+            self.persist_errors += 1
+            logger.warning("event=stt_cache_write_failed", exc_info=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.persistent_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_limit_entries": self.memory_limit,
+                "evictions": self.evictions,
+                "persist_enabled": self.persist,
+                "persist_errors": self.persist_errors,
+            }
+
+
+stt_cache = SttCache()
@@ -0,0 +1,213 @@
+"""Content-addressed cache for synthesized TTS audio.
+
+Keys are a SHA-256 over (voice model, lang, normalized text, synthesis
+params), so identical segments are synthesized once no matter which reply
+they came from. Two tiers:
+
+- memory: LRU bounded by total audio bytes (TTS_CACHE_MEMORY_BYTES)
+- disk:   one file per key under TTS_CACHE_DIR, named with the extension of
+          its audio format, survives restarts, trimmed oldest-first once it
+          grows past TTS_CACHE_DISK_BYTES
+
+Either tier is disabled by setting its byte budget to 0 (or TTS_CACHE_DIR to
+an empty string for disk). Methods are thread-safe because lookups also run
+from the synthesis worker threads.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_MEMORY_BYTES = max(0, int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024))))
+TTS_CACHE_DISK_BYTES = max(0, int(os.getenv("TTS_CACHE_DISK_BYTES", str(256 * 1024 * 1024))))
+TTS_CACHE_DIR = os.getenv(
+    "TTS_CACHE_DIR",
+    str(Path(__file__).resolve().parent.parent / ".runtime" / "tts_cache"),
+)
+
+# Disk trimming stops a little below the budget so every put doesn't rescan.
+_DISK_TRIM_RATIO = 0.9
+_SUFFIXES = {"wav": ".wav", "pcm16": ".pcm", "ogg": ".ogg", "webm": ".webm"}
+
+
+def tts_cache_key(model: str, lang: str, text: str, params: dict[str, Any] | None = None) -> str:
+    payload = json.dumps(
+        {"model": model, "lang": lang, "text": text, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TtsCache:
+    def __init__(
+        self,
+        memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+        disk_dir: str | Path | None = TTS_CACHE_DIR,
+        disk_bytes: int = TTS_CACHE_DISK_BYTES,
+    ) -> None:
+        self.memory_limit = memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir and disk_bytes > 0 else None
+        self.disk_limit = disk_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: int | None = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+        self.disk_errors = 0
+
+    def _path(self, key: str, fmt: str = "wav") -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / key[:2] / f"{key}{_SUFFIXES.get(fmt, '.bin')}"
+
+    def get_memory(self, key: str) -> bytes | None:
+        """Memory-tier lookup only; cheap enough to call on the event loop."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return data
+
+    def get(self, key: str, fmt: str = "wav") -> bytes | None:
+        data = self.get_memory(key)
+        if data is not None:
+            return data
+        data = self._read_disk(key, fmt)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes, fmt: str = "wav") -> None:
+        with self._lock:
+            self._remember(key, data)
+        self._write_disk(key, data, fmt)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_limit:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.memory_evictions += 1
+
+    def _read_disk(self, key: str, fmt: str) -> bytes | None:
+        if self.disk_dir is None:
+            return None
+        path = self._path(key, fmt)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+        except OSError:
+            self.disk_errors += 1
+            logger.warning("event=tts_cache_read_failed path=%s", path, exc_info=True)
+            return None
+
+    def _write_disk(self, key: str, data: bytes, fmt: str) -> None:
+        if self.disk_dir is None or len(data) > self.disk_limit:
+            return
+        path = self._path(key, fmt)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            existed = path.exists()
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError:
+            self.disk_errors += 1
+            logger.warning("event=tts_cache_write_failed path=%s", path, exc_info=True)
+            tmp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            elif not existed:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self.disk_limit
+        if over:
+            self._trim_disk()
+
+    def _disk_files(self) -> list[Path]:
+        assert self.disk_dir is not None
+        return [p for p in self.disk_dir.glob("*/*") if p.suffix != ".tmp"]
+
+    def _scan_disk_bytes(self) -> int:
+        total = 0
+        for path in self._disk_files():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def _trim_disk(self) -> None:
+        entries = []
+        for path in self._disk_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = int(self.disk_limit * _DISK_TRIM_RATIO)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.disk_evictions += evicted
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_limit_bytes": self.memory_limit,
+                "memory_evictions": self.memory_evictions,
+                "disk_enabled": self.disk_dir is not None,
+                "disk_bytes": self._disk_bytes,
+                "disk_limit_bytes": self.disk_limit,
+                "disk_evictions": self.disk_evictions,
+                "disk_errors": self.disk_errors,
+            }
+
+
+tts_cache = TtsCache()
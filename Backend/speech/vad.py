@@ -0,0 +1,156 @@
+"""Server-side voice activity detection for streaming sessions.
+
+Endpointing used to trust the client-supplied `energy` field. The tracker
+here classifies the decoded PCM itself, frame by frame, with either a
+vectorized NumPy energy / zero-crossing detector (default) or the small
+Silero ONNX model that ships with faster-whisper (STREAM_VAD_BACKEND=silero).
+Silero inference is too slow for the event loop; a tracker whose detector is
+`blocking` is fed on the io executor by its callers.
+"""
+
+import logging
+import os
+
+import numpy as np
+
+from speech.speech import STT_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+STREAM_VAD_BACKEND = os.getenv("STREAM_VAD_BACKEND", "energy").lower()
+STREAM_VAD_FRAME_MS = int(os.getenv("STREAM_VAD_FRAME_MS", "30"))
+STREAM_VAD_ENERGY_THRESHOLD = float(os.getenv("STREAM_VAD_ENERGY_THRESHOLD", "0.01"))
+STREAM_VAD_ZCR_MAX = float(os.getenv("STREAM_VAD_ZCR_MAX", "0.35"))
+STREAM_VAD_SILERO_THRESHOLD = float(os.getenv("STREAM_VAD_SILERO_THRESHOLD", "0.5"))
+STREAM_VAD_SPEECH_PAD_MS = int(os.getenv("STREAM_VAD_SPEECH_PAD_MS", "300"))
+
+VAD_BACKENDS = ("energy", "silero", "off")
+
+
+class EnergyDetector:
+    """RMS energy gate with a zero-crossing-rate ceiling to reject hiss."""
+
+    blocking = False
+
+    def __init__(
+        self,
+        *,
+        sample_rate: int = STT_SAMPLE_RATE,
+        frame_ms: int = STREAM_VAD_FRAME_MS,
+        energy_threshold: float = STREAM_VAD_ENERGY_THRESHOLD,
+        zcr_max: float = STREAM_VAD_ZCR_MAX,
+    ) -> None:
+        self.frame_samples = max(1, sample_rate * frame_ms // 1000)
+        self.energy_threshold = energy_threshold
+        self.zcr_max = zcr_max
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(1, frames.shape[1] - 1)
+        return (rms >= self.energy_threshold) & (zcr <= self.zcr_max)
+
+
+class SileroDetector:
+    """Silero VAD v6 via onnxruntime; 512-sample frames at 16 kHz."""
+
+    frame_samples = 512
+    blocking = True
+
+    def __init__(self, threshold: float = STREAM_VAD_SILERO_THRESHOLD) -> None:
+        from faster_whisper.vad import get_vad_model
+
+        self._model = get_vad_model()
+        self.threshold = threshold
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        probs = np.asarray(self._model(frames.reshape(-1))).reshape(-1)[: frames.shape[0]]
+        return probs >= self.threshold
+
+
+class VadTracker:
+    """Incremental per-stream speech bookkeeping over decoded samples."""
+
+    def __init__(self, detector, *, sample_rate: int = STT_SAMPLE_RATE) -> None:
+        self._detector = detector
+        self._sample_rate = sample_rate
+        self._frame = detector.frame_samples
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything fed so far; the detector (and its model) is kept."""
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._frames_seen = 0
+        self._voiced_frames = 0
+        self._first_voiced: int | None = None
+        self._last_voiced: int | None = None
+        self._new_speech = False
+
+    @property
+    def blocking(self) -> bool:
+        """Whether feed() runs model inference and belongs off the event loop."""
+        return getattr(self._detector, "blocking", False)
+
+    @property
+    def _frame_s(self) -> float:
+        return self._frame / self._sample_rate
+
+    @property
+    def samples_seen(self) -> int:
+        return self._frames_seen * self._frame + self._remainder.size
+
+    @property
+    def voiced_ms(self) -> float:
+        return self._voiced_frames * self._frame_s * 1000
+
+    @property
+    def trailing_silence_ms(self) -> float:
+        if self._last_voiced is None:
+            return 0.0
+        return (self._frames_seen - self._last_voiced - 1) * self._frame_s * 1000
+
+    def feed(self, samples: np.ndarray) -> None:
+        """Classify newly decoded samples; partial frames wait for the next call."""
+        if samples.size == 0:
+            return
+        if self._remainder.size:
+            samples = np.concatenate([self._remainder, samples])
+        whole = samples.size // self._frame
+        self._remainder = samples[whole * self._frame:].copy()
+        if whole == 0:
+            return
+        voiced = np.asarray(self._detector.classify(samples[: whole * self._frame].reshape(whole, self._frame)))
+        hits = np.flatnonzero(voiced)
+        if hits.size:
+            if self._first_voiced is None:
+                self._first_voiced = self._frames_seen + int(hits[0])
+            self._last_voiced = self._frames_seen + int(hits[-1])
+            self._voiced_frames += int(hits.size)
+            self._new_speech = True
+        self._frames_seen += whole
+
+    def take_new_speech(self) -> bool:
+        """Return whether speech arrived since the previous call, then reset."""
+        new_speech, self._new_speech = self._new_speech, False
+        return new_speech
+
+    def speech_bounds(self, pad_ms: int = STREAM_VAD_SPEECH_PAD_MS) -> tuple[float, float] | None:
+        """Padded (start_s, end_s) of detected speech, or None if none was heard."""
+        if self._first_voiced is None or self._last_voiced is None:
+            return None
+        pad_s = pad_ms / 1000
+        start = max(0.0, self._first_voiced * self._frame_s - pad_s)
+        end = (self._last_voiced + 1) * self._frame_s + pad_s
+        return start, end
+
+
+def create_vad_tracker(backend: str = STREAM_VAD_BACKEND) -> VadTracker | None:
+    """Build a tracker for the configured backend; None disables server VAD."""
+    if backend == "off":
+        return None
+    if backend == "silero":
+        try:
+            return VadTracker(SileroDetector())
+        except Exception:
+            logger.warning("event=silero_vad_unavailable fallback=energy", exc_info=True)
+    return VadTracker(EnergyDetector())
@@ -0,0 +1,473 @@
+"""Optional out-of-process speech workers (SPEECH_WORKER_MODE=process).
+
+By default Whisper and the Piper voices are loaded into the API process and
+share its GIL with the event loop; the Chinese voice also drags g2pW/torch
+preprocessing in with it. In process mode each provider instead starts a
+pool of long-lived `spawn` subprocesses that own the model, and the provider
+hands out a proxy with the same surface the speech code already uses
+(`model.transcribe(...)`, `voice.synthesize(...)`).
+
+Transport: requests and results are small pickled dicts over a Pipe; audio
+never is. Samples for STT are written once into a SharedMemory block that the
+worker maps as a float32 array, and each PCM chunk Piper produces comes back
+in its own block. The side that reads a block last unlinks it.
+
+Every worker warms up its model before reporting ready, is pinged by a
+monitor thread every SPEECH_WORKER_HEALTH_SECONDS while idle, and is killed
+and replaced when it dies, stops answering within
+SPEECH_WORKER_REQUEST_TIMEOUT_S, or fails its ping. A request that hit a
+crashed worker is retried once on another one.
+"""
+
+import importlib
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import traceback
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SPEECH_WORKER_MODE = os.getenv("SPEECH_WORKER_MODE", "thread").lower()
+SPEECH_STT_PROCESSES = max(1, int(os.getenv("SPEECH_STT_PROCESSES", os.getenv("STT_WORKERS", "1"))))
+SPEECH_TTS_PROCESSES = max(1, int(os.getenv("SPEECH_TTS_PROCESSES", "1")))
+SPEECH_WORKER_START_TIMEOUT_S = float(os.getenv("SPEECH_WORKER_START_TIMEOUT_S", "300"))
+SPEECH_WORKER_REQUEST_TIMEOUT_S = float(os.getenv("SPEECH_WORKER_REQUEST_TIMEOUT_S", "120"))
+SPEECH_WORKER_HEALTH_SECONDS = float(os.getenv("SPEECH_WORKER_HEALTH_SECONDS", "10"))
+
+_PING_TIMEOUT_S = 5.0
+
+
+def process_mode() -> bool:
+    return SPEECH_WORKER_MODE == "process"
+
+
+class SpeechWorkerError(RuntimeError):
+    """The worker raised while handling the request; the worker itself is fine."""
+
+
+class SpeechWorkerCrashed(RuntimeError):
+    """The worker died or stopped answering; it is being replaced."""
+
+
+# --- shared memory -------------------------------------------------------
+
+def _share(data: bytes | memoryview) -> shared_memory.SharedMemory:
+    size = len(data)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+    shm.buf[:size] = data
+    return shm
+
+
+def _take(name: str, size: int) -> bytes:
+    """Copy a block written by the other side out, then unlink it."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@contextmanager
+def attached_samples(request: dict) -> Iterator[np.ndarray | str]:
+    """Worker side: the request's audio as a zero-copy float32 view (or a path)."""
+    if "path" in request:
+        yield request["path"]
+        return
+    shm = shared_memory.SharedMemory(name=request["shm"])
+    try:
+        yield np.ndarray((request["samples"],), dtype=np.float32, buffer=shm.buf)
+    finally:
+        # A lingering view keeps the mapping alive until it is collected.
+        with suppress(BufferError):
+            shm.close()
+
+
+# --- worker process ------------------------------------------------------
+
+class WhisperHandler:
+    def __init__(self, name: str, model_env: str, default_model: str) -> None:
+        from resources.whisper import WhisperProvider
+
+        provider = WhisperProvider(name, model_env=model_env, default_model=default_model)
+        self.model = provider.load_sync(num_workers=1)
+
+    def transcribe(self, request: dict, emit: Callable[[int, bytes], None]) -> dict:
+        runner = self.model
+        if request.get("batched"):
+            from faster_whisper import BatchedInferencePipeline
+
+            runner = BatchedInferencePipeline(self.model)
+        with attached_samples(request) as audio:
+            segments, info = runner.transcribe(audio, **request.get("kwargs", {}))
+            segments = [
+                {
+                    "start": seg.start,
+                    "end": seg.end,
+                    "text": seg.text,
+                    "words": [(w.start, w.end, w.word) for w in seg.words] if seg.words else None,
+                }
+                for seg in segments
+            ]
+        return {"segments": segments, "language": info.language, "duration": info.duration}
+
+
+class PiperHandler:
+    def __init__(self, lang: str) -> None:
+        from resources.piper import PiperProvider
+
+        self.voice = PiperProvider(lang).load_sync()
+
+    def synthesize(self, request: dict, emit: Callable[[int, bytes], None]) -> None:
+        for chunk in self.voice.synthesize(request["text"]):
+            emit(chunk.sample_rate, chunk.audio_int16_bytes)
+
+
+def _resolve(factory: str):
+    module, _, attr = factory.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _worker_main(conn, factory: str, kwargs: dict) -> None:
+    try:
+        handler = _resolve(factory)(**kwargs)
+    except BaseException:
+        conn.send({"type": "failed", "error": traceback.format_exc(limit=5)})
+        return
+    conn.send({"type": "ready", "pid": os.getpid()})
+
+    def emit(rate: int, pcm: bytes) -> None:
+        shm = _share(pcm)
+        conn.send({"type": "chunk", "shm": shm.name, "size": len(pcm), "rate": rate})
+        shm.close()
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        op = request.get("op")
+        if op == "stop":
+            return
+        if op == "ping":
+            conn.send({"type": "result", "result": "pong"})
+            continue
+        try:
+            result = getattr(handler, op)(request, emit)
+        except Exception as exc:
+            conn.send({"type": "error", "error": f"{type(exc).__name__}: {exc}"})
+        else:
+            conn.send({"type": "result", "result": result})
+
+
+# --- parent side ---------------------------------------------------------
+
+class _Worker:
+    def __init__(self, ctx, name: str, factory: str, kwargs: dict) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, factory, kwargs),
+            name=name,
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.pid = self.process.pid
+
+    def wait_ready(self, timeout: float) -> None:
+        try:
+            ready = self.conn.poll(timeout)
+            message = self.conn.recv() if ready else None
+        except (EOFError, OSError):
+            message = None
+        if message is None:
+            self.kill()
+            raise SpeechWorkerCrashed(f"worker {self.pid} exited or timed out during warmup")
+        if message["type"] != "ready":
+            self.kill()
+            raise RuntimeError(f"worker {self.pid} failed to load:\n{message['error']}")
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        with suppress(Exception):
+            self.process.kill()
+            self.process.join(timeout=2)
+        with suppress(Exception):
+            self.conn.close()
+
+    def stop(self) -> None:
+        with suppress(Exception):
+            self.conn.send({"op": "stop"})
+            self.process.join(timeout=2)
+        self.kill()
+
+
+_POOLS: dict[str, "SpeechWorkerPool"] = {}
+
+
+class SpeechWorkerPool:
+    def __init__(
+        self,
+        name: str,
+        factory: str,
+        kwargs: dict | None = None,
+        size: int = 1,
+        *,
+        start_timeout: float = SPEECH_WORKER_START_TIMEOUT_S,
+        request_timeout: float = SPEECH_WORKER_REQUEST_TIMEOUT_S,
+        health_seconds: float = SPEECH_WORKER_HEALTH_SECONDS,
+    ) -> None:
+        self.name = name
+        self.factory = factory
+        self.kwargs = kwargs or {}
+        self.size = size
+        self.start_timeout = start_timeout
+        self.request_timeout = request_timeout
+        self.health_seconds = health_seconds
+        self._ctx = mp.get_context("spawn")
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._workers: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._monitor: threading.Thread | None = None
+        self.requests = 0
+        self.errors = 0
+        self.crashes = 0
+        self.restarts = 0
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, f"{self.name}-worker", self.factory, self.kwargs)
+
+    def start(self) -> None:
+        """Start every worker and block until all of them finished warmup."""
+        workers = [self._spawn() for _ in range(self.size)]
+        try:
+            for worker in workers:
+                worker.wait_ready(self.start_timeout)
+        except BaseException:
+            for worker in workers:
+                worker.kill()
+            raise
+        with self._lock:
+            self._workers = workers
+        for worker in workers:
+            self._idle.put(worker)
+        self._monitor = threading.Thread(target=self._monitor_loop, name=f"{self.name}-monitor", daemon=True)
+        self._monitor.start()
+        _POOLS[self.name] = self
+        logger.info("event=speech_workers_ready pool=%s pids=%s", self.name, [w.pid for w in workers])
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill `worker` and put a freshly warmed replacement into service."""
+        worker.kill()
+        with self._lock:
+            self.crashes += 1
+        while not self._closed.is_set():
+            try:
+                fresh = self._spawn()
+                fresh.wait_ready(self.start_timeout)
+            except Exception:
+                logger.warning("event=speech_worker_restart_failed pool=%s", self.name, exc_info=True)
+                self._closed.wait(1.0)
+                continue
+            with self._lock:
+                self._workers = [fresh if w is worker else w for w in self._workers]
+                self.restarts += 1
+            logger.warning("event=speech_worker_restarted pool=%s old_pid=%s pid=%s", self.name, worker.pid, fresh.pid)
+            self._idle.put(fresh)
+            return
+
+    def _replace_in_background(self, worker: _Worker) -> None:
+        threading.Thread(target=self._replace, args=(worker,), name=f"{self.name}-restart", daemon=True).start()
+
+    def _checkout(self) -> _Worker:
+        if self._closed.is_set():
+            raise SpeechWorkerCrashed(f"pool {self.name} is closed")
+        try:
+            return self._idle.get(timeout=self.start_timeout)
+        except queue.Empty:
+            raise SpeechWorkerCrashed(f"no {self.name} worker became available") from None
+
+    def _recv(self, worker: _Worker, timeout: float) -> dict:
+        try:
+            if worker.conn.poll(timeout):
+                return worker.conn.recv()
+        except (EOFError, OSError) as exc:
+            raise SpeechWorkerCrashed(f"worker {worker.pid} exited") from exc
+        raise SpeechWorkerCrashed(f"worker {worker.pid} did not answer within {timeout:.0f}s")
+
+    def _drain(self, worker: _Worker) -> bool:
+        """Consume what is left of an abandoned stream so the worker can be reused."""
+        try:
+            while True:
+                message = self._recv(worker, self.request_timeout)
+                if message["type"] == "chunk":
+                    _take(message["shm"], message["size"])
+                else:
+                    return True
+        except Exception:
+            return False
+
+    def stream(self, payload: dict) -> Iterator[tuple[int, bytes]]:
+        """Send one request and yield (rate, pcm) chunks; returns the result."""
+        worker = self._checkout()
+        with self._lock:
+            self.requests += 1
+        finished = False
+        try:
+            try:
+                worker.conn.send(payload)
+            except (OSError, ValueError) as exc:
+                raise SpeechWorkerCrashed(f"worker {worker.pid} exited") from exc
+            while True:
+                message = self._recv(worker, self.request_timeout)
+                if message["type"] == "chunk":
+                    yield message["rate"], _take(message["shm"], message["size"])
+                elif message["type"] == "result":
+                    finished = True
+                    return message["result"]
+                else:
+                    finished = True
+                    with self._lock:
+                        self.errors += 1
+                    raise SpeechWorkerError(message.get("error", "worker error"))
+        finally:
+            if not finished:
+                finished = self._drain(worker)
+            if finished:
+                self._idle.put(worker)
+            else:
+                self._replace_in_background(worker)
+
+    def call(self, payload: dict, attempts: int = 2) -> Any:
+        for attempt in range(attempts):
+            chunks = self.stream(payload)
+            try:
+                while True:
+                    next(chunks)
+            except StopIteration as done:
+                return done.value
+            except SpeechWorkerCrashed:
+                if attempt + 1 >= attempts:
+                    raise
+                logger.warning("event=speech_worker_retry pool=%s op=%s", self.name, payload.get("op"))
+
+    def _ping(self, worker: _Worker) -> bool:
+        if not worker.alive:
+            return False
+        try:
+            worker.conn.send({"op": "ping"})
+            return self._recv(worker, _PING_TIMEOUT_S).get("result") == "pong"
+        except Exception:
+            return False
+
+    def _monitor_loop(self) -> None:
+        while not self._closed.wait(self.health_seconds):
+            for _ in range(self._idle.qsize()):
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self._ping(worker):
+                    self._idle.put(worker)
+                else:
+                    logger.warning("event=speech_worker_unhealthy pool=%s pid=%s", self.name, worker.pid)
+                    self._replace(worker)
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+        _POOLS.pop(self.name, None)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            workers = list(self._workers)
+            return {
+                "size": self.size,
+                "alive": sum(1 for w in workers if w.alive),
+                "idle": self._idle.qsize(),
+                "pids": [w.pid for w in workers],
+                "requests": self.requests,
+                "errors": self.errors,
+                "crashes": self.crashes,
+                "restarts": self.restarts,
+            }
+
+
+def speech_workers_snapshot() -> dict[str, Any]:
+    return {
+        "mode": SPEECH_WORKER_MODE,
+        "pools": {name: pool.snapshot() for name, pool in list(_POOLS.items())},
+    }
+
+
+# --- proxies handed out by the resource providers ------------------------
+
+class RemoteWhisperModel:
+    """Stands in for a faster-whisper WhisperModel living in a worker pool."""
+
+    remote = True
+
+    def __init__(self, pool: SpeechWorkerPool) -> None:
+        self.pool = pool
+
+    def transcribe(self, audio, *, batched: bool = False, **kwargs):
+        payload: dict[str, Any] = {"op": "transcribe", "kwargs": kwargs, "batched": batched}
+        shm = None
+        if isinstance(audio, str):
+            payload["path"] = audio
+        else:
+            samples = np.ascontiguousarray(audio, dtype=np.float32)
+            shm = _share(memoryview(samples).cast("B"))
+            payload.update(shm=shm.name, samples=int(samples.size))
+        try:
+            result = self.pool.call(payload)
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        segments = [
+            SimpleNamespace(
+                start=seg["start"],
+                end=seg["end"],
+                text=seg["text"],
+                words=[SimpleNamespace(start=s, end=e, word=w) for s, e, w in seg["words"]] if seg["words"] else None,
+            )
+            for seg in result["segments"]
+        ]
+        return segments, SimpleNamespace(language=result["language"], duration=result["duration"])
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class RemotePiperVoice:
+    """Stands in for a PiperVoice living in a worker pool."""
+
+    remote = True
+
+    def __init__(self, pool: SpeechWorkerPool) -> None:
+        self.pool = pool
+
+    def synthesize(self, text: str) -> Iterator[SimpleNamespace]:
+        for rate, pcm in self.pool.stream({"op": "synthesize", "text": text}):
+            yield SimpleNamespace(sample_rate=rate, sample_channels=1, sample_width=2, audio_int16_bytes=pcm)
+
+    def close(self) -> None:
+        self.pool.close()
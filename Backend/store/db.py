@@ -22,7 +22,8 @@ CREATE TABLE IF NOT EXISTS runs (
     reply_draft     TEXT,          -- JSON string
     actions_json    TEXT,          -- JSON string
     status          TEXT NOT NULL DEFAULT 'pending',  -- pending/extracted/drafted/confirmed/executed/error
-    error           TEXT
+    error           TEXT,
+    progress_json   TEXT           -- JSON string, e.g. long-audio transcription progress
 );
 """
 
@@ -35,6 +36,38 @@ CREATE TABLE IF NOT EXISTS cache (
 );
 """
 
+_CREATE_JOBS = """
+CREATE TABLE IF NOT EXISTS jobs (
+    run_id       TEXT PRIMARY KEY,  -- one job per autopilot run
+    created_at   REAL NOT NULL,     -- unix seconds, FIFO order
+    updated_at   REAL NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'queued',  -- queued/running/done/error
+    payload_json TEXT NOT NULL,     -- run request; cleared once the job is done
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    worker_id    TEXT,
+    lease_until  REAL,              -- a running job whose lease lapsed is claimable again
+    not_before   REAL,              -- a queued job backing off after a retry waits until then
+    error        TEXT
+);
+"""
+
+_CREATE_JOBS_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created_at ON jobs (status, created_at);
+"""
+
+_CREATE_VOICE_SESSIONS = """
+CREATE TABLE IF NOT EXISTS voice_sessions (
+    session_id      TEXT PRIMARY KEY,
+    event_json      TEXT NOT NULL,     -- last extracted calendar event
+    awaiting_update INTEGER NOT NULL DEFAULT 0,
+    updated_at      REAL NOT NULL      -- unix seconds, used for TTL and LRU
+);
+"""
+
+_CREATE_VOICE_SESSIONS_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_voice_sessions_updated_at ON voice_sessions (updated_at);
+"""
+
 
 def get_connection() -> sqlite3.Connection:
     conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
@@ -56,6 +89,17 @@ def _migrate_db():
             conn.execute("ALTER TABLE runs ADD COLUMN run_type TEXT NOT NULL DEFAULT 'autopilot'")
             conn.commit()
             logger.info("Migration complete: run_type column added")
+
+        if "progress_json" not in columns:
+            logger.info("Migrating database: adding progress_json column")
+            conn.execute("ALTER TABLE runs ADD COLUMN progress_json TEXT")
+            conn.commit()
+
+        job_columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)").fetchall()]
+        if "not_before" not in job_columns:
+            logger.info("Migrating database: adding jobs.not_before column")
+            conn.execute("ALTER TABLE jobs ADD COLUMN not_before REAL")
+            conn.commit()
     except Exception as e:
         logger.error("Database migration failed: %s", e)
     finally:
@@ -68,6 +112,10 @@ def init_db():
     try:
         conn.execute(_CREATE_RUNS)
         conn.execute(_CREATE_CACHE)
+        conn.execute(_CREATE_VOICE_SESSIONS)
+        conn.execute(_CREATE_VOICE_SESSIONS_INDEX)
+        conn.execute(_CREATE_JOBS)
+        conn.execute(_CREATE_JOBS_INDEX)
         conn.commit()
         logger.info("Database initialized at %s", DB_PATH)
     finally:
@@ -0,0 +1,340 @@
+"""Durable queue for autopilot runs submitted in job mode.
+
+A job is one row in the jobs table, keyed by its run_id. Any process with
+a `JobWorkerPool` claims queued jobs in FIFO order. A claim takes a lease of
+JOB_LEASE_S that the worker renews while the job runs. When a process dies
+mid-run, its lease lapses and the job becomes claimable again. The handler
+then resumes from the stage checkpoints already stored on the run instead of
+starting over. A handler that raises `JobRetry` puts its job back with an
+exponential backoff (JOB_RETRY_BACKOFF_S, doubling per attempt). A job that
+has been claimed JOB_MAX_ATTEMPTS times without finishing is marked as
+failed, so a run that keeps crashing its worker or asking for a retry
+cannot loop forever.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from typing import Any
+
+from store.db import get_connection
+from utils.executors import io_executor
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = max(0, int(os.getenv("JOB_WORKERS", "2")))
+JOB_LEASE_S = max(5.0, float(os.getenv("JOB_LEASE_S", "60")))
+JOB_POLL_INTERVAL_S = max(0.05, float(os.getenv("JOB_POLL_INTERVAL_S", "0.5")))
+JOB_MAX_ATTEMPTS = max(1, int(os.getenv("JOB_MAX_ATTEMPTS", "3")))
+JOB_RETRY_BACKOFF_S = max(0.0, float(os.getenv("JOB_RETRY_BACKOFF_S", "2")))
+JOB_RETRY_BACKOFF_MAX_S = max(0.0, float(os.getenv("JOB_RETRY_BACKOFF_MAX_S", "60")))
+
+JOB_TERMINAL = ("done", "error")
+
+
+class JobRetry(Exception):
+    """Raised by a handler to put its job back in the queue (e.g. STT overloaded)."""
+
+
+def enqueue_job(run_id: str, payload: dict) -> None:
+    now = time.time()
+    conn = get_connection()
+    try:
+        conn.execute(
+            "INSERT INTO jobs (run_id, created_at, updated_at, status, payload_json) VALUES (?, ?, ?, 'queued', ?)",
+            (run_id, now, now, json.dumps(payload, ensure_ascii=False)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_job(run_id: str) -> dict | None:
+    """The job row without its payload."""
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT run_id, created_at, updated_at, status, attempts, worker_id, lease_until, error "
+            "FROM jobs WHERE run_id = ?",
+            (run_id,),
+        ).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def claim_job(worker_id: str, lease_s: float = JOB_LEASE_S, max_attempts: int = JOB_MAX_ATTEMPTS) -> dict | None:
+    """Lease the oldest claimable job to `worker_id`; returns it with its payload."""
+    now = time.time()
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        # Jobs whose workers kept dying: give up on them instead of resuming again.
+        abandoned = [
+            r["run_id"]
+            for r in conn.execute(
+                "SELECT run_id FROM jobs WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, max_attempts),
+            ).fetchall()
+        ]
+        for run_id in abandoned:
+            error = f"worker lost {max_attempts} times"
+            conn.execute(
+                "UPDATE jobs SET status = 'error', error = ?, payload_json = '{}', worker_id = NULL, "
+                "lease_until = NULL, updated_at = ? WHERE run_id = ?",
+                (error, now, run_id),
+            )
+            conn.execute("UPDATE runs SET status = 'error', error = ? WHERE run_id = ?", (error, run_id))
+            logger.warning("event=job_abandoned run_id=%s attempts=%d", run_id, max_attempts)
+
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE (status = 'queued' AND (not_before IS NULL OR not_before <= ?)) "
+            "OR (status = 'running' AND lease_until < ?) ORDER BY created_at LIMIT 1",
+            (now, now),
+        ).fetchone()
+        if row is None:
+            conn.commit()
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker_id = ?, lease_until = ?, attempts = attempts + 1, "
+            "not_before = NULL, updated_at = ? WHERE run_id = ?",
+            (worker_id, now + lease_s, now, row["run_id"]),
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    job = dict(row)
+    job["payload"] = json.loads(job.pop("payload_json"))
+    job["attempts"] += 1
+    job["status"] = "running"
+    job["worker_id"] = worker_id
+    return job
+
+
+def renew_lease(run_id: str, worker_id: str, lease_s: float = JOB_LEASE_S) -> bool:
+    """Extend a running job's lease; False once another worker has taken it over."""
+    now = time.time()
+    conn = get_connection()
+    try:
+        cur = conn.execute(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE run_id = ? AND worker_id = ? AND status = 'running'",
+            (now + lease_s, now, run_id, worker_id),
+        )
+        conn.commit()
+        return cur.rowcount > 0
+    finally:
+        conn.close()
+
+
+def finish_job(run_id: str, worker_id: str, status: str, error: str | None = None) -> None:
+    conn = get_connection()
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, payload_json = '{}', worker_id = NULL, lease_until = NULL, "
+            "updated_at = ? WHERE run_id = ? AND worker_id = ?",
+            (status, error, time.time(), run_id, worker_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def release_job(run_id: str, worker_id: str) -> None:
+    """Hand a job back to the queue (shutdown); the interrupted claim is not counted."""
+    conn = get_connection()
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = MAX(0, attempts - 1), worker_id = NULL, "
+            "lease_until = NULL, updated_at = ? WHERE run_id = ? AND worker_id = ? AND status = 'running'",
+            (time.time(), run_id, worker_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def retry_job(
+    run_id: str,
+    worker_id: str,
+    reason: str,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+    backoff_s: float = JOB_RETRY_BACKOFF_S,
+) -> str:
+    """Requeue a job whose handler raised JobRetry, or fail it once its attempts are used up.
+
+    The claim counts as an attempt; the job is not claimable again for
+    backoff_s * 2**(attempts - 1) seconds, capped at JOB_RETRY_BACKOFF_MAX_S.
+    Returns the job's new status, or "lost" when the worker no longer holds it.
+    """
+    now = time.time()
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT attempts FROM jobs WHERE run_id = ? AND worker_id = ? AND status = 'running'",
+            (run_id, worker_id),
+        ).fetchone()
+        if row is None:
+            conn.commit()
+            return "lost"
+        attempts = row["attempts"]
+        if attempts >= max_attempts:
+            error = f"gave up after {attempts} attempts: {reason}"[:1000]
+            conn.execute(
+                "UPDATE jobs SET status = 'error', error = ?, payload_json = '{}', worker_id = NULL, "
+                "lease_until = NULL, updated_at = ? WHERE run_id = ?",
+                (error, now, run_id),
+            )
+            conn.execute("UPDATE runs SET status = 'error', error = ? WHERE run_id = ?", (error, run_id))
+            conn.commit()
+            logger.warning("event=job_retries_exhausted run_id=%s attempts=%d reason=%s", run_id, attempts, reason)
+            return "error"
+        delay = min(JOB_RETRY_BACKOFF_MAX_S, backoff_s * 2 ** (attempts - 1))
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', worker_id = NULL, lease_until = NULL, not_before = ?, "
+            "error = ?, updated_at = ? WHERE run_id = ?",
+            (now + delay, reason[:1000], now, run_id),
+        )
+        conn.commit()
+        logger.info("event=job_retry run_id=%s attempt=%d delay_s=%.1f reason=%s", run_id, attempts, delay, reason)
+        return "queued"
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def job_counts() -> dict[str, int]:
+    conn = get_connection()
+    try:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+    finally:
+        conn.close()
+
+
+class JobWorkerPool:
+    """JOB_WORKERS async workers in this process, all draining the shared queue."""
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        lease_s: float = JOB_LEASE_S,
+        poll_s: float = JOB_POLL_INTERVAL_S,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_backoff_s: float = JOB_RETRY_BACKOFF_S,
+    ) -> None:
+        self.workers = workers
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self.max_attempts = max_attempts
+        self.retry_backoff_s = retry_backoff_s
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handler: Callable[[dict], Awaitable[None]] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._wake: asyncio.Event | None = None
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.resumed = 0
+        self.retried = 0
+
+    def start(self, handler: Callable[[dict], Awaitable[None]]) -> None:
+        if self._tasks or self.workers <= 0:
+            return
+        self._handler = handler
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        """Wake idle workers after a local enqueue instead of waiting for the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job = await io_executor.run(claim_job, self.worker_id, self.lease_s, self.max_attempts)
+            except Exception:
+                logger.warning("event=job_claim_failed worker=%s", self.worker_id, exc_info=True)
+                job = None
+            if job is None:
+                self._wake.clear()
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), self.poll_s)
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: dict) -> None:
+        run_id = job["run_id"]
+        if job["attempts"] > 1:
+            self.resumed += 1
+            logger.info("event=job_resumed run_id=%s attempt=%d", run_id, job["attempts"])
+        self.running += 1
+        heartbeat = asyncio.create_task(self._heartbeat(run_id))
+        try:
+            await self._handler(job)
+        except asyncio.CancelledError:
+            with suppress(Exception):
+                await asyncio.shield(io_executor.run(release_job, run_id, self.worker_id))
+            raise
+        except JobRetry as e:
+            status = await io_executor.run(
+                retry_job, run_id, self.worker_id, str(e), self.max_attempts, self.retry_backoff_s
+            )
+            if status == "error":
+                self.failed += 1
+            elif status == "queued":
+                self.retried += 1
+        except Exception as e:
+            self.failed += 1
+            logger.warning("event=job_failed run_id=%s error=%s", run_id, e)
+            await io_executor.run(finish_job, run_id, self.worker_id, "error", str(e)[:1000])
+        else:
+            self.completed += 1
+            await io_executor.run(finish_job, run_id, self.worker_id, "done")
+        finally:
+            self.running -= 1
+            heartbeat.cancel()
+
+    async def _heartbeat(self, run_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            try:
+                if not await io_executor.run(renew_lease, run_id, self.worker_id, self.lease_s):
+                    logger.warning("event=job_lease_lost run_id=%s", run_id)
+                    return
+            except Exception:
+                logger.warning("event=job_lease_renew_failed run_id=%s", run_id, exc_info=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers if self._tasks else 0,
+            "worker_id": self.worker_id,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "resumed": self.resumed,
+            "retried": self.retried,
+            "queue": job_counts(),
+        }
+
+
+job_workers = JobWorkerPool()
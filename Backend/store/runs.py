@@ -2,12 +2,22 @@
 
 import json
 import logging
+import os
+import threading
+import time
 from datetime import datetime
 
 from store.db import get_connection
 
 logger = logging.getLogger(__name__)
 
+# Expired cache rows are skipped on read; cache_set deletes them at most this often.
+CACHE_SWEEP_INTERVAL_S = max(0.0, float(os.getenv("CACHE_SWEEP_INTERVAL_S", "300")))
+
+_EXPIRED = "(julianday('now') - julianday(created_at)) * 86400 >= ttl_seconds"
+_sweep_lock = threading.Lock()
+_last_sweep = float("-inf")
+
 
 def create_run(run_id: str, input_type: str, raw_input: str, run_type: str = "autopilot") -> None:
     conn = get_connection()
@@ -21,6 +31,19 @@ def create_run(run_id: str, input_type: str, raw_input: str, run_type: str = "au
         conn.close()
 
 
+def create_runs(runs: list[tuple[str, str, str]], run_type: str = "autopilot") -> None:
+    """Insert several (run_id, input_type, raw_input) runs in one transaction."""
+    conn = get_connection()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO runs (run_id, run_type, input_type, raw_input, status) VALUES (?, ?, ?, ?, 'pending')",
+                [(run_id, run_type, input_type, raw_input[:10000]) for run_id, input_type, raw_input in runs],
+            )
+    finally:
+        conn.close()
+
+
 def update_run(run_id: str, **fields) -> None:
     """Update specific fields of a run. JSON-serializable values are auto-serialized."""
     conn = get_connection()
@@ -28,7 +51,7 @@ def update_run(run_id: str, **fields) -> None:
         sets = []
         vals = []
         for k, v in fields.items():
-            if k in ("extracted_json", "evidence_json", "reply_draft", "actions_json") and not isinstance(v, str):
+            if k in ("extracted_json", "evidence_json", "reply_draft", "actions_json", "progress_json") and not isinstance(v, str):
                 v = json.dumps(v, ensure_ascii=False, default=str)
             sets.append(f"{k} = ?")
             vals.append(v)
@@ -50,7 +73,7 @@ def get_run(run_id: str) -> dict | None:
             return None
         d = dict(row)
         # Parse JSON fields
-        for jf in ("extracted_json", "evidence_json", "reply_draft", "actions_json"):
+        for jf in ("extracted_json", "evidence_json", "reply_draft", "actions_json", "progress_json"):
             if d.get(jf):
                 try:
                     d[jf] = json.loads(d[jf])
@@ -85,7 +108,7 @@ def cache_get(key: str) -> str | None:
     conn = get_connection()
     try:
         row = conn.execute(
-            "SELECT value_json FROM cache WHERE key = ? AND (julianday('now') - julianday(created_at)) * 86400 < ttl_seconds",
+            f"SELECT value_json FROM cache WHERE key = ? AND NOT {_EXPIRED}",
             (key,),
         ).fetchone()
         return row["value_json"] if row else None
@@ -103,3 +126,28 @@ def cache_set(key: str, value: str, ttl: int = 3600) -> None:
         conn.commit()
     finally:
         conn.close()
+    if _sweep_due():
+        cache_sweep()
+
+
+def cache_sweep() -> int:
+    """Delete expired cache rows; returns how many were removed."""
+    conn = get_connection()
+    try:
+        removed = conn.execute(f"DELETE FROM cache WHERE {_EXPIRED}").rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    if removed:
+        logger.info("event=cache_sweep removed=%d", removed)
+    return removed
+
+
+def _sweep_due() -> bool:
+    global _last_sweep
+    now = time.monotonic()
+    with _sweep_lock:
+        if now - _last_sweep < CACHE_SWEEP_INTERVAL_S:
+            return False
+        _last_sweep = now
+        return True
@@ -0,0 +1,232 @@
+"""Voice session store: the last calendar event per session_id, so a conflict
+follow-up ("make it 4pm instead") can update the event it refers to.
+
+Two backends behind the same get/set/delete/sweep interface:
+
+- memory: per-process LRU bounded by VOICE_SESSION_MAX entries
+- sqlite: the voice_sessions table in autopilot.db, shared by every uvicorn
+          worker on the host so a follow-up can land on any of them
+
+Entries older than VOICE_SESSION_TTL_SECONDS are treated as missing on read
+and removed by a background sweeper every VOICE_SESSION_SWEEP_SECONDS.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from store.db import get_connection
+from utils.executors import io_executor
+
+logger = logging.getLogger(__name__)
+
+VOICE_SESSION_BACKEND = os.getenv("VOICE_SESSION_BACKEND", "memory").lower()
+VOICE_SESSION_MAX = max(1, int(os.getenv("VOICE_SESSION_MAX", "10000")))
+VOICE_SESSION_TTL_SECONDS = max(1, int(os.getenv("VOICE_SESSION_TTL_SECONDS", "1800")))
+VOICE_SESSION_SWEEP_SECONDS = max(1, int(os.getenv("VOICE_SESSION_SWEEP_SECONDS", "60")))
+
+
+class VoiceSessionStore(ABC):
+    backend = ""
+
+    def __init__(
+        self,
+        max_entries: int = VOICE_SESSION_MAX,
+        ttl_seconds: float = VOICE_SESSION_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    @abstractmethod
+    def get(self, session_id: str) -> dict | None: ...
+
+    @abstractmethod
+    def set(self, session_id: str, event: dict, awaiting_update: bool) -> None: ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None: ...
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Drop expired entries; returns how many were removed."""
+        ...
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "sessions": self.count(),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+class MemoryVoiceSessionStore(VoiceSessionStore):
+    backend = "memory"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._sessions: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, session_id: str) -> dict | None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if self._clock() - session["updated_at"] > self.ttl_seconds:
+                del self._sessions[session_id]
+                self.expired += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def set(self, session_id: str, event: dict, awaiting_update: bool) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = {
+                "event": event,
+                "awaiting_update": awaiting_update,
+                "updated_at": self._clock(),
+            }
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def sweep(self) -> int:
+        cutoff = self._clock() - self.ttl_seconds
+        with self._lock:
+            stale = [sid for sid, s in self._sessions.items() if s["updated_at"] < cutoff]
+            for sid in stale:
+                del self._sessions[sid]
+            self.expired += len(stale)
+        return len(stale)
+
+
+class SqliteVoiceSessionStore(VoiceSessionStore):
+    """Counters are per process; the table itself is shared."""
+
+    backend = "sqlite"
+
+    def get(self, session_id: str) -> dict | None:
+        conn = get_connection()
+        try:
+            row = conn.execute(
+                "SELECT event_json, awaiting_update, updated_at FROM voice_sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            if self._clock() - row["updated_at"] > self.ttl_seconds:
+                conn.execute("DELETE FROM voice_sessions WHERE session_id = ?", (session_id,))
+                conn.commit()
+                with self._lock:
+                    self.expired += 1
+                return None
+            return {
+                "event": json.loads(row["event_json"]),
+                "awaiting_update": bool(row["awaiting_update"]),
+                "updated_at": row["updated_at"],
+            }
+        finally:
+            conn.close()
+
+    def set(self, session_id: str, event: dict, awaiting_update: bool) -> None:
+        conn = get_connection()
+        try:
+            conn.execute(
+                "INSERT INTO voice_sessions (session_id, event_json, awaiting_update, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET event_json = excluded.event_json, "
+                "awaiting_update = excluded.awaiting_update, updated_at = excluded.updated_at",
+                (session_id, json.dumps(event, ensure_ascii=False, default=str), int(awaiting_update), self._clock()),
+            )
+            cur = conn.execute(
+                "DELETE FROM voice_sessions WHERE session_id IN ("
+                "SELECT session_id FROM voice_sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+            if cur.rowcount > 0:
+                with self._lock:
+                    self.evicted += cur.rowcount
+        finally:
+            conn.close()
+
+    def delete(self, session_id: str) -> None:
+        conn = get_connection()
+        try:
+            conn.execute("DELETE FROM voice_sessions WHERE session_id = ?", (session_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        conn = get_connection()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM voice_sessions").fetchone()[0]
+        finally:
+            conn.close()
+
+    def sweep(self) -> int:
+        conn = get_connection()
+        try:
+            cur = conn.execute(
+                "DELETE FROM voice_sessions WHERE updated_at < ?",
+                (self._clock() - self.ttl_seconds,),
+            )
+            conn.commit()
+            removed = max(0, cur.rowcount)
+        finally:
+            conn.close()
+        with self._lock:
+            self.expired += removed
+        return removed
+
+
+def create_voice_session_store(backend: str = VOICE_SESSION_BACKEND) -> VoiceSessionStore:
+    if backend == "sqlite":
+        return SqliteVoiceSessionStore()
+    if backend != "memory":
+        logger.warning("Unknown VOICE_SESSION_BACKEND=%s; using memory", backend)
+    return MemoryVoiceSessionStore()
+
+
+async def run_session_sweeper(
+    store: VoiceSessionStore,
+    interval_seconds: float = VOICE_SESSION_SWEEP_SECONDS,
+) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            removed = await io_executor.run(store.sweep)
+        except Exception:
+            logger.warning("event=voice_session_sweep_failed backend=%s", store.backend, exc_info=True)
+            continue
+        if removed:
+            logger.debug("event=voice_session_sweep removed=%d", removed)
+
+
+voice_sessions = create_voice_session_store()
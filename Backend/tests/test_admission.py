@@ -0,0 +1,113 @@
+"""Tests for speech/admission.py — voice session admission and fair scheduling."""
+
+import asyncio
+import threading
+
+import pytest
+
+from speech.admission import (
+    AdmissionController,
+    FairGate,
+    Flow,
+    VoiceBusy,
+    current_flow,
+)
+from speech.scheduler import SttScheduler
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_sessions_over_the_cap_are_rejected_with_retry_hint():
+    controller = AdmissionController(max_sessions=1, max_waiting=0, retry_after_s=7)
+    ticket = await controller.acquire("stream")
+    assert current_flow() is ticket.flow
+
+    with pytest.raises(VoiceBusy) as busy:
+        await controller.acquire("upload")
+    assert busy.value.payload()["type"] == "busy"
+    assert busy.value.payload()["retry_after_s"] == 7
+
+    ticket.release()
+    ticket.release()
+    assert current_flow() is None
+    async with controller.admit("upload"):
+        snapshot = controller.snapshot()
+        assert snapshot["admitted"] == 1 and snapshot["admitted_by_kind"] == {"stream": 0, "upload": 1}
+    snapshot = controller.snapshot()
+    assert snapshot["admitted"] == 0 and snapshot["rejected"] == 1 and snapshot["admitted_total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_queued_session_takes_over_a_released_slot():
+    controller = AdmissionController(max_sessions=1, max_waiting=1, wait_s=2)
+    first = await controller.acquire()
+    waiting = asyncio.create_task(controller.acquire())
+    await settle()
+    assert controller.snapshot()["queued"] == 1
+
+    with pytest.raises(VoiceBusy):
+        await controller.acquire()
+    first.release()
+    second = await waiting
+    assert controller.snapshot()["admitted"] == 1 and controller.snapshot()["queued"] == 0
+    second.release()
+    assert controller.snapshot()["admitted"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_session_times_out_as_busy():
+    controller = AdmissionController(max_sessions=1, max_waiting=1, wait_s=0.01)
+    ticket = await controller.acquire()
+    with pytest.raises(VoiceBusy):
+        await controller.acquire()
+    ticket.release()
+    assert controller.snapshot()["admitted"] == 0 and controller.snapshot()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stt_scheduler_round_robins_between_sessions():
+    scheduler = SttScheduler(workers=1, max_queue=16)
+    release = threading.Event()
+    order = []
+
+    def job(name):
+        order.append(name)
+        return name
+
+    blocker = asyncio.create_task(scheduler.submit(release.wait, 5))
+    await settle()
+    chatty, quiet = Flow("chatty"), Flow("quiet")
+    jobs = [asyncio.create_task(scheduler.submit(job, f"a{i}", flow=chatty)) for i in range(3)]
+    jobs.append(asyncio.create_task(scheduler.submit(job, "b0", flow=quiet)))
+    await settle()
+
+    release.set()
+    await asyncio.gather(blocker, *jobs)
+    assert order == ["a0", "b0", "a1", "a2"]
+
+
+@pytest.mark.asyncio
+async def test_fair_gate_shares_slots_by_weight():
+    gate = FairGate(1)
+    heavy, light = Flow("heavy", weight=2.0), Flow("light", weight=1.0)
+    order = []
+
+    async def use(name, flow):
+        async with gate.slot(flow):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await gate.acquire()
+    tasks = [asyncio.create_task(use(f"l{i}", light)) for i in range(2)]
+    tasks += [asyncio.create_task(use(f"h{i}", heavy)) for i in range(4)]
+    await settle()
+    assert gate.snapshot()["queued"] == 6
+
+    gate.release()
+    await asyncio.gather(*tasks)
+    assert order == ["l0", "h0", "h1", "l1", "h2", "h3"]
+    assert gate.snapshot() == {"slots": 1, "active": 0, "queued": 0}
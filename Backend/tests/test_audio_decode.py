@@ -0,0 +1,141 @@
+"""Tests for the in-memory audio decode layer in speech/speech.py."""
+
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from speech import speech
+from speech.streaming import StreamingTranscriber, TimedWord
+
+
+def pcm_bytes(values) -> bytes:
+    return np.asarray(values, dtype="<i2").tobytes()
+
+
+def wav_bytes(values, rate: int) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(pcm_bytes(values))
+    return buf.getvalue()
+
+
+def test_pcm16_is_scaled_to_float32():
+    samples = speech.decode_audio(pcm_bytes([0, 16384, -32768]), "pcm16")
+    assert samples.dtype == np.float32
+    assert samples.tolist() == [0.0, 0.5, -1.0]
+
+
+def test_pcm16_accepts_memoryview_of_session_buffer():
+    buffer = bytearray(pcm_bytes([0, 8192, 8192]) + b"\x01")
+    samples = speech.decode_audio(memoryview(buffer), "pcm16")
+    assert samples.tolist() == [0.0, 0.25, 0.25]
+
+
+def test_wav_is_decoded_and_resampled_without_container_decoder():
+    samples = speech.decode_audio(wav_bytes([1000] * 8000, 8000))
+    assert samples.shape == (16000,)
+    assert samples.dtype == np.float32
+
+
+def test_empty_input_decodes_to_empty_array():
+    assert speech.decode_audio(b"").size == 0
+
+
+def test_transcribe_audio_bytes_hands_samples_to_whisper(monkeypatch):
+    received = {}
+
+    def fake_transcribe(audio, lang="zh"):
+        received["audio"] = audio
+        return "ok"
+
+    monkeypatch.setattr(speech, "transcribe_audio", fake_transcribe)
+    assert speech.transcribe_audio_bytes(pcm_bytes([0] * 320), "en", "pcm16") == "ok"
+    assert isinstance(received["audio"], np.ndarray)
+    assert received["audio"].shape == (320,)
+
+
+@pytest.mark.asyncio
+async def test_streaming_raw_pcm_skips_container_decode():
+    windows = []
+
+    async def fail_decode(_audio):
+        raise AssertionError("raw PCM must not go through the container decoder")
+
+    async def transcribe(samples, lang, prompt, final=False):
+        windows.append(samples.copy())
+        return [TimedWord(0.0, 0.1, "ok")]
+
+    transcriber = StreamingTranscriber(
+        "en",
+        decode=fail_decode,
+        transcribe=transcribe,
+        audio_format="pcm16",
+    )
+    data = pcm_bytes([16384, -16384, 16384])
+    transcriber.append(memoryview(data)[:3])
+    transcriber.append(memoryview(data)[3:])
+
+    assert await transcriber.finalize() == "ok"
+    assert windows[0].tolist() == [0.5, -0.5, 0.5]
+
+
+@pytest.mark.parametrize("as_file", [False, True])
+def test_decode_audio_file_matches_in_memory_decode(tmp_path, monkeypatch, as_file):
+    monkeypatch.setattr(speech, "_READ_CHUNK_BYTES", 64)
+    data = wav_bytes(list(range(-500, 500, 3)), 16000)
+    path = tmp_path / "clip.wav"
+    path.write_bytes(data)
+
+    if as_file:
+        with open(path, "rb") as handle:
+            handle.read(10)
+            samples = speech.decode_audio_file(handle)
+    else:
+        samples = speech.decode_audio_file(str(path))
+    assert np.array_equal(samples, speech.decode_audio(data))
+
+
+def test_decode_audio_file_reads_raw_pcm_in_pieces(tmp_path, monkeypatch):
+    monkeypatch.setattr(speech, "_READ_CHUNK_BYTES", 5)
+    path = tmp_path / "clip.pcm"
+    path.write_bytes(pcm_bytes([0, 16384, -32768, 8192, 0]))
+    assert speech.decode_audio_file(path, "pcm16").tolist() == [0.0, 0.5, -1.0, 0.25, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_raw_pcm_stream_keeps_only_the_byte_budget():
+    windows = []
+
+    async def transcribe(samples, lang, prompt, final=False):
+        windows.append(samples.tolist())
+        return [TimedWord(0.0, 0.1, "ok")]
+
+    # 4 float32 samples of budget; the oldest audio is dropped.
+    transcriber = StreamingTranscriber(
+        "en",
+        transcribe=transcribe,
+        audio_format="pcm16",
+        sample_rate=10,
+        max_bytes=16,
+    )
+    for value in (8192, 16384, -16384, 8192, 16384, -32768):
+        transcriber.append(pcm_bytes([value]))
+
+    assert await transcriber.finalize() == "ok"
+    assert windows == [[-0.5, 0.25, 0.5, -1.0]]
+    assert transcriber._pcm.start == 2 and transcriber._pcm.dropped == 2
+
+
+def test_container_stream_stops_at_the_byte_budget():
+    transcriber = StreamingTranscriber("en", audio_format="webm", max_bytes=8)
+    transcriber.append(b"\x00" * 6)
+    assert not transcriber.over_budget
+    transcriber.append(b"\x00" * 6)
+    assert transcriber.over_budget
+    transcriber.reset()
+    assert not transcriber.over_budget and transcriber.buffered_bytes == 0
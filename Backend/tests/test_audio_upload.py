@@ -0,0 +1,80 @@
+"""Tests for streamed audio uploads (utils/file_utils.py, /autopilot/run/audio)."""
+
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ai_client import get_openai_client
+from api import autopilot, pipeline
+from utils import file_utils
+
+
+async def body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_is_spooled_to_disk_in_coalesced_writes(monkeypatch):
+    monkeypatch.setattr(file_utils, "UPLOAD_CHUNK_BYTES", 4096)
+    path = await file_utils.save_stream_to_temp(body(b"a" * 3000, b"b" * 3000, b"c"))
+    try:
+        with open(path, "rb") as f:
+            assert f.read() == b"a" * 3000 + b"b" * 3000 + b"c"
+    finally:
+        os.unlink(path)
+
+
+@pytest.mark.asyncio
+async def test_oversized_stream_is_rejected_and_removed(monkeypatch, tmp_path):
+    monkeypatch.setattr(file_utils.tempfile, "tempdir", str(tmp_path))
+    with pytest.raises(file_utils.UploadTooLarge):
+        await file_utils.save_stream_to_temp(body(b"x" * 6, b"x" * 6), max_bytes=10)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def autopilot_app(monkeypatch):
+    runs = {}
+    monkeypatch.setattr(autopilot, "create_run", lambda run_id, mode, raw, **_: runs.setdefault(run_id, raw))
+    monkeypatch.setattr(pipeline, "update_run", lambda *args, **kwargs: None)
+    app = FastAPI()
+    app.include_router(autopilot.router)
+    app.dependency_overrides[get_openai_client] = lambda: object()
+    return app, runs
+
+
+def test_raw_audio_body_is_transcribed_from_a_temp_file(autopilot_app, monkeypatch):
+    app, runs = autopilot_app
+    seen = {}
+
+    async def fake_transcribe(path, lang, fmt, sample_rate, on_progress):
+        with open(path, "rb") as f:
+            seen.update(path=path, data=f.read(), lang=lang, fmt=fmt, sample_rate=sample_rate)
+        return ""
+
+    monkeypatch.setattr(autopilot, "transcribe_audio_file_async", fake_transcribe)
+    with TestClient(app) as client:
+        response = client.post(
+            "/autopilot/run/audio?locale=zh&format=pcm16&sample_rate=8000",
+            content=b"\x01\x02" * 100,
+            headers={"Content-Type": "application/octet-stream"},
+        )
+
+    assert response.status_code == 400 and response.json()["detail"] == "Empty transcript"
+    assert seen["data"] == b"\x01\x02" * 100
+    assert (seen["lang"], seen["fmt"], seen["sample_rate"]) == ("zh", "pcm16", 8000)
+    assert not os.path.exists(seen["path"])
+    assert list(runs.values()) == ["<raw audio upload: 200 bytes>"]
+
+
+def test_raw_audio_rejects_empty_body_and_unknown_format(autopilot_app):
+    app, runs = autopilot_app
+    with TestClient(app) as client:
+        assert client.post("/autopilot/run/audio", content=b"").status_code == 400
+        assert client.post("/autopilot/run/audio?format=mp3", content=b"x").status_code == 400
+        for rate in (0, 7999, 48001):
+            assert client.post(f"/autopilot/run/audio?format=pcm16&sample_rate={rate}", content=b"x").status_code == 422
+    assert runs == {}
@@ -0,0 +1,152 @@
+"""Tests for /autopilot/batch (api/pipeline.py) and batched RAG retrieval."""
+
+import asyncio
+import json
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ai_client import get_openai_client
+from api import autopilot, pipeline
+from store import db
+from store.runs import get_run
+
+
+@pytest.fixture
+def batch_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "batch.db")
+    db.init_db()
+    calls = {"retrieve_many": [], "create_runs": 0, "in_flight": 0, "max_in_flight": 0}
+
+    async def extract(transcript, client, run_id):
+        calls["in_flight"] += 1
+        calls["max_in_flight"] = max(calls["max_in_flight"], calls["in_flight"])
+        await asyncio.sleep(0.01)
+        calls["in_flight"] -= 1
+        if transcript == "boom":
+            raise ValueError("unparseable transcript")
+        return {"summary": transcript, "entities": {}, "next_best_actions": []}
+
+    async def retrieve_many(queries, client):
+        calls["retrieve_many"].append(list(queries))
+        return [[{"doc": "kb.md", "chunk": 0, "text": q}] for q in queries]
+
+    async def draft(client, transcript, extracted, evidence, run_id=None):
+        return {"reply_text": f"Re: {transcript}", "citations": ["kb.md#0"]}
+
+    async def enrich(actions, extracted, draft, email_content, transcript):
+        return actions
+
+    def create_runs(runs, run_type="autopilot"):
+        calls["create_runs"] += 1
+        real_create_runs(runs, run_type=run_type)
+
+    real_create_runs = pipeline.create_runs
+    monkeypatch.setattr(pipeline, "extract_autopilot_json", extract)
+    monkeypatch.setattr(pipeline, "retrieve_many", retrieve_many)
+    monkeypatch.setattr(pipeline, "build_rag_query", lambda extracted: extracted["summary"])
+    monkeypatch.setattr(pipeline, "generate_reply_draft", draft)
+    monkeypatch.setattr(pipeline, "enrich_actions", enrich)
+    monkeypatch.setattr(pipeline, "create_runs", create_runs)
+    monkeypatch.setattr(pipeline, "AUTOPILOT_BATCH_CONCURRENCY", 2)
+
+    app = FastAPI()
+    app.include_router(autopilot.router)
+    app.dependency_overrides[get_openai_client] = lambda: object()
+    return app, calls
+
+
+def post_batch(app, transcripts):
+    with TestClient(app) as client:
+        response = client.post("/autopilot/batch?format=ndjson", json={"transcripts": transcripts})
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_streams_every_item_and_shares_one_embedding_request(batch_app):
+    app, calls = batch_app
+    transcripts = ["alpha", "boom", "gamma", "  "]
+    events = post_batch(app, transcripts)
+
+    assert events[0]["event"] == "batch"
+    run_ids = events[0]["data"]["run_ids"]
+    assert calls["create_runs"] == 1
+    assert calls["retrieve_many"] == [["alpha", "gamma"]]
+
+    items = {e["data"]["index"]: e["data"] for e in events if e["event"] == "item"}
+    assert sorted(items) == [0, 1, 2, 3]
+    assert items[0]["result"]["reply_draft"]["reply_text"] == "Re: alpha"
+    assert items[2]["result"]["evidence"] == [{"doc": "kb.md", "chunk": 0, "text": "gamma"}]
+    assert (items[1]["status_code"], items[1]["detail"]) == (422, "unparseable transcript")
+    assert (items[3]["status_code"], items[3]["detail"]) == (400, "Empty transcript")
+    assert events[-1] == {"event": "done", "data": {"succeeded": 2, "failed": 2}}
+
+    assert get_run(run_ids[0])["status"] == "previewed"
+    assert get_run(run_ids[1])["status"] == "error"
+
+
+def test_batch_concurrency_is_bounded(batch_app):
+    app, calls = batch_app
+    post_batch(app, [f"t{i}" for i in range(8)])
+    assert calls["max_in_flight"] == 2
+
+
+def test_batch_rejects_empty_and_oversized_requests(batch_app, monkeypatch):
+    app, _ = batch_app
+    monkeypatch.setattr(pipeline, "AUTOPILOT_BATCH_MAX_ITEMS", 2)
+    with TestClient(app) as client:
+        assert client.post("/autopilot/batch", json={"transcripts": []}).status_code == 400
+        assert client.post("/autopilot/batch", json={"transcripts": ["a", "b", "c"]}).status_code == 400
+
+
+def test_create_batch_runs_raises_plain_value_errors(batch_app, monkeypatch):
+    monkeypatch.setattr(pipeline, "AUTOPILOT_BATCH_MAX_ITEMS", 1)
+    with pytest.raises(ValueError, match="must not be empty"):
+        pipeline.create_batch_runs([])
+    with pytest.raises(ValueError, match="at most 1"):
+        pipeline.create_batch_runs(["a", "b"])
+    assert len(pipeline.create_batch_runs(["a"])) == 1
+
+
+@pytest.mark.asyncio
+async def test_retrieve_many_embeds_all_misses_in_one_request(monkeypatch):
+    import resources
+    from rag import retrieve as retrieve_module
+
+    class Index:
+        ntotal = 3
+
+        def search(self, vectors, top_k):
+            rows = np.asarray(vectors)[:, :1]
+            return rows.repeat(top_k, axis=1), np.zeros((len(vectors), top_k), dtype="int64") + rows.astype("int64")
+
+    snapshot = SimpleNamespace(
+        version=1,
+        index=Index(),
+        metadata=[{"doc": "kb.md", "chunk_index": i, "text": f"chunk {i}"} for i in range(3)],
+    )
+
+    async def require(_provider):
+        return snapshot
+
+    monkeypatch.setattr(resources, "faiss", SimpleNamespace())
+    monkeypatch.setattr(resources, "require", require)
+    monkeypatch.setattr(retrieve_module, "_retrieval_cache", {})
+    monkeypatch.setitem(sys.modules, "faiss", SimpleNamespace(normalize_L2=lambda m: None))
+
+    embedded = []
+
+    class Embeddings:
+        async def create(self, model, input):
+            embedded.append(list(input))
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[float(q[-1]), 0.0]) for q in input])
+
+    client = SimpleNamespace(embeddings=Embeddings())
+    await retrieve_module.retrieve("q1", client, top_k=1)
+    results = await retrieve_module.retrieve_many(["q2", "q1", "q2", "q0"], client, top_k=1)
+
+    assert embedded == [["q1"], ["q2", "q0"]]
+    assert [r[0]["text"] for r in results] == ["chunk 2", "chunk 1", "chunk 2", "chunk 0"]
@@ -0,0 +1,110 @@
+"""Tests for the streamed /autopilot/run/stream stage events in api/autopilot.py."""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ai_client import get_openai_client
+from api import autopilot, pipeline
+
+
+@pytest.fixture
+def pipeline_app(monkeypatch):
+    statuses = []
+
+    async def extract(transcript, client, run_id):
+        if transcript == "boom":
+            raise ValueError("unparseable transcript")
+        return {"entities": {}, "next_best_actions": [{"action_type": "send_slack_summary"}]}
+
+    async def retrieve(query, client):
+        return [{"source": "kb.md", "text": "pricing"}]
+
+    async def draft(client, transcript, extracted, evidence, run_id=None):
+        return {"reply_text": "Thanks!", "citations": ["kb.md"]}
+
+    async def stream_draft(client, transcript, extracted, evidence, run_id=None):
+        for piece in ("Than", "ks!"):
+            yield "delta", piece
+        yield "draft", await draft(client, transcript, extracted, evidence, run_id)
+
+    async def enrich(actions, extracted, draft, email_content, transcript):
+        return actions
+
+    async def dry_run(action):
+        return {"preview": "slack preview"}
+
+    async def transcribe(audio_b64, lang, on_progress):
+        for done in range(3):
+            on_progress(done, 2)
+        return "hello from audio"
+
+    monkeypatch.setattr(autopilot, "create_run", lambda *args, **kwargs: None)
+    monkeypatch.setattr(pipeline, "update_run", lambda run_id, **kw: statuses.append(kw.get("status")))
+    monkeypatch.setattr(pipeline, "extract_autopilot_json", extract)
+    monkeypatch.setattr(pipeline, "retrieve", retrieve)
+    monkeypatch.setattr(pipeline, "generate_reply_draft", draft)
+    monkeypatch.setattr(pipeline, "stream_reply_draft", stream_draft)
+    monkeypatch.setattr(pipeline, "enrich_actions", enrich)
+    monkeypatch.setattr(pipeline, "dry_run_action", dry_run)
+    monkeypatch.setattr(autopilot, "transcribe_audio_base64", transcribe)
+
+    app = FastAPI()
+    app.include_router(autopilot.router)
+    app.dependency_overrides[get_openai_client] = lambda: object()
+    return app, statuses
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_sse_emits_each_stage_as_it_completes(pipeline_app):
+    app, _ = pipeline_app
+    with TestClient(app) as client:
+        response = client.post("/autopilot/run/stream", json={"mode": "audio", "audio_base64": "AAA="})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [name for name, _ in events] == [
+        "run", "progress", "progress", "progress",
+        "transcribed", "extracted", "evidence", "draft_delta", "draft_delta",
+        "draft", "previewed",
+    ]
+    assert "".join(d["text"] for name, d in events if name == "draft_delta") == "Thanks!"
+    data = dict(events)
+    assert data["transcribed"] == {"transcript": "hello from audio"}
+    assert data["draft"]["reply_draft"]["reply_text"] == "Thanks!"
+    assert data["previewed"]["actions_preview"][0]["preview"] == "slack preview"
+
+
+def test_ndjson_stream_matches_json_endpoint(pipeline_app):
+    app, _ = pipeline_app
+    with TestClient(app) as client:
+        streamed = client.post("/autopilot/run/stream?format=ndjson", json={"mode": "text", "text": "hi"})
+        plain = client.post("/autopilot/run", json={"mode": "text", "text": "hi"}).json()
+
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    merged = {}
+    for line in lines:
+        if line["event"] != "draft_delta":
+            merged.update(line["data"])
+    plain.pop("run_id")
+    merged.pop("run_id")
+    assert merged == plain
+
+
+def test_stage_failure_ends_stream_with_error_event(pipeline_app):
+    app, statuses = pipeline_app
+    with TestClient(app) as client:
+        response = client.post("/autopilot/run/stream?format=ndjson", json={"mode": "text", "text": "boom"})
+
+    last = json.loads(response.text.splitlines()[-1])
+    assert last == {"event": "error", "data": {"status_code": 422, "detail": "unparseable transcript"}}
+    assert statuses[-1] == "error"
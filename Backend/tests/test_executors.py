@@ -0,0 +1,83 @@
+"""Tests for utils/executors.py — per-workload thread pools."""
+
+import asyncio
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from utils.executors import NamedExecutor
+
+
+@pytest.mark.asyncio
+async def test_counters_track_queue_depth_and_active_workers():
+    executor = NamedExecutor("test", 1)
+    gate = threading.Event()
+    try:
+        first = executor.submit(gate.wait)
+        second = executor.submit(lambda: "done")
+        for _ in range(100):
+            if executor.active == 1:
+                break
+            await asyncio.sleep(0.01)
+
+        assert executor.snapshot()["active"] == 1
+        assert executor.snapshot()["queued"] == 1
+
+        gate.set()
+        await first
+        assert await second == "done"
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(lambda: 1 / 0)
+
+        snapshot = executor.snapshot()
+        assert (snapshot["active"], snapshot["queued"]) == (0, 0)
+        assert (snapshot["completed"], snapshot["failed"]) == (2, 1)
+    finally:
+        gate.set()
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_does_not_block_another_workload():
+    browser = NamedExecutor("browser-test", 1)
+    tts = NamedExecutor("tts-test", 1)
+    gate = threading.Event()
+    try:
+        stuck = [browser.submit(gate.wait) for _ in range(3)]
+        assert await asyncio.wait_for(tts.run(lambda: "audio"), timeout=1) == "audio"
+        assert browser.snapshot()["queued"] >= 2
+    finally:
+        gate.set()
+        await asyncio.gather(*stuck)
+        browser.shutdown()
+        tts.shutdown()
+
+
+def test_piper_sessions_get_coordinated_intra_op_threads(monkeypatch):
+    from resources import piper as piper_module
+
+    seen = {}
+
+    class FakeOptions:
+        intra_op_num_threads = 0
+        inter_op_num_threads = 0
+
+    class FakeVoice:
+        @staticmethod
+        def load(path, use_cuda=False):
+            options = FakeOptions()
+            sys.modules["onnxruntime"].InferenceSession(path, sess_options=options)
+            return "voice"
+
+    def fake_session(_path, sess_options=None):
+        seen["intra"] = sess_options.intra_op_num_threads
+        seen["inter"] = sess_options.inter_op_num_threads
+
+    monkeypatch.setitem(sys.modules, "onnxruntime", SimpleNamespace(InferenceSession=fake_session))
+    monkeypatch.setitem(sys.modules, "piper", SimpleNamespace(PiperVoice=FakeVoice))
+    monkeypatch.setattr(piper_module, "PIPER_INTRA_OP_THREADS", 3)
+
+    assert piper_module._load_voice("voice.onnx") == "voice"
+    assert seen == {"intra": 3, "inter": 1}
@@ -0,0 +1,194 @@
+"""Tests for the durable autopilot job queue (store/jobs.py, /autopilot/jobs)."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api import autopilot, pipeline
+from store import db, jobs
+from store.runs import create_run, get_run, update_run
+
+
+@pytest.fixture
+def job_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "jobs.db")
+    db.init_db()
+
+
+@pytest.fixture
+def stages(monkeypatch, job_db):
+    calls = []
+
+    async def extract(transcript, client, run_id):
+        calls.append("extract")
+        return {"entities": {}, "next_best_actions": [{"action_type": "send_slack_summary", "payload": {}}]}
+
+    async def retrieve(query, client):
+        calls.append("retrieve")
+        return [{"doc": "kb.md", "text": "pricing"}]
+
+    async def draft(client, transcript, extracted, evidence, run_id=None):
+        calls.append("draft")
+        return {"reply_text": "Thanks!", "citations": ["kb.md#0"]}
+
+    async def enrich(actions, extracted, draft, email_content, transcript):
+        return actions
+
+    async def dry_run(action):
+        return {"preview": "slack preview"}
+
+    async def client():
+        return object()
+
+    monkeypatch.setattr(pipeline, "extract_autopilot_json", extract)
+    monkeypatch.setattr(pipeline, "retrieve", retrieve)
+    monkeypatch.setattr(pipeline, "generate_reply_draft", draft)
+    monkeypatch.setattr(pipeline, "enrich_actions", enrich)
+    monkeypatch.setattr(pipeline, "dry_run_action", dry_run)
+    monkeypatch.setattr(autopilot, "get_openai_client", client)
+    return calls
+
+
+def test_claim_is_fifo_and_exclusive(job_db):
+    jobs.enqueue_job("a", {"n": 1})
+    jobs.enqueue_job("b", {"n": 2})
+
+    first = jobs.claim_job("w1")
+    second = jobs.claim_job("w2")
+
+    assert (first["run_id"], first["payload"], first["attempts"]) == ("a", {"n": 1}, 1)
+    assert second["run_id"] == "b"
+    assert jobs.claim_job("w3") is None
+    assert jobs.job_counts() == {"running": 2}
+
+
+def test_lapsed_lease_is_reclaimed_then_abandoned(job_db):
+    create_run("r1", "text", "hi")
+    jobs.enqueue_job("r1", {})
+
+    assert jobs.claim_job("w1", lease_s=-1, max_attempts=2)["attempts"] == 1
+    retaken = jobs.claim_job("w2", lease_s=-1, max_attempts=2)
+    assert (retaken["worker_id"], retaken["attempts"]) == ("w2", 2)
+    assert not jobs.renew_lease("r1", "w1")
+
+    assert jobs.claim_job("w3", max_attempts=2) is None
+    assert jobs.get_job("r1")["status"] == "error"
+    assert get_run("r1")["status"] == "error"
+
+
+def test_release_requeues_without_counting_the_attempt(job_db):
+    jobs.enqueue_job("r1", {})
+    jobs.claim_job("w1")
+    jobs.release_job("r1", "w1")
+
+    job = jobs.get_job("r1")
+    assert (job["status"], job["attempts"], job["worker_id"]) == ("queued", 0, None)
+
+
+def test_retry_backs_off_and_gives_up_after_max_attempts(job_db, monkeypatch):
+    create_run("r1", "text", "hi")
+    jobs.enqueue_job("r1", {})
+    clock = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: clock[0])
+
+    jobs.claim_job("w1", max_attempts=3)
+    assert jobs.retry_job("r1", "w1", "STT queue is full", max_attempts=3, backoff_s=2) == "queued"
+    assert jobs.claim_job("w1", max_attempts=3) is None  # backing off for 2 s
+    clock[0] += 2
+    assert jobs.claim_job("w1", max_attempts=3)["attempts"] == 2
+    assert jobs.retry_job("r1", "w1", "STT queue is full", max_attempts=3, backoff_s=2) == "queued"
+    clock[0] += 3
+    assert jobs.claim_job("w1", max_attempts=3) is None  # second delay is 4 s
+    clock[0] += 1
+    jobs.claim_job("w1", max_attempts=3)
+
+    assert jobs.retry_job("r1", "w1", "STT queue is full", max_attempts=3, backoff_s=2) == "error"
+    assert jobs.get_job("r1")["error"] == "gave up after 3 attempts: STT queue is full"
+    assert get_run("r1")["status"] == "error"
+    assert jobs.retry_job("r1", "w1", "again") == "lost"
+
+
+@pytest.mark.asyncio
+async def test_resumed_job_skips_checkpointed_stages(stages):
+    create_run("r1", "text", "hi")
+    update_run("r1", transcript="hi", status="transcribed")
+    update_run("r1", extracted_json={"entities": {}, "next_best_actions": []}, status="extracted")
+    update_run("r1", evidence_json=[])
+    jobs.enqueue_job("r1", {"mode": "text", "text": "hi"})
+
+    await autopilot.run_autopilot_job(jobs.claim_job("w1"))
+
+    assert stages == ["draft"]
+    run = get_run("r1")
+    assert run["status"] == "previewed"
+    assert run["reply_draft"]["reply_text"] == "Thanks!"
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_immediately_and_workers_finish_the_run(stages, monkeypatch):
+    app = FastAPI()
+    app.include_router(autopilot.router)
+    pool = jobs.JobWorkerPool(workers=1, poll_s=0.05)
+    monkeypatch.setattr(autopilot, "job_workers", pool)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            submitted = await client.post("/autopilot/jobs", json={"mode": "text", "text": "hi"})
+            assert submitted.status_code == 202
+            run_id = submitted.json()["run_id"]
+            assert (await client.get(f"/autopilot/jobs/{run_id}")).json()["status"] == "queued"
+
+            pool.start(autopilot.run_autopilot_job)
+            events = await client.get(f"/autopilot/jobs/{run_id}/events?format=ndjson")
+            status = (await client.get(f"/autopilot/jobs/{run_id}")).json()
+    finally:
+        await pool.stop()
+
+    lines = [json.loads(line) for line in events.text.splitlines()]
+    assert lines[-1]["event"] == "result"
+    assert lines[-1]["data"]["actions_preview"][0]["preview"] == "slack preview"
+    assert status["status"] == "done" and status["stage"] == "previewed"
+    assert status["result"]["reply_draft"]["reply_text"] == "Thanks!"
+    assert pool.snapshot()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stopping_the_pool_hands_running_jobs_back(stages, monkeypatch):
+    started = asyncio.Event()
+
+    async def stuck(transcript, client, run_id):
+        started.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(pipeline, "extract_autopilot_json", stuck)
+    create_run("r1", "text", "hi")
+    jobs.enqueue_job("r1", {"mode": "text", "text": "hi"})
+    pool = jobs.JobWorkerPool(workers=1, poll_s=0.05)
+    pool.start(autopilot.run_autopilot_job)
+    await asyncio.wait_for(started.wait(), 5)
+    await pool.stop()
+
+    job = jobs.get_job("r1")
+    assert (job["status"], job["attempts"]) == ("queued", 0)
+    assert get_run("r1")["status"] == "transcribed"
+
+
+@pytest.mark.asyncio
+async def test_events_stream_ends_when_the_job_disappears(job_db, monkeypatch):
+    jobs.enqueue_job("r1", {})
+    statuses = iter([{"run_id": "r1", "status": "queued"}, None])
+    monkeypatch.setattr(autopilot, "_job_status", lambda run_id: next(statuses))
+    monkeypatch.setattr(autopilot, "job_workers", jobs.JobWorkerPool(workers=0, poll_s=0.01))
+    app = FastAPI()
+    app.include_router(autopilot.router)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        events = await client.get("/autopilot/jobs/r1/events?format=ndjson")
+
+    lines = [json.loads(line) for line in events.text.splitlines()]
+    assert [line["event"] for line in lines] == ["status", "error"]
+    assert lines[-1]["data"] == {"status_code": 404, "detail": "Job r1 not found"}
@@ -0,0 +1,170 @@
+"""Tests for extraction/llm_cache.py — cached extraction and draft completions."""
+
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from extraction import autopilot_extractor, calendar_extractor, llm_cache as llm_cache_module, reply_drafter
+from extraction.llm_cache import LlmCache, llm_cache_key, normalize_timestamps
+from store import db
+from utils.timezone import TIMEZONE
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "cache.db")
+    db.init_db()
+    fresh = LlmCache(memory_entries=8, persist=True, disabled_sites=frozenset())
+    monkeypatch.setattr(llm_cache_module, "llm_cache", fresh)
+    # Keys carry the prompt's minute; keep repeated calls inside one.
+    pinned = datetime(2025, 3, 4, 10, 5, tzinfo=TIMEZONE)
+    monkeypatch.setattr(calendar_extractor, "now_toronto", lambda: pinned)
+    monkeypatch.setattr(autopilot_extractor, "now_toronto", lambda: pinned)
+    return fresh
+
+
+class FakeClient:
+    """Answers with `tool_arguments`, or with the next item when it is a list."""
+
+    def __init__(self, tool_arguments: str | list[str] | None = None, content: str | None = None):
+        self.calls = []
+
+        async def create(**kwargs):
+            self.calls.append(kwargs)
+            arguments = tool_arguments[len(self.calls) - 1] if isinstance(tool_arguments, list) else tool_arguments
+            message = SimpleNamespace(
+                content=content,
+                tool_calls=[SimpleNamespace(function=SimpleNamespace(arguments=arguments))],
+            )
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+def request(system: str, user: str = "hi", **params) -> dict:
+    return {
+        "model": "m",
+        "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}],
+        "temperature": 0,
+        **params,
+    }
+
+
+def test_key_normalizes_prompt_timestamps_but_not_user_content():
+    base = llm_cache_key(request("Now: 2025-03-04 10:05 (Tuesday)"))
+
+    assert base == llm_cache_key(request("Now: 2025-03-04 10:05:40 (Tuesday)"))
+    assert base != llm_cache_key(request("Now: 2025-03-04 10:06 (Tuesday)"))
+    assert base == llm_cache_key(request("Now: 2025-03-04 10:05 (Tuesday)", stream=True))
+    hourly = llm_cache_key(request("Now: 2025-03-04 10:05 (Tuesday)"), bucket_minutes=60)
+    assert hourly == llm_cache_key(request("Now: 2025-03-04 10:55 (Tuesday)"), bucket_minutes=60)
+    assert hourly != llm_cache_key(request("Now: 2025-03-04 11:05 (Tuesday)"), bucket_minutes=60)
+    assert base != llm_cache_key(request("Now: 2025-03-05 10:05 (Wednesday)"))
+    assert base != llm_cache_key(request("Now: 2025-03-04 10:05 (Tuesday)", temperature=0.2))
+    assert base != llm_cache_key(request("Now: 2025-03-04 10:05 (Tuesday)", tools=[{"type": "function"}]))
+    assert llm_cache_key(request("s", "at 2025-03-04 10:05")) != llm_cache_key(request("s", "at 2025-03-04 10:06"))
+    assert normalize_timestamps("2025-03-04T23:59:30", 15) == "2025-03-04T23:45"
+
+
+def test_persistent_tier_is_shared_and_memory_tier_expires(cache):
+    now = [0.0]
+    first = LlmCache(memory_entries=8, ttl_seconds=60, clock=lambda: now[0])
+    first.put("k", "value")
+    assert first.get("k", "site") == "value"
+
+    now[0] = 120.0
+    assert first.get("k", "site") == "value"
+    assert LlmCache(memory_entries=8).get("k", "site") == "value"
+
+    stats = first.snapshot()["sites"]["site"]
+    assert (stats["memory_hits"], stats["persistent_hits"], stats["hit_ratio"]) == (1, 1, 1.0)
+
+
+@pytest.mark.asyncio
+async def test_identical_extraction_requests_reach_the_api_once(cache):
+    args = json.dumps({"date": "2025-03-05", "start_time": "15:00", "end_time": "16:00", "title": "Sync"})
+    client = FakeClient(tool_arguments=args)
+
+    first = await calendar_extractor.extract_calendar_event("sync tomorrow at 3", client=client, lang="en")
+    second = await calendar_extractor.extract_calendar_event("sync tomorrow at 3", client=client, lang="en")
+    assert first == second and len(client.calls) == 1
+
+    await calendar_extractor.extract_calendar_event("sync tomorrow at 3", client=client, lang="en", use_cache=False)
+    await calendar_extractor.extract_calendar_event("sync friday at 3", client=client, lang="en")
+    assert len(client.calls) == 3
+
+    snapshot = cache.snapshot()
+    assert snapshot["sites"]["calendar_extract"]["hits"] == 1
+    assert snapshot["sites"]["calendar_extract"]["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_relative_times_are_not_answered_from_an_earlier_minute(cache, monkeypatch):
+    clock = [datetime(2025, 3, 4, 10, 5, tzinfo=TIMEZONE)]
+    monkeypatch.setattr(calendar_extractor, "now_toronto", lambda: clock[0])
+    client = FakeClient(tool_arguments=[
+        json.dumps({"date": "2025-03-04", "start_time": "10:35", "end_time": "11:05", "title": "Call"}),
+        json.dumps({"date": "2025-03-04", "start_time": "11:20", "end_time": "11:50", "title": "Call"}),
+    ])
+
+    first = await calendar_extractor.extract_calendar_event("book a call in 30 minutes", client=client, lang="en")
+    clock[0] = datetime(2025, 3, 4, 10, 50, tzinfo=TIMEZONE)
+    later = await calendar_extractor.extract_calendar_event("book a call in 30 minutes", client=client, lang="en")
+
+    assert (first["start_time"], later["start_time"]) == ("10:35", "11:20")
+    assert len(client.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_unparseable_tool_arguments_are_not_cached(cache):
+    client = FakeClient(tool_arguments=["not json", json.dumps({"title": "Sync"})])
+
+    with pytest.raises(json.JSONDecodeError):
+        await calendar_extractor.extract_calendar_event("sync", client=client, lang="en")
+    assert (await calendar_extractor.extract_calendar_event("sync", client=client, lang="en"))["title"] == "Sync"
+    await calendar_extractor.extract_calendar_event("sync", client=client, lang="en")
+    assert len(client.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_only_a_valid_first_pass_extraction_is_cached(cache):
+    valid = {
+        "intent": "other",
+        "summary": "Caller said hi.",
+        "next_best_actions": [{"action_type": "none", "requires_confirmation": False, "confidence": 1, "payload": {}}],
+    }
+    invalid = json.dumps({"intent": "greeting"})
+    client = FakeClient(tool_arguments=[invalid, json.dumps(valid), json.dumps(valid)])
+
+    # Invalid first pass, fixed by the repair pass: neither call is cached.
+    assert await autopilot_extractor.extract_autopilot_json("hi", client=client) == valid
+    assert await autopilot_extractor.extract_autopilot_json("hi", client=client) == valid
+    assert await autopilot_extractor.extract_autopilot_json("hi", client=client) == valid
+    assert len(client.calls) == 3
+    assert cache.snapshot()["sites"]["autopilot_extract"] == {
+        "memory_hits": 1, "persistent_hits": 0, "misses": 2, "hits": 1, "hit_ratio": 0.3333,
+    }
+
+
+@pytest.mark.asyncio
+async def test_disabled_site_always_calls_the_api(cache):
+    cache.disabled_sites = frozenset({"calendar_extract"})
+    client = FakeClient(tool_arguments=json.dumps({"title": "Sync"}))
+
+    for _ in range(2):
+        await calendar_extractor.extract_calendar_event("sync", client=client, lang="en")
+    assert len(client.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_streamed_draft_replays_a_cached_draft(cache):
+    raw = json.dumps({"reply_text": "Thanks!", "citations": ["kb.md#0"]})
+    client = FakeClient(content=raw)
+
+    draft = await reply_drafter.generate_reply_draft(client, "hi", {}, [])
+    events = [e async for e in reply_drafter.stream_reply_draft(client, "hi", {}, [])]
+
+    assert len(client.calls) == 1
+    assert events == [("delta", "Thanks!"), ("draft", draft)]
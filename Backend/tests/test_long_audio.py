@@ -0,0 +1,98 @@
+"""Tests for speech/long_audio.py — chunked parallel transcription of long uploads."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from speech.long_audio import Chunk, plan_chunks, stitch_words, transcribe_long
+from speech.scheduler import SttScheduler
+
+RATE = 16000
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE), dtype=np.float32) / RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * RATE), dtype=np.float32)
+
+
+def test_short_audio_is_a_single_chunk():
+    samples = tone(3)
+    assert plan_chunks(samples, chunk_s=10) == [Chunk(0, samples.size, 0, samples.size)]
+
+
+def test_cuts_land_in_silence_and_chunks_overlap():
+    # speech 0-7s, pause 7-8s, speech 8-15s, pause 15-16s, speech 16-20s
+    samples = np.concatenate([tone(7), silence(1), tone(7), silence(1), tone(4)])
+    chunks = plan_chunks(samples, chunk_s=10, overlap_s=0.5, search_s=5)
+
+    assert len(chunks) == 3
+    cuts = [chunk.keep_end / RATE for chunk in chunks[:-1]]
+    assert 7.0 <= cuts[0] <= 8.0
+    assert 15.0 <= cuts[1] <= 16.0
+    assert chunks[0].keep_start == 0 and chunks[-1].keep_end == samples.size
+    for left, right in zip(chunks, chunks[1:]):
+        assert left.keep_end == right.keep_start
+        assert left.end - left.keep_end == pytest.approx(0.5 * RATE)
+        assert right.keep_start - right.start == pytest.approx(0.5 * RATE)
+
+
+def test_continuous_speech_still_splits_within_the_search_window():
+    chunks = plan_chunks(tone(25), chunk_s=10, overlap_s=0, search_s=2)
+    assert len(chunks) == 3
+    for chunk in chunks[:-1]:
+        assert 8 * RATE <= chunk.keep_end - chunk.keep_start <= 10 * RATE
+
+
+def test_stitch_keeps_overlapping_words_once_by_midpoint():
+    chunks = [Chunk(0, 11 * RATE, 0, 10 * RATE), Chunk(9 * RATE, 20 * RATE, 10 * RATE, 20 * RATE)]
+    words = [
+        [(1.0, 1.5, " hello"), (9.6, 10.2, " there")],  # " there" midpoint 9.9 -> chunk 0
+        [(0.6, 1.2, " there"), (2.0, 2.5, " friend")],  # absolute 9.6-10.2 -> dropped
+    ]
+    assert [text for _, _, text in stitch_words(chunks, words)] == [" hello", " there", " friend"]
+
+
+@pytest.mark.asyncio
+async def test_transcribe_long_runs_chunks_in_parallel_and_reports_progress():
+    samples = np.concatenate([tone(7), silence(1), tone(7), silence(1), tone(4)])
+    scheduler = SttScheduler(workers=2)
+    in_flight = peak = 0
+    lock = asyncio.Lock()
+
+    def fake_words(window, lang, prompt):
+        middle = window.size / RATE / 2
+        return [(middle, middle + 0.2, f"[{window.size // RATE}]")]
+
+    original_submit = scheduler.submit
+
+    async def tracking_submit(fn, *args, **kwargs):
+        nonlocal in_flight, peak
+        async with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return await original_submit(fn, *args, **kwargs)
+        finally:
+            in_flight -= 1
+
+    scheduler.submit = tracking_submit
+    progress = []
+
+    text = await transcribe_long(
+        samples,
+        "en",
+        on_progress=lambda done, total: progress.append((done, total)),
+        chunk_s=10,
+        scheduler=scheduler,
+        transcribe=fake_words,
+    )
+
+    assert text.count("[") == 3
+    assert peak == 2
+    assert progress[0] == (0, 3) and progress[-1] == (3, 3)
@@ -0,0 +1,90 @@
+"""Tests for token-streamed reply drafting (extraction/reply_drafter.py, TtsSegmenter)."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from extraction.reply_drafter import ReplyTextStream, stream_reply_draft
+from speech.speech import TtsSegmenter, segment_tts_text
+
+
+def feed_all(pieces: list[str]) -> tuple[str, ReplyTextStream]:
+    parser = ReplyTextStream()
+    return "".join(parser.feed(p) for p in pieces), parser
+
+
+@pytest.mark.parametrize("step", [1, 2, 3, 7])
+def test_reply_text_survives_any_split(step):
+    draft = {
+        "other": {"reply_text": "nested, ignored"},
+        "reply_text": 'Hi "Ana",\nsee \\ docs é \U0001F600 done.',
+        "citations": ["kb.md#0"],
+    }
+    raw = json.dumps(draft)  # ensure_ascii: emoji arrives as a surrogate-pair escape
+    text, parser = feed_all([raw[i:i + step] for i in range(0, len(raw), step)])
+
+    assert text == draft["reply_text"]
+    assert parser.raw == raw
+
+
+def test_fenced_json_is_decoded():
+    text, _ = feed_all(["```json\n{\"reply_", "text\": \"Hel", "lo\"}\n```"])
+    assert text == "Hello"
+
+
+def test_plain_text_output_passes_through():
+    text, _ = feed_all(["Thanks for ", "calling."])
+    assert text == "Thanks for calling."
+
+
+class FakeStream:
+    def __init__(self, pieces):
+        self._pieces = iter(pieces)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            piece = next(self._pieces)
+        except StopIteration:
+            raise StopAsyncIteration from None
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+class FakeClient:
+    def __init__(self, pieces):
+        self.calls = []
+
+        async def create(**kwargs):
+            self.calls.append(kwargs)
+            return FakeStream(pieces)
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+@pytest.mark.asyncio
+async def test_stream_reply_draft_yields_deltas_then_draft():
+    pieces = ['{"reply_text": "Thanks', ' for the', ' call."', ', "citations": ["kb.md#0"]}']
+    client = FakeClient(pieces)
+
+    events = [e async for e in stream_reply_draft(client, "hi", {}, [], run_id="r1", use_cache=False)]
+
+    assert client.calls[0]["stream"] is True
+    deltas = [value for kind, value in events if kind == "delta"]
+    assert "".join(deltas) == "Thanks for the call."
+    assert len(deltas) == 3
+    assert events[-1] == ("draft", {"reply_text": "Thanks for the call.", "citations": ["kb.md#0"]})
+
+
+def test_tts_segmenter_matches_batch_segmentation():
+    text = "Hello there!  Thanks for calling about the  invoice. We will follow up by Friday, with the numbers attached."
+    segmenter = TtsSegmenter(max_chars=40, first_segment_chars=12)
+    streamed = []
+    for i in range(0, len(text), 5):
+        streamed.extend(segmenter.feed(text[i:i + 5]))
+    streamed.extend(segmenter.flush())
+
+    assert streamed == segment_tts_text(text, max_chars=40, first_segment_chars=12)
+    assert segmenter.flush() == []
@@ -7,6 +7,8 @@ import numpy as np
 import pytest
 
 from resources.base import ResourceFailed, ResourceProvider
+from speech.stt_cache import SttCache
+from speech.tts_cache import TtsCache
 
 
 class FakeProvider(ResourceProvider):
@@ -39,6 +41,7 @@ async def test_async_transcription_waits_for_whisper_provider(monkeypatch):
     provider = FakeProvider("whisper_stt")
     monkeypatch.setattr(resources, "whisper", provider)
     monkeypatch.setattr(speech, "transcribe_audio", lambda path, lang="zh": "ready")
+    monkeypatch.setattr(speech, "stt_cache", SttCache(persist=False))
 
     task = asyncio.create_task(speech.transcribe_audio_base64("", lang="en"))
     await asyncio.sleep(0)
@@ -73,6 +76,7 @@ async def test_async_synthesis_waits_for_piper_provider(monkeypatch):
     provider = FakeProvider("piper_tts_en")
     monkeypatch.setattr(resources, "piper_en", provider)
     monkeypatch.setattr(speech, "_synthesize_speech_sync", lambda text, lang="zh": b"wav")
+    monkeypatch.setattr(speech, "tts_cache", TtsCache(disk_dir=None))
 
     task = asyncio.create_task(speech.synthesize_speech("Hello", lang="en"))
     await asyncio.sleep(0)
@@ -220,14 +224,14 @@ async def test_tts_route_preserves_resource_failed(monkeypatch):
 
 @pytest.mark.asyncio
 async def test_autopilot_route_preserves_resource_failed(monkeypatch):
-    from api import autopilot
+    from api import autopilot, pipeline
 
     async def unavailable(*args, **kwargs):
         raise ResourceFailed("openai unavailable")
 
     monkeypatch.setattr(autopilot, "create_run", lambda *args, **kwargs: None)
-    monkeypatch.setattr(autopilot, "update_run", lambda *args, **kwargs: None)
-    monkeypatch.setattr(autopilot, "extract_autopilot_json", unavailable)
+    monkeypatch.setattr(pipeline, "update_run", lambda *args, **kwargs: None)
+    monkeypatch.setattr(pipeline, "extract_autopilot_json", unavailable)
     request = SimpleNamespace(mode="text", text="hello", audio_base64=None, locale="en")
 
     with pytest.raises(ResourceFailed, match="openai unavailable"):
@@ -0,0 +1,105 @@
+"""Tests for extraction/speculation.py — speculative calendar extraction."""
+
+import asyncio
+
+import pytest
+
+from api import voice
+from extraction.speculation import SpeculationStats, SpeculativeExtraction, extraction_key
+
+
+class FakeExtractor:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls: list[str] = []
+        self.cancelled: list[str] = []
+
+    async def __call__(self, text, context):
+        self.calls.append(text)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(text)
+            raise
+        if self.fail:
+            raise RuntimeError("llm down")
+        return {"title": text, "context": context}
+
+
+def test_key_ignores_case_punctuation_and_script():
+    assert extraction_key("Book a room, tomorrow!") == extraction_key("book a room tomorrow")
+    assert extraction_key("明天開會。") == extraction_key("明天开会")
+    assert extraction_key("明天开会") != extraction_key("后天开会")
+    assert extraction_key("x", {"date": "2025-01-01"}) != extraction_key("x", None)
+
+
+@pytest.mark.asyncio
+async def test_equivalent_final_text_reuses_result():
+    extractor = FakeExtractor(delay=0.01)
+    stats = SpeculationStats()
+    speculation = SpeculativeExtraction(extractor, stats)
+
+    assert speculation.start("明天上午十点开会")
+    assert not speculation.start("明天上午十点开会。")
+    await asyncio.sleep(0.02)
+    result = await speculation.take("明天上午十点开会。")
+
+    assert result["title"] == "明天上午十点开会"
+    assert extractor.calls == ["明天上午十点开会"]
+    snapshot = stats.snapshot()
+    assert (snapshot["hits"], snapshot["misses"], snapshot["hit_rate"]) == (1, 0, 1.0)
+    assert snapshot["saved_ms"]["avg_ms"] >= 10
+
+
+@pytest.mark.asyncio
+async def test_changed_text_or_context_cancels_and_misses():
+    extractor = FakeExtractor(delay=1)
+    stats = SpeculationStats()
+    speculation = SpeculativeExtraction(extractor, stats)
+
+    speculation.start("明天上午")
+    await asyncio.sleep(0)
+    speculation.start("明天上午十点")
+    await asyncio.sleep(0)
+    assert await speculation.take("明天上午十点开会") is None
+    await asyncio.sleep(0)
+
+    speculation.start("明天上午十点开会")
+    await asyncio.sleep(0)
+    assert await speculation.take("明天上午十点开会", {"title": "standup"}) is None
+    await asyncio.sleep(0)
+
+    assert extractor.cancelled == ["明天上午", "明天上午十点", "明天上午十点开会"]
+    assert stats.snapshot()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_speculation_falls_back_to_normal_extraction():
+    stats = SpeculationStats()
+    speculation = SpeculativeExtraction(FakeExtractor(fail=True), stats)
+    speculation.start("hello")
+    assert await speculation.take("hello") is None
+    assert stats.snapshot()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stable_partials_start_speculation(monkeypatch):
+    started = []
+
+    class Recorder:
+        def start(self, text, context=None):
+            started.append(text)
+
+    class Socket:
+        async def send_json(self, payload):
+            pass
+
+    monkeypatch.setattr(voice, "STREAM_SPECULATIVE_STABLE_N", 2)
+    state = voice._new_stream_state("zh", None, include_audio=False)
+    state["speculation"] = Recorder()
+
+    await voice._send_partial(Socket(), state, "明天上午")
+    assert started == []
+    await voice._send_partial(Socket(), state, "明天上午")
+    assert started == ["明天上午"]
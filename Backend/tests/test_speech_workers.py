@@ -0,0 +1,110 @@
+"""Tests for speech/workers.py — out-of-process speech workers."""
+
+import os
+
+import numpy as np
+import pytest
+
+from speech.workers import (
+    RemotePiperVoice,
+    RemoteWhisperModel,
+    SpeechWorkerCrashed,
+    SpeechWorkerError,
+    SpeechWorkerPool,
+    attached_samples,
+)
+
+FACTORY = "tests.test_speech_workers:FakeHandler"
+
+
+class FakeHandler:
+    """Loaded inside the worker process in place of Whisper/Piper."""
+
+    def __init__(self, fail: bool = False) -> None:
+        if fail:
+            raise RuntimeError("model file missing")
+
+    def transcribe(self, request, emit):
+        if request["kwargs"].get("language") == "crash":
+            os._exit(1)
+        if request["kwargs"].get("language") == "bad":
+            raise ValueError("unsupported language")
+        with attached_samples(request) as audio:
+            total = float(audio.sum())
+            size = int(audio.size)
+        words = [(0.0, 0.5, f"{size}:{total:.1f}")]
+        return {
+            "segments": [{"start": 0.0, "end": 0.5, "text": "ok", "words": words}],
+            "language": request["kwargs"].get("language"),
+            "duration": size / 16_000,
+        }
+
+    def synthesize(self, request, emit):
+        for idx, _ in enumerate(request["text"].split()):
+            emit(22_050, bytes([idx]) * 4)
+
+
+def make_pool(**kwargs):
+    pool = SpeechWorkerPool("fake", FACTORY, kwargs, size=1, start_timeout=60, health_seconds=3600)
+    pool.start()
+    return pool
+
+
+def test_transcribe_passes_samples_through_shared_memory():
+    pool = make_pool()
+    try:
+        model = RemoteWhisperModel(pool)
+        samples = np.full(16_000, 0.25, dtype=np.float32)
+        segments, info = model.transcribe(samples, language="en", word_timestamps=True)
+
+        assert [w.word for w in segments[0].words] == ["16000:4000.0"]
+        assert info.language == "en" and info.duration == 1.0
+        assert pool.snapshot()["requests"] == 1
+    finally:
+        pool.close()
+
+
+def test_synthesize_streams_chunks_back():
+    pool = make_pool()
+    try:
+        chunks = list(RemotePiperVoice(pool).synthesize("one two three"))
+        assert [c.audio_int16_bytes for c in chunks] == [b"\x00" * 4, b"\x01" * 4, b"\x02" * 4]
+        assert {c.sample_rate for c in chunks} == {22_050}
+    finally:
+        pool.close()
+
+
+def test_handler_errors_keep_the_worker():
+    pool = make_pool()
+    try:
+        model = RemoteWhisperModel(pool)
+        with pytest.raises(SpeechWorkerError, match="unsupported language"):
+            model.transcribe(np.zeros(10, dtype=np.float32), language="bad")
+        pid = pool.snapshot()["pids"][0]
+        model.transcribe(np.zeros(10, dtype=np.float32), language="en")
+        assert pool.snapshot()["pids"] == [pid]
+        assert pool.snapshot()["crashes"] == 0
+    finally:
+        pool.close()
+
+
+def test_crashed_worker_is_replaced():
+    pool = make_pool()
+    try:
+        old_pid = pool.snapshot()["pids"][0]
+        with pytest.raises(SpeechWorkerCrashed):
+            pool.call({"op": "transcribe", "kwargs": {"language": "crash"}}, attempts=1)
+
+        segments, _ = RemoteWhisperModel(pool).transcribe(np.ones(4, dtype=np.float32), language="en")
+        assert segments[0].words[0].word == "4:4.0"
+        snapshot = pool.snapshot()
+        assert snapshot["crashes"] == 1 and snapshot["restarts"] == 1
+        assert snapshot["pids"] != [old_pid]
+    finally:
+        pool.close()
+
+
+def test_load_failure_is_raised_from_start():
+    pool = SpeechWorkerPool("broken", FACTORY, {"fail": True}, size=1, start_timeout=60, health_seconds=3600)
+    with pytest.raises(RuntimeError, match="model file missing"):
+        pool.start()
@@ -0,0 +1,204 @@
+"""Tests for speech/streaming.py — incremental streaming transcription."""
+
+import numpy as np
+import pytest
+
+from speech.streaming import LocalAgreement, StreamingTranscriber, TimedWord
+
+
+def words(*items):
+    return [TimedWord(start, end, text) for start, end, text in items]
+
+
+# ── LocalAgreement ────────────────────────────────────────────────────────────
+
+def test_first_hypothesis_commits_nothing():
+    agreement = LocalAgreement()
+    assert agreement.insert(words((0.0, 0.4, " book"), (0.4, 0.8, " a"))) == []
+    assert [w.text for w in agreement.pending] == [" book", " a"]
+
+
+def test_shared_prefix_is_committed():
+    agreement = LocalAgreement()
+    agreement.insert(words((0.0, 0.4, " book"), (0.4, 0.8, " a")))
+    committed = agreement.insert(words((0.0, 0.4, " Book"), (0.4, 0.8, " a"), (0.8, 1.2, " room")))
+    assert [w.text for w in committed] == [" Book", " a"]
+    assert [w.text for w in agreement.pending] == [" room"]
+
+
+def test_overlap_with_committed_tail_is_dropped():
+    agreement = LocalAgreement()
+    agreement.insert(words((0.0, 0.4, " book"), (0.4, 0.8, " a")))
+    agreement.insert(words((0.0, 0.4, " book"), (0.4, 0.8, " a")))
+    committed = agreement.insert(words((0.42, 0.8, " a"), (0.8, 1.2, " room")))
+    assert committed == []
+    assert [w.text for w in agreement.pending] == [" room"]
+
+
+def test_finish_appends_final_hypothesis():
+    agreement = LocalAgreement()
+    agreement.insert(words((0.0, 0.4, " book")))
+    agreement.insert(words((0.0, 0.4, " book")))
+    final = agreement.finish(words((0.0, 0.4, " book"), (0.4, 0.8, " now")))
+    assert "".join(w.text for w in final) == " book now"
+
+
+# ── StreamingTranscriber ──────────────────────────────────────────────────────
+
+class FakeEngine:
+    """Decode returns one sample per byte; transcribe replays scripted hypotheses."""
+
+    def __init__(self, hypotheses):
+        self.hypotheses = list(hypotheses)
+        self.windows: list[int] = []
+        self.prompts: list[str] = []
+
+    async def decode(self, audio: bytes):
+        return np.zeros(len(audio), dtype=np.float32)
+
+    async def transcribe(self, samples, lang, prompt, final=False):
+        self.windows.append(len(samples))
+        self.prompts.append(prompt)
+        return self.hypotheses.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_partials_are_pushed_from_update_task():
+    engine = FakeEngine([
+        words((0.0, 0.5, "明天")),
+        words((0.0, 0.5, "明天"), (0.5, 1.0, "上午")),
+    ])
+    pushed = []
+
+    async def on_partial(text):
+        pushed.append(text)
+
+    transcriber = StreamingTranscriber(
+        "zh",
+        on_partial=on_partial,
+        decode=engine.decode,
+        transcribe=engine.transcribe,
+        sample_rate=10,
+    )
+    transcriber.append(b"\0" * 10)
+    assert transcriber.start_update()
+    assert not transcriber.start_update()
+    await transcriber._task
+    transcriber.append(b"\0" * 10)
+    transcriber.start_update()
+    await transcriber._task
+
+    assert pushed == ["明天", "明天上午"]
+    assert transcriber.committed_text == "明天"
+
+
+@pytest.mark.asyncio
+async def test_window_is_trimmed_and_final_reuses_committed_text():
+    engine = FakeEngine([
+        words((0.0, 1.0, " one"), (1.0, 2.0, " two")),
+        words((0.0, 1.0, " one"), (1.0, 2.0, " two"), (2.0, 2.5, " three")),
+        words((0.0, 0.5, " three"), (0.5, 1.0, " four")),
+    ])
+    transcriber = StreamingTranscriber(
+        "en",
+        decode=engine.decode,
+        transcribe=engine.transcribe,
+        window_max_ms=1000,
+        sample_rate=10,
+    )
+    transcriber.append(b"\0" * 25)
+    transcriber.start_update()
+    await transcriber._task
+    transcriber.append(b"\0" * 5)
+    transcriber.start_update()
+    await transcriber._task
+
+    final = await transcriber.finalize()
+
+    assert final == "one two three four"
+    assert engine.windows == [25, 30, 10]
+    assert engine.prompts[-1] == "one two"
+
+
+@pytest.mark.asyncio
+async def test_finalize_without_audio_returns_empty_text():
+    engine = FakeEngine([])
+    transcriber = StreamingTranscriber("en", decode=engine.decode, transcribe=engine.transcribe)
+    assert await transcriber.finalize() == ""
+    assert engine.windows == []
+
+
+@pytest.mark.asyncio
+async def test_reset_starts_next_turn_on_same_transcriber():
+    engine = FakeEngine([
+        words((0.0, 1.0, " first")),
+        words((0.0, 0.5, " second")),
+    ])
+    transcriber = StreamingTranscriber("en", decode=engine.decode, transcribe=engine.transcribe, sample_rate=10)
+    transcriber.append(b"\0" * 20)
+    assert await transcriber.finalize() == "first"
+
+    transcriber.reset()
+    assert transcriber.buffered_bytes == 0 and transcriber.text == ""
+    transcriber.append(b"\0" * 5)
+    assert await transcriber.finalize() == "second"
+    assert engine.windows == [20, 5]
+    assert engine.prompts == ["", ""]
+
+
+def test_pcm_buffer_drops_oldest_samples_and_reuses_its_array():
+    from speech.streaming import PcmBuffer
+
+    buffer = PcmBuffer(capacity=8)
+    for start in range(0, 20, 3):
+        buffer.append(np.arange(start, start + 3, dtype=np.float32))
+    assert buffer.view().tolist() == list(range(13, 21))
+    assert (buffer.start, buffer.end, buffer.dropped) == (13, 21, 13)
+
+    buffer.append(np.arange(100, 112, dtype=np.float32))
+    assert buffer.view().tolist() == list(range(104, 112))
+    assert buffer.start == 25
+
+    array = buffer._buf
+    buffer.clear()
+    buffer.append(np.ones(2, dtype=np.float32))
+    assert buffer._buf is array and buffer.view().tolist() == [1.0, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_partial_decodes_stay_out_of_the_stt_cache(monkeypatch):
+    import resources
+    from resources.base import ResourceProvider
+    from speech import streaming
+    from speech.stt_cache import SttCache
+
+    class ReadyProvider(ResourceProvider):
+        async def _load(self):
+            return object()
+
+    class Scheduler:
+        def __init__(self):
+            self.calls = []
+
+        async def submit(self, fn, samples, lang, prompt, partial, **kwargs):
+            self.calls.append(partial)
+            return [(0.0, 0.5, " hi")]
+
+    provider = ReadyProvider("whisper_stt")
+    provider.mark_ready(object())
+    cache = SttCache(persist=False)
+    scheduler = Scheduler()
+    monkeypatch.setattr(resources, "whisper", provider)
+    monkeypatch.setattr(streaming, "stt_cache", cache)
+    monkeypatch.setattr(streaming, "stt_scheduler", scheduler)
+    monkeypatch.setattr(streaming.partial_batcher, "max_size", 1)
+
+    samples = np.zeros(1600, dtype=np.float32)
+    for _ in range(2):
+        await streaming._default_transcribe(samples, "en", "")
+    assert cache.snapshot()["memory_entries"] == 0
+
+    for _ in range(2):
+        assert await streaming._default_transcribe(samples, "en", "", final=True) == words((0.0, 0.5, " hi"))
+    assert scheduler.calls == [True, True, False]
+    assert cache.snapshot()["memory_entries"] == 1
@@ -0,0 +1,137 @@
+"""Tests for speech/batching.py — cross-session batching of STT partials."""
+
+import asyncio
+from types import SimpleNamespace
+
+import faster_whisper
+import numpy as np
+import pytest
+
+import resources
+from speech import speech
+from speech.batching import PartialBatcher
+from speech.scheduler import SttScheduler, SttSuperseded
+
+
+class FakeBatch:
+    """Returns one word per window carrying the window length."""
+
+    def __init__(self):
+        self.calls: list[tuple[list[int], str]] = []
+
+    def __call__(self, windows, lang):
+        self.calls.append(([w.size for w in windows], lang))
+        return [[(0.0, 0.5, f"w{w.size}")] for w in windows]
+
+
+def window(size: int) -> np.ndarray:
+    return np.zeros(size, dtype=np.float32)
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_immediately_and_routes_results():
+    run = FakeBatch()
+    batcher = PartialBatcher(max_size=3, max_wait_ms=10_000, run_batch=run, scheduler=SttScheduler())
+
+    results = await asyncio.gather(
+        batcher.submit(window(1), "en", session_id="a"),
+        batcher.submit(window(2), "en", session_id="b"),
+        batcher.submit(window(3), "en", session_id="c"),
+    )
+
+    assert run.calls == [([1, 2, 3], "en")]
+    assert [words[0][2] for words in results] == ["w1", "w2", "w3"]
+    assert batcher.snapshot()["largest"] == 3
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_flushes_after_max_wait_grouped_by_language():
+    run = FakeBatch()
+    batcher = PartialBatcher(max_size=8, max_wait_ms=5, run_batch=run, scheduler=SttScheduler())
+
+    en, zh = await asyncio.gather(
+        batcher.submit(window(4), "en", session_id="a"),
+        batcher.submit(window(5), "zh", session_id="b"),
+    )
+
+    assert en == [(0.0, 0.5, "w4")] and zh == [(0.0, 0.5, "w5")]
+    assert sorted(lang for _, lang in run.calls) == ["en", "zh"]
+    assert batcher.snapshot()["batches"] == 2
+
+
+@pytest.mark.asyncio
+async def test_newer_partial_replaces_pending_one_from_same_session():
+    run = FakeBatch()
+    batcher = PartialBatcher(max_size=8, max_wait_ms=5, run_batch=run, scheduler=SttScheduler())
+
+    stale = asyncio.create_task(batcher.submit(window(1), "en", session_id="a"))
+    await asyncio.sleep(0)
+    fresh = await batcher.submit(window(2), "en", session_id="a")
+
+    with pytest.raises(SttSuperseded):
+        await stale
+    assert fresh == [(0.0, 0.5, "w2")]
+    assert run.calls == [([2], "en")]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_is_raised_to_every_member():
+    def boom(windows, lang):
+        raise RuntimeError("decode failed")
+
+    batcher = PartialBatcher(max_size=2, max_wait_ms=5, run_batch=boom, scheduler=SttScheduler())
+    results = await asyncio.gather(
+        batcher.submit(window(1), "en", session_id="a"),
+        batcher.submit(window(1), "en", session_id="b"),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_transcribe_words_batch_routes_words_back_by_clip_offset(monkeypatch):
+    seen = {}
+
+    class FakePipeline:
+        def __init__(self, model):
+            pass
+
+        def transcribe(self, audio, clip_timestamps, batch_size, **_kwargs):
+            seen["clips"] = clip_timestamps
+            seen["batch_size"] = batch_size
+            word = lambda start, end, text: SimpleNamespace(start=start, end=end, word=text)
+            return [
+                SimpleNamespace(start=0.0, words=[word(0.1, 0.4, " one")]),
+                SimpleNamespace(start=1.0, words=[word(1.2, 1.5, " two"), word(1.5, 1.9, " three")]),
+            ], None
+
+    monkeypatch.setattr(faster_whisper, "BatchedInferencePipeline", FakePipeline)
+    monkeypatch.setattr(resources, "whisper", SimpleNamespace(get=lambda: object()))
+
+    results = speech.transcribe_words_batch([window(16000), window(0), window(16000)], "en")
+
+    assert seen["clips"] == [{"start": 0.0, "end": 1.0}, {"start": 1.0, "end": 2.0}]
+    assert seen["batch_size"] == 2
+    assert results[0] == [(0.1, 0.4, " one")]
+    assert results[1] == []
+    assert [text for _, _, text in results[2]] == [" two", " three"]
+    assert results[2][0][0] == pytest.approx(0.2)
+
+
+def test_windows_over_30_s_keep_timestamps_relative_to_their_start(monkeypatch):
+    class FakePipeline:
+        def __init__(self, model):
+            pass
+
+        def transcribe(self, audio, clip_timestamps, batch_size, **_kwargs):
+            assert audio.size == 30 * 16000 + 16000
+            word = SimpleNamespace(start=29.5, end=29.9, word=" last")
+            return [SimpleNamespace(start=29.0, words=[word])], None
+
+    monkeypatch.setattr(faster_whisper, "BatchedInferencePipeline", FakePipeline)
+    monkeypatch.setattr(resources, "whisper", SimpleNamespace(get=lambda: object()))
+
+    # 32 s window: decoded from its last 30 s, so 2 s are dropped from the head.
+    results = speech.transcribe_words_batch([window(32 * 16000), window(16000)], "en")
+
+    start, end, text = results[0][0]
+    assert (start, end, text) == (pytest.approx(31.5), pytest.approx(31.9), " last")
@@ -0,0 +1,111 @@
+"""Tests for speech/stt_cache.py — Whisper results keyed by decoded audio."""
+
+import io
+import wave
+
+import numpy as np
+import pytest
+
+import resources
+from resources.base import ResourceProvider
+from speech import speech
+from speech.stt_cache import SttCache, stt_cache_key
+from store import db
+
+
+class FakeProvider(ResourceProvider):
+    async def _load(self):
+        return object()
+
+
+def wav_bytes(samples: list[int], rate: int = 16000) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(np.asarray(samples, dtype="<i2").tobytes())
+    return buf.getvalue()
+
+
+def test_key_depends_on_audio_model_lang_and_params():
+    audio = np.ones(160, dtype=np.float32)
+    base = stt_cache_key(audio, "small", "en", {"beam_size": 1})
+
+    assert base == stt_cache_key(audio.copy(), "small", "en", {"beam_size": 1})
+    assert base != stt_cache_key(audio * 0.5, "small", "en", {"beam_size": 1})
+    assert base != stt_cache_key(audio, "tiny", "en", {"beam_size": 1})
+    assert base != stt_cache_key(audio, "small", "zh", {"beam_size": 1})
+    assert base != stt_cache_key(audio, "small", "en", {"beam_size": 5})
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = SttCache(memory_entries=2, persist=False)
+    cache.put("a", "one")
+    cache.put("b", "two")
+    assert cache.get("a") == "one"
+    cache.put("c", "three")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "one" and cache.get("c") == "three"
+    snapshot = cache.snapshot()
+    assert snapshot["evictions"] == 1 and snapshot["memory_hits"] == 3 and snapshot["misses"] == 1
+
+
+def test_persistent_tier_survives_a_new_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "stt.db")
+    db.init_db()
+    SttCache().put("k", [[0.0, 0.5, " hi"]])
+
+    fresh = SttCache()
+    assert fresh.get("k") == [[0.0, 0.5, " hi"]]
+    assert fresh.get("k", persistent=False) == [[0.0, 0.5, " hi"]]
+    assert fresh.snapshot()["persistent_hits"] == 1
+
+    SttCache().put("memory-only", "x", persist=False)
+    assert SttCache().get("memory-only") is None
+
+
+def test_writes_sweep_expired_rows_from_the_cache_table(tmp_path, monkeypatch):
+    from store import runs
+
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "sweep.db")
+    db.init_db()
+    runs.cache_set("stale", "1", ttl=60)
+    conn = db.get_connection()
+    conn.execute("UPDATE cache SET created_at = datetime('now', '-1 hour') WHERE key = 'stale'")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(runs, "_last_sweep", float("-inf"))
+    runs.cache_set("fresh", "2", ttl=60)
+    runs.cache_set("stale-again", "3", ttl=60)  # inside the interval: no second sweep
+
+    conn = db.get_connection()
+    keys = sorted(r["key"] for r in conn.execute("SELECT key FROM cache").fetchall())
+    conn.close()
+    assert keys == ["fresh", "stale-again"]
+    assert runs.cache_get("fresh") == "2"
+
+
+@pytest.mark.asyncio
+async def test_repeated_upload_is_answered_without_scheduling(monkeypatch):
+    provider = FakeProvider("whisper_stt")
+    provider.mark_ready(object())
+    calls = []
+
+    def fake_transcribe(audio, lang="zh"):
+        calls.append(audio.size)
+        return "hello"
+
+    monkeypatch.setattr(resources, "whisper", provider)
+    monkeypatch.setattr(speech, "transcribe_audio", fake_transcribe)
+    monkeypatch.setattr(speech, "stt_cache", SttCache(persist=False))
+
+    clip = wav_bytes([1000, -1000] * 800)
+    assert await speech.transcribe_audio_bytes_async(clip, "en") == "hello"
+    assert await speech.transcribe_audio_bytes_async(clip, "en") == "hello"
+    assert await speech.transcribe_audio_bytes_async(clip, "zh") == "hello"
+
+    assert calls == [1600, 1600]
+    assert speech.stt_cache.snapshot()["hits"] == 1
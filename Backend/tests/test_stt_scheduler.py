@@ -0,0 +1,159 @@
+"""Tests for speech/scheduler.py — STT priority queue and backpressure."""
+
+import asyncio
+import threading
+
+import pytest
+
+from speech.scheduler import (
+    PRIORITY_FINAL,
+    PRIORITY_PARTIAL,
+    SttOverloaded,
+    SttScheduler,
+    SttSuperseded,
+)
+
+
+class Gate:
+    """Blocking job that holds the single worker until released."""
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def __call__(self):
+        self.event.wait(timeout=5)
+        return "gate"
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_finals_run_before_queued_partials():
+    scheduler = SttScheduler(workers=1, max_queue=8)
+    gate = Gate()
+    order = []
+
+    def job(name):
+        order.append(name)
+        return name
+
+    blocker = asyncio.create_task(scheduler.submit(gate))
+    await settle()
+    partial = asyncio.create_task(scheduler.submit(job, "partial", priority=PRIORITY_PARTIAL, session_id="a"))
+    final = asyncio.create_task(scheduler.submit(job, "final", priority=PRIORITY_FINAL, session_id="b"))
+    await settle()
+    assert scheduler.queue_depth == 2
+
+    gate.event.set()
+    assert await asyncio.gather(blocker, partial, final) == ["gate", "partial", "final"]
+    assert order == ["final", "partial"]
+    snapshot = scheduler.snapshot()
+    assert snapshot["completed"] == 3
+    assert snapshot["wait_ms"]["partial"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_newer_request_supersedes_queued_partial_of_same_session():
+    scheduler = SttScheduler(workers=1, max_queue=8)
+    gate = Gate()
+    blocker = asyncio.create_task(scheduler.submit(gate))
+    await settle()
+
+    stale = asyncio.create_task(scheduler.submit(lambda: "old", priority=PRIORITY_PARTIAL, session_id="s"))
+    await settle()
+    fresh = asyncio.create_task(scheduler.submit(lambda: "new", priority=PRIORITY_PARTIAL, session_id="s"))
+    await settle()
+
+    gate.event.set()
+    with pytest.raises(SttSuperseded):
+        await stale
+    assert await fresh == "new"
+    await blocker
+    assert scheduler.snapshot()["superseded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_partials_and_evicts_them_for_finals():
+    scheduler = SttScheduler(workers=1, max_queue=1)
+    gate = Gate()
+    blocker = asyncio.create_task(scheduler.submit(gate))
+    await settle()
+
+    queued_partial = asyncio.create_task(scheduler.submit(lambda: "p", priority=PRIORITY_PARTIAL, session_id="a"))
+    await settle()
+    with pytest.raises(SttOverloaded):
+        await scheduler.submit(lambda: "p2", priority=PRIORITY_PARTIAL, session_id="b")
+
+    final = asyncio.create_task(scheduler.submit(lambda: "f"))
+    await settle()
+    with pytest.raises(SttOverloaded):
+        await queued_partial
+    with pytest.raises(SttOverloaded):
+        await scheduler.submit(lambda: "f2")
+
+    gate.event.set()
+    assert await final == "f"
+    await blocker
+    assert scheduler.snapshot()["rejected"] == 3
+    assert scheduler.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_its_queue_slot():
+    scheduler = SttScheduler(workers=1, max_queue=1)
+    gate = Gate()
+    blocker = asyncio.create_task(scheduler.submit(gate))
+    await settle()
+    waiter = asyncio.create_task(scheduler.submit(lambda: "x"))
+    await settle()
+    waiter.cancel()
+    await settle()
+    assert scheduler.queue_depth == 0
+    gate.event.set()
+    await blocker
+
+
+def test_voice_upload_gets_503_with_retry_after_when_stt_queue_is_full(monkeypatch):
+    import io
+    import wave
+
+    import numpy as np
+    from fastapi.testclient import TestClient
+
+    import main
+    import resources
+    from ai_client import get_openai_client
+    from resources.base import ResourceProvider
+    from speech import speech
+    from speech.stt_cache import SttCache
+
+    class ReadyProvider(ResourceProvider):
+        async def _load(self):
+            return object()
+
+    provider = ReadyProvider("whisper_stt")
+    provider.mark_ready(object())
+    monkeypatch.setattr(resources, "whisper", provider)
+    monkeypatch.setattr(speech, "stt_cache", SttCache(persist=False))
+    monkeypatch.setattr(speech, "stt_scheduler", SttScheduler(workers=0, max_queue=0))
+    monkeypatch.setitem(main.app.dependency_overrides, get_openai_client, lambda: object())
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(np.full(1600, 1000, dtype="<i2").tobytes())
+
+    response = TestClient(main.app).post(
+        "/voice",
+        files={"audio": ("clip.wav", buf.getvalue(), "audio/wav")},
+        data={"lang": "en", "include_audio": "false"},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["error"] == "overloaded"
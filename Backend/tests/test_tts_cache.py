@@ -0,0 +1,141 @@
+"""Tests for speech/tts_cache.py and the cached synthesis path."""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import resources
+
+from speech import speech
+from speech.tts_cache import TtsCache, tts_cache_key
+
+
+class ReadyProvider:
+    def __init__(self, name):
+        self.name = name
+        self.is_ready = True
+
+    async def wait_for(self, timeout=None):
+        return None
+
+    def get(self):
+        return object()
+
+
+def test_key_depends_on_every_component():
+    base = tts_cache_key("amy.onnx", "en", "Hello", {"format": "wav"})
+    assert base == tts_cache_key("amy.onnx", "en", "Hello", {"format": "wav"})
+    assert base != tts_cache_key("ryan.onnx", "en", "Hello", {"format": "wav"})
+    assert base != tts_cache_key("amy.onnx", "zh", "Hello", {"format": "wav"})
+    assert base != tts_cache_key("amy.onnx", "en", "Hello!", {"format": "wav"})
+    assert base != tts_cache_key("amy.onnx", "en", "Hello", {"format": "pcm16"})
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    cache = TtsCache(memory_bytes=10, disk_dir=None)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    snapshot = cache.snapshot()
+    assert snapshot["memory_bytes"] == 8
+    assert snapshot["memory_evictions"] == 1
+    assert snapshot["misses"] == 1
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    TtsCache(memory_bytes=1024, disk_dir=tmp_path, disk_bytes=1024).put("k" * 64, b"RIFF")
+
+    fresh = TtsCache(memory_bytes=1024, disk_dir=tmp_path, disk_bytes=1024)
+    assert fresh.get("k" * 64) == b"RIFF"
+    assert fresh.get("k" * 64) == b"RIFF"
+    snapshot = fresh.snapshot()
+    assert (snapshot["disk_hits"], snapshot["memory_hits"]) == (1, 1)
+
+
+def test_disk_tier_trims_oldest_entries_over_budget(tmp_path):
+    cache = TtsCache(memory_bytes=0, disk_dir=tmp_path, disk_bytes=20)
+    for idx, key in enumerate(("aa1", "bb2", "cc3")):
+        cache.put(key, b"x" * 8)
+        path = tmp_path / key[:2] / f"{key}.wav"
+        os.utime(path, (idx, idx))
+
+    assert cache.get("aa1") is None
+    assert cache.get("cc3") == b"x" * 8
+    assert cache.snapshot()["disk_evictions"] >= 1
+
+
+def test_disk_entries_are_named_after_their_format(tmp_path):
+    cache = TtsCache(memory_bytes=0, disk_dir=tmp_path, disk_bytes=1024)
+    cache.put("aa1", b"OggS", "ogg")
+    cache.put("bb2", b"\x00\x01", "pcm16")
+
+    assert sorted(p.name for p in tmp_path.glob("*/*")) == ["aa1.ogg", "bb2.pcm"]
+    fresh = TtsCache(memory_bytes=0, disk_dir=tmp_path, disk_bytes=1024)
+    assert fresh.get("aa1", "ogg") == b"OggS"
+    assert fresh._scan_disk_bytes() == 6
+
+
+@pytest.mark.asyncio
+async def test_synthesize_speech_runs_piper_once_per_text(monkeypatch):
+    calls = []
+
+    def fake_sync(text, lang="zh"):
+        calls.append(text)
+        return b"RIFF" + text.encode()
+
+    monkeypatch.setattr(resources, "piper_en", ReadyProvider("piper_tts_en"))
+    monkeypatch.setattr(speech, "_synthesize_speech_sync", fake_sync)
+    monkeypatch.setattr(speech, "tts_cache", TtsCache(disk_dir=None))
+
+    first = await speech.synthesize_speech("Try again.", lang="en")
+    second = await speech.synthesize_speech("  Try   again. ", lang="en")
+
+    assert first == second
+    assert calls == ["Try again."]
+
+
+@pytest.mark.asyncio
+async def test_prewarm_fills_cache_with_templates_and_segments(monkeypatch):
+    from api.voice import tts_template_texts
+
+    calls = []
+    monkeypatch.setattr(resources, "piper_en", ReadyProvider("piper_tts_en"))
+    monkeypatch.setattr(speech, "_synthesize_speech_sync", lambda text, lang="zh": calls.append(text) or b"RIFF")
+    monkeypatch.setattr(speech, "tts_cache", TtsCache(disk_dir=None))
+
+    texts = {"en": tts_template_texts()["en"]}
+    warmed = await speech.prewarm_tts(texts)
+
+    assert warmed == len(calls)
+    for text in texts["en"]:
+        assert text in calls
+        for segment in speech.segment_tts_text(text):
+            assert segment in calls
+
+
+@pytest.mark.asyncio
+async def test_stream_speech_yields_piper_chunks_then_serves_from_cache(monkeypatch):
+    chunk = lambda pcm: SimpleNamespace(sample_rate=22050, audio_int16_bytes=pcm)
+    voice = SimpleNamespace(calls=0)
+
+    def synthesize(text):
+        voice.calls += 1
+        yield chunk(b"\x01\x00")
+        yield chunk(b"\x02\x00")
+
+    voice.synthesize = synthesize
+    monkeypatch.setattr(resources, "piper_en", ReadyProvider("piper_tts_en"))
+    monkeypatch.setattr(speech, "_get_piper_voice", lambda lang: voice)
+    monkeypatch.setattr(speech, "tts_cache", TtsCache(disk_dir=None))
+
+    streamed = [item async for item in speech.stream_speech("One. Two.", lang="en")]
+    cached = [item async for item in speech.stream_speech("One. Two.", lang="en")]
+
+    assert streamed == [(22050, b"\x01\x00"), (22050, b"\x02\x00")]
+    assert cached == [(22050, b"\x01\x00\x02\x00")]
+    assert voice.calls == 1
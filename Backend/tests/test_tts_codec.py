@@ -0,0 +1,71 @@
+"""Tests for the TTS output codec layer in speech/speech.py."""
+
+import io
+
+import numpy as np
+import pytest
+from faster_whisper.audio import decode_audio
+
+import resources
+from speech import speech
+from speech.tts_cache import TtsCache
+
+
+class ReadyProvider:
+    is_ready = True
+
+    async def wait_for(self, timeout=None):
+        return None
+
+    def get(self):
+        return object()
+
+
+def tone_pcm(seconds: float = 1.0, rate: int = 22050) -> bytes:
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * 220 * t) * 8000).astype("<i2").tobytes()
+
+
+def test_wav_and_pcm16_encoding():
+    pcm = tone_pcm(0.1)
+    assert speech.encode_audio(pcm, 22050, "pcm16") == pcm
+    rate, frames = speech._wav_to_pcm(speech.encode_audio(pcm, 22050, "wav"))
+    assert (rate, frames) == (22050, pcm)
+
+
+@pytest.mark.parametrize("fmt, magic", [("ogg", b"OggS"), ("webm", b"\x1a\x45\xdf\xa3")])
+def test_opus_containers_are_smaller_and_decodable(fmt, magic):
+    pcm = tone_pcm(1.0)
+    encoded = speech.encode_audio(pcm, 22050, fmt)
+    assert encoded.startswith(magic)
+    assert len(encoded) < len(speech.encode_audio(pcm, 22050, "wav")) / 4
+    decoded = decode_audio(io.BytesIO(encoded), sampling_rate=16000)
+    assert decoded.shape[0] == pytest.approx(16000, abs=800)
+
+
+def test_unknown_format_falls_back_to_wav():
+    assert speech.normalize_tts_format("mp3") == "wav"
+    assert speech.normalize_tts_format("OGG") == "ogg"
+    with pytest.raises(ValueError):
+        speech.encode_audio(b"", 16000, "mp3")
+
+
+@pytest.mark.asyncio
+async def test_compressed_formats_reuse_the_cached_wav(monkeypatch):
+    calls = []
+
+    def fake_sync(text, lang="zh"):
+        calls.append(text)
+        return speech.encode_audio(tone_pcm(0.5), 22050, "wav")
+
+    monkeypatch.setattr(resources, "piper_en", ReadyProvider())
+    monkeypatch.setattr(speech, "_synthesize_speech_sync", fake_sync)
+    monkeypatch.setattr(speech, "tts_cache", TtsCache(disk_dir=None))
+
+    wav = await speech.synthesize_speech("Done.", lang="en")
+    ogg = await speech.synthesize_speech("Done.", lang="en", fmt="ogg")
+    again = await speech.synthesize_speech("Done.", lang="en", fmt="ogg")
+
+    assert wav.startswith(b"RIFF") and ogg.startswith(b"OggS")
+    assert again == ogg
+    assert calls == ["Done."]
@@ -0,0 +1,115 @@
+"""Tests for speech/vad.py — server-side voice activity detection."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from speech.streaming import StreamingTranscriber, TimedWord
+from speech.vad import EnergyDetector, VadTracker, create_vad_tracker
+
+RATE = 16000
+
+
+def tone(ms: int, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(RATE * ms // 1000) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(ms: int) -> np.ndarray:
+    return np.zeros(RATE * ms // 1000, dtype=np.float32)
+
+
+def noise(ms: int) -> np.ndarray:
+    samples = np.tile(np.array([0.2, -0.2], dtype=np.float32), RATE * ms // 2000)
+    return samples
+
+
+def test_energy_detector_rejects_silence_and_high_zcr_hiss():
+    detector = EnergyDetector()
+    frames = np.stack([
+        tone(30),
+        silence(30),
+        noise(30),
+    ])
+    assert detector.classify(frames).tolist() == [True, False, False]
+
+
+def test_tracker_accumulates_speech_and_trailing_silence_across_feeds():
+    tracker = VadTracker(EnergyDetector())
+    audio = np.concatenate([silence(300), tone(600), silence(900)])
+    for start in range(0, audio.size, 1000):
+        tracker.feed(audio[start:start + 1000])
+
+    assert tracker.voiced_ms == pytest.approx(600, abs=30)
+    assert tracker.trailing_silence_ms == pytest.approx(900, abs=30)
+    start, end = tracker.speech_bounds(pad_ms=0)
+    assert start == pytest.approx(0.3, abs=0.03)
+    assert end == pytest.approx(0.9, abs=0.03)
+
+
+def test_take_new_speech_resets_after_read():
+    tracker = VadTracker(EnergyDetector())
+    tracker.feed(tone(90))
+    assert tracker.take_new_speech()
+    tracker.feed(silence(90))
+    assert not tracker.take_new_speech()
+
+
+def test_create_vad_tracker_can_be_disabled():
+    assert create_vad_tracker("off") is None
+    assert isinstance(create_vad_tracker("energy"), VadTracker)
+
+
+def pcm(samples: np.ndarray) -> bytes:
+    return (samples * 32767).astype("<i2").tobytes()
+
+
+@pytest.mark.asyncio
+async def test_transcriber_skips_silence_and_trims_final_window():
+    windows = []
+
+    async def transcribe(samples, lang, prompt, final=False):
+        windows.append(samples.size)
+        return [TimedWord(0.0, 0.5, "hi")]
+
+    transcriber = StreamingTranscriber(
+        "en",
+        transcribe=transcribe,
+        audio_format="pcm16",
+        vad=VadTracker(EnergyDetector()),
+    )
+    transcriber.append(pcm(silence(600)))
+    transcriber.start_update()
+    await transcriber._task
+    assert windows == []
+
+    transcriber.append(pcm(tone(600)))
+    transcriber.append(pcm(silence(900)))
+    final = await transcriber.finalize()
+
+    assert final == "hi"
+    # 600 ms speech + 300 ms padding on each side, not the full 2.1 s buffer.
+    assert windows[-1] == pytest.approx(RATE * 1.2, abs=RATE * 0.05)
+
+
+@pytest.mark.asyncio
+async def test_blocking_detector_runs_off_the_event_loop():
+    threads = []
+
+    class SlowDetector(EnergyDetector):
+        blocking = True
+
+        def classify(self, frames):
+            threads.append(threading.current_thread())
+            return super().classify(frames)
+
+    tracker = VadTracker(SlowDetector())
+    transcriber = StreamingTranscriber("en", audio_format="pcm16", vad=tracker)
+    transcriber.append(pcm(tone(300)))
+    assert threads == [] and tracker.voiced_ms == 0
+
+    await transcriber.feed_vad()
+
+    assert threads and threading.main_thread() not in threads
+    assert tracker.voiced_ms == pytest.approx(300, abs=30)
@@ -0,0 +1,116 @@
+"""Tests for store/voice_sessions.py — bounded and shared voice session stores."""
+
+import asyncio
+
+import pytest
+
+from store import db
+from store.voice_sessions import (
+    MemoryVoiceSessionStore,
+    SqliteVoiceSessionStore,
+    VoiceSessionStore,
+    run_session_sweeper,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "sessions.db")
+    db.init_db()
+
+
+def make_store(kind, **kwargs):
+    cls = MemoryVoiceSessionStore if kind == "memory" else SqliteVoiceSessionStore
+    return cls(**kwargs)
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_round_trip_and_overwrite(kind, sqlite_db):
+    store = make_store(kind)
+    store.set("s1", {"title": "Dentist", "date": "2026-03-01"}, awaiting_update=True)
+    store.set("s1", {"title": "Dentist", "date": "2026-03-02"}, awaiting_update=False)
+
+    session = store.get("s1")
+    assert session["event"] == {"title": "Dentist", "date": "2026-03-02"}
+    assert session["awaiting_update"] is False
+    assert store.get("missing") is None
+    assert store.count() == 1
+
+    store.delete("s1")
+    assert store.get("s1") is None
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_expired_sessions_are_hidden_and_swept(kind, sqlite_db):
+    clock = Clock()
+    store = make_store(kind, ttl_seconds=60, clock=clock)
+    store.set("old", {"title": "a"}, awaiting_update=True)
+    clock.now += 30
+    store.set("new", {"title": "b"}, awaiting_update=True)
+    clock.now += 45
+
+    assert store.get("old") is None
+    store.set("older", {"title": "c"}, awaiting_update=False)
+    clock.now += 61
+    assert store.sweep() == 2
+    assert store.count() == 0
+    assert store.snapshot()["expired"] == 3
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_least_recently_used_session_is_evicted(kind, sqlite_db):
+    clock = Clock()
+    store = make_store(kind, max_entries=2, clock=clock)
+    for sid in ("a", "b"):
+        store.set(sid, {"title": sid}, awaiting_update=False)
+        clock.now += 1
+    store.set("a", {"title": "a2"}, awaiting_update=False)
+    clock.now += 1
+    store.set("c", {"title": "c"}, awaiting_update=False)
+
+    assert store.get("b") is None
+    assert store.get("a")["event"] == {"title": "a2"}
+    snapshot = store.snapshot()
+    assert snapshot["sessions"] == 2 and snapshot["evicted"] == 1
+    assert snapshot["backend"] == kind
+
+
+def test_sqlite_sessions_are_visible_to_other_store_instances(sqlite_db):
+    SqliteVoiceSessionStore().set("shared", {"title": "Standup"}, awaiting_update=True)
+    session = SqliteVoiceSessionStore().get("shared")
+    assert session["event"] == {"title": "Standup"} and session["awaiting_update"] is True
+
+
+def test_backend_missing_a_method_fails_at_construction():
+    class Partial(VoiceSessionStore):
+        def get(self, session_id):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        Partial()
+
+
+@pytest.mark.asyncio
+async def test_sweeper_removes_expired_sessions_in_background():
+    clock = Clock()
+    store = MemoryVoiceSessionStore(ttl_seconds=10, clock=clock)
+    store.set("s1", {"title": "a"}, awaiting_update=False)
+    clock.now += 11
+
+    task = asyncio.create_task(run_session_sweeper(store, interval_seconds=0.01))
+    try:
+        for _ in range(100):
+            if store.count() == 0:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+    assert store.count() == 0
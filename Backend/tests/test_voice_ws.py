@@ -0,0 +1,293 @@
+"""Tests for the /voice/ws streaming protocol in api/voice.py."""
+
+import asyncio
+import io
+import wave
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ai_client import get_openai_client
+from api import voice
+from api.models import VoiceResponse
+from api.voice_frames import (
+    FLAG_FINAL,
+    FLAG_VOICED,
+    FRAME_AUDIO,
+    FRAME_HEADER,
+    FRAME_TTS,
+    pack_frame,
+    unpack_frame,
+)
+
+
+def make_wav(frames: int = 1600, rate: int = 16000) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(b"\0\0" * frames)
+    return buf.getvalue()
+
+
+class FakeTranscriber:
+    instances: list["FakeTranscriber"] = []
+
+    def __init__(self, lang, **_kwargs):
+        self.lang = lang
+        self.on_partial = None
+        self.vad = None
+        self.audio = bytearray()
+        self.over_budget = False
+        FakeTranscriber.instances.append(self)
+
+    @property
+    def buffered_bytes(self):
+        return len(self.audio)
+
+    def append(self, chunk):
+        self.audio.extend(chunk)
+
+    async def feed_vad(self):
+        return None
+
+    def start_update(self):
+        return False
+
+    async def finalize(self):
+        return "明天上午十点开会"
+
+    def cancel(self):
+        pass
+
+    def reset(self):
+        self.audio.clear()
+
+
+@pytest.fixture
+def ws_app(monkeypatch):
+    FakeTranscriber.instances = []
+    monkeypatch.setattr(voice, "StreamingTranscriber", FakeTranscriber)
+
+    async def fake_process(user_text, lang, session_id, include_audio, client, input_type="text", **_kwargs):
+        return VoiceResponse(user_text=user_text, ai_text="好的。", audio_base64="", session_id=session_id)
+
+    async def fake_synthesize(text, lang="zh", fmt=None):
+        return make_wav()
+
+    monkeypatch.setattr(voice, "_process_calendar_text", fake_process)
+    monkeypatch.setattr(voice, "synthesize_speech", fake_synthesize)
+
+    app = FastAPI()
+    app.include_router(voice.router)
+    app.dependency_overrides[get_openai_client] = lambda: object()
+    return app
+
+
+# ── frame codec ───────────────────────────────────────────────────────────────
+
+def test_frame_roundtrip():
+    data = pack_frame(FRAME_AUDIO, b"pcm", sequence=7, duration_ms=80, flags=FLAG_VOICED)
+    frame = unpack_frame(data)
+    assert len(data) == FRAME_HEADER.size + 3
+    assert (frame.kind, frame.sequence, frame.duration_ms) == (FRAME_AUDIO, 7, 80)
+    assert frame.voiced and not frame.final
+    assert bytes(frame.payload) == b"pcm"
+
+
+def test_unpack_rejects_short_or_unknown_frames():
+    with pytest.raises(ValueError):
+        unpack_frame(b"\x01")
+    with pytest.raises(ValueError):
+        unpack_frame(pack_frame(9, b"", sequence=0))
+
+
+# ── websocket ─────────────────────────────────────────────────────────────────
+
+def test_binary_protocol_audio_in_and_tts_out(ws_app):
+    with TestClient(ws_app) as client, client.websocket_connect("/voice/ws") as ws:
+        ws.send_json({"type": "start", "lang": "zh", "protocol": "binary"})
+        ack = ws.receive_json()
+        assert ack["protocol"] == "binary"
+
+        ws.send_bytes(pack_frame(FRAME_AUDIO, b"\x01\x02", sequence=0, duration_ms=80, flags=FLAG_VOICED))
+        ws.send_bytes(pack_frame(FRAME_AUDIO, b"\x03", sequence=1, duration_ms=80, flags=FLAG_FINAL))
+
+        assert ws.receive_json()["type"] == "stt_final"
+        assert ws.receive_json()["type"] == "ai_response"
+        frame = unpack_frame(ws.receive_bytes())
+        assert frame.kind == FRAME_TTS
+        assert frame.final
+        assert frame.duration_ms == 100
+        assert bytes(frame.payload).startswith(b"RIFF")
+        assert ws.receive_json() == {"type": "tts_done", "interrupted": False}
+        assert ws.receive_json()["type"] == "done"
+
+    assert bytes(FakeTranscriber.instances[-1].audio) == b"\x01\x02\x03"
+
+
+def test_json_protocol_rejects_binary_frames(ws_app):
+    with TestClient(ws_app) as client, client.websocket_connect("/voice/ws") as ws:
+        ws.send_json({"type": "start", "lang": "en"})
+        assert ws.receive_json()["protocol"] == "json"
+        ws.send_bytes(pack_frame(FRAME_AUDIO, b"\x01", sequence=0))
+        assert ws.receive_json()["type"] == "error"
+
+        ws.send_json({"type": "stop"})
+        assert ws.receive_json()["type"] == "stt_final"
+        assert ws.receive_json()["type"] == "ai_response"
+        tts = ws.receive_json()
+        assert tts["type"] == "tts_chunk" and tts["audio_base64"]
+
+
+def test_streamed_tts_forwards_pcm_chunks_with_wav_header_once(ws_app, monkeypatch):
+    async def fake_stream(text, lang="zh"):
+        yield 16000, b"\0\0" * 160
+        yield 16000, b"\0\0" * 320
+
+    monkeypatch.setattr(voice, "stream_speech", fake_stream)
+    with TestClient(ws_app) as client, client.websocket_connect("/voice/ws") as ws:
+        ws.send_json({"type": "start", "lang": "zh", "protocol": "binary", "tts_stream": "wav"})
+        assert ws.receive_json()["tts_stream"] == "wav"
+        ws.send_bytes(pack_frame(FRAME_AUDIO, b"\x01", sequence=0, flags=FLAG_FINAL))
+
+        assert ws.receive_json()["type"] == "stt_final"
+        assert ws.receive_json()["type"] == "ai_response"
+        start = ws.receive_json()
+        assert (start["type"], start["format"], start["sample_rate"]) == ("tts_start", "wav", 16000)
+
+        first = unpack_frame(ws.receive_bytes())
+        assert bytes(first.payload).startswith(b"RIFF")
+        assert first.duration_ms == 10
+        second = unpack_frame(ws.receive_bytes())
+        assert (second.sequence, second.duration_ms) == (1, 20)
+        assert not bytes(second.payload).startswith(b"RIFF")
+        closing = unpack_frame(ws.receive_bytes())
+        assert closing.final and not closing.payload
+        assert ws.receive_json() == {"type": "tts_done", "interrupted": False}
+        assert ws.receive_json()["type"] == "done"
+
+
+def test_duplex_session_keeps_connection_open_across_turns(ws_app):
+    with TestClient(ws_app) as client, client.websocket_connect("/voice/ws") as ws:
+        ws.send_json({"type": "start", "lang": "zh", "duplex": True, "include_audio": False})
+        ack = ws.receive_json()
+        assert ack["duplex"] is True
+
+        for _ in range(2):
+            ws.send_json({"type": "stop"})
+            assert ws.receive_json()["type"] == "stt_final"
+            assert ws.receive_json()["type"] == "ai_response"
+            assert ws.receive_json() == {"type": "done", "session_id": ack["session_id"]}
+
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+    assert len(FakeTranscriber.instances) == 4
+
+
+@pytest.fixture
+def slow_reply(monkeypatch):
+    cancelled = []
+
+    async def slow_process(user_text, lang, session_id, include_audio, client, input_type="text", **_kwargs):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(user_text)
+            raise
+
+    monkeypatch.setattr(voice, "_process_calendar_text", slow_process)
+    return cancelled
+
+
+def test_interrupt_message_cancels_in_flight_reply(ws_app, slow_reply):
+    with TestClient(ws_app) as client, client.websocket_connect("/voice/ws") as ws:
+        ws.send_json({"type": "start", "lang": "zh", "duplex": True})
+        ws.receive_json()
+        ws.send_json({"type": "stop"})
+        assert ws.receive_json()["type"] == "stt_final"
+
+        ws.send_json({"type": "interrupt"})
+        assert ws.receive_json() == {"type": "tts_done", "interrupted": True, "reason": "client"}
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+    assert slow_reply == ["明天上午十点开会"]
+
+
+def test_speech_during_reply_barges_in_and_starts_new_turn(ws_app, slow_reply):
+    with TestClient(ws_app) as client, client.websocket_connect("/voice/ws") as ws:
+        ws.send_json({"type": "start", "lang": "zh", "duplex": True})
+        ws.receive_json()
+        ws.send_json({"type": "stop"})
+        assert ws.receive_json()["type"] == "stt_final"
+
+        ws.send_json({"type": "audio_chunk", "audio_base64": "AAA=", "energy": 0.0, "duration_ms": 300})
+        ws.send_json({"type": "audio_chunk", "audio_base64": "AAE=", "energy": 0.9, "duration_ms": 250})
+        assert ws.receive_json() == {"type": "tts_done", "interrupted": True, "reason": "speech"}
+    assert slow_reply
+    assert bytes(FakeTranscriber.instances[-1].audio) == b"\x00\x00\x00\x01"
+
+
+def test_multi_turn_session_reuses_state_across_turns(ws_app):
+    with TestClient(ws_app) as client, client.websocket_connect("/voice/ws") as ws:
+        ws.send_json({"type": "start", "lang": "zh", "multi_turn": True, "include_audio": False})
+        ack = ws.receive_json()
+        assert ack["multi_turn"] is True and ack["duplex"] is False
+
+        for chunk in ("AAA=", "AAE="):
+            ws.send_json({"type": "audio_chunk", "audio_base64": chunk, "final": True})
+            assert ws.receive_json()["type"] == "stt_final"
+            assert ws.receive_json()["type"] == "ai_response"
+            assert ws.receive_json() == {"type": "done", "session_id": ack["session_id"]}
+
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+    # One transcriber for the implicit session, one for the started one.
+    assert len(FakeTranscriber.instances) == 2
+    assert FakeTranscriber.instances[-1].audio == bytearray()
+
+
+def test_idle_session_is_closed(ws_app, monkeypatch):
+    monkeypatch.setattr(voice, "STREAM_SESSION_IDLE_S", 0.05)
+    with TestClient(ws_app) as client, client.websocket_connect("/voice/ws") as ws:
+        ws.send_json({"type": "start", "lang": "zh", "multi_turn": True})
+        ws.receive_json()
+        assert ws.receive_json() == {"type": "session_end", "reason": "idle_timeout"}
+        assert ws.receive()["type"] == "websocket.close"
+
+
+def test_connections_over_capacity_get_busy(ws_app, monkeypatch):
+    from speech.admission import AdmissionController
+
+    controller = AdmissionController(max_sessions=1, max_waiting=0, retry_after_s=3)
+    monkeypatch.setattr(voice, "voice_admission", controller)
+    with TestClient(ws_app) as client, client.websocket_connect("/voice/ws") as first:
+        first.send_json({"type": "ping"})
+        assert first.receive_json() == {"type": "pong"}
+        with client.websocket_connect("/voice/ws") as second:
+            busy = second.receive_json()
+            assert busy["type"] == "busy" and busy["retry_after_s"] == 3
+            assert second.receive()["code"] == 1013
+    assert controller.snapshot()["rejected"] == 1
+    assert controller.snapshot()["admitted"] == 0
+
+
+def test_failed_stream_setup_gives_back_its_admission_slot(ws_app, monkeypatch):
+    from speech.admission import AdmissionController
+
+    controller = AdmissionController(max_sessions=1, max_waiting=0)
+    monkeypatch.setattr(voice, "voice_admission", controller)
+
+    def broken_state(**_kwargs):
+        raise RuntimeError("session store unavailable")
+
+    monkeypatch.setattr(voice, "_new_stream_state", broken_state)
+    with TestClient(ws_app) as client:
+        for _ in range(2):
+            with client.websocket_connect("/voice/ws") as ws:
+                assert ws.receive_json() == {"type": "error", "message": "session store unavailable"}
+                assert ws.receive()["code"] == 1011
+    assert controller.snapshot()["rejected"] == 0
+    assert controller.active == 0
@@ -220,6 +220,15 @@ def test_config_env_override(monkeypatch):
     assert cfg.whisper_enabled is False
 
 
+def test_config_partial_whisper_follows_partial_model(monkeypatch):
+    monkeypatch.delenv("WHISPER_PARTIAL_MODEL", raising=False)
+    assert load_config().whisper_partial_enabled is False
+    monkeypatch.setenv("WHISPER_PARTIAL_MODEL", "tiny")
+    assert load_config().whisper_partial_enabled is True
+    monkeypatch.setenv("WARMUP_WHISPER_PARTIAL_ENABLED", "false")
+    assert load_config().whisper_partial_enabled is False
+
+
 @pytest.mark.parametrize(
     ("name", "value"),
     [
@@ -623,6 +632,19 @@ def test_ready_503_when_required_provider_failed():
     assert r.json()["resources"]["whisper_stt"] == "failed"
 
 
+def test_ready_ignores_unconfigured_partial_whisper_tier():
+    reg = ResourceRegistry()
+    primary = FakeProvider("whisper_stt", required=True)
+    partial = FakeProvider("whisper_stt_partial", required=False)
+    reg.register(primary)
+    reg.register(partial)
+    client = _make_test_app(reg)
+    primary.mark_ready(object())
+    r = client.get("/ready")
+    assert r.status_code == 200
+    assert r.json()["resources"]["whisper_stt_partial"] == "skipped"
+
+
 def test_ready_200_no_required_providers():
     reg = ResourceRegistry()
     client = _make_test_app(reg)
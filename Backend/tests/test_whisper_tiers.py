@@ -0,0 +1,72 @@
+"""Tests for tiered Whisper models: partials on the light tier, finals on the primary."""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import resources
+from resources.base import ResourceProvider
+from speech import speech
+from speech.stats import SttTierLatency
+
+
+class FakeProvider(ResourceProvider):
+    async def _load(self):
+        return object()
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    def transcribe(self, audio, **_kwargs):
+        self.calls += 1
+        word = SimpleNamespace(start=0.0, end=0.3, word=f" {self.name}")
+        return [SimpleNamespace(text=f" {self.name}", words=[word])], None
+
+
+@pytest.fixture
+def tiers(monkeypatch):
+    primary, partial = FakeModel("primary"), FakeModel("partial")
+    primary_provider = FakeProvider("whisper_stt", required=True)
+    partial_provider = FakeProvider("whisper_stt_partial")
+    primary_provider.mark_ready(primary)
+    monkeypatch.setattr(resources, "whisper", primary_provider)
+    monkeypatch.setattr(resources, "whisper_partial", partial_provider)
+    latency = SttTierLatency()
+    monkeypatch.setattr(speech, "stt_tier_latency", latency)
+    return SimpleNamespace(primary=primary, partial=partial, partial_provider=partial_provider, latency=latency)
+
+
+def test_partials_fall_back_to_primary_until_partial_tier_is_ready(tiers):
+    samples = np.zeros(1600, dtype=np.float32)
+
+    assert speech.transcribe_words(samples, "en", None, partial=True)[0][2] == " primary"
+    tiers.partial_provider.mark_ready(tiers.partial)
+    assert speech.transcribe_words(samples, "en", None, partial=True)[0][2] == " partial"
+    assert speech.transcribe_words(samples, "en", None)[0][2] == " primary"
+
+    snapshot = tiers.latency.snapshot()
+    assert snapshot["primary"]["count"] == 2
+    assert snapshot["partial"]["count"] == 1
+
+
+def test_uploads_always_use_primary_tier(tiers):
+    tiers.partial_provider.mark_ready(tiers.partial)
+
+    assert speech.transcribe_audio(np.zeros(1600, dtype=np.float32), "en") == "primary"
+    assert tiers.partial.calls == 0
+    assert tiers.latency.snapshot()["primary"]["count"] == 1
+
+
+def test_partial_provider_refuses_to_load_without_a_model(monkeypatch):
+    from resources.whisper import WhisperProvider
+
+    monkeypatch.delenv("WHISPER_PARTIAL_MODEL", raising=False)
+    provider = WhisperProvider("whisper_stt_partial", model_env="WHISPER_PARTIAL_MODEL", default_model="", required=False)
+    assert provider.model_name == ""
+    with pytest.raises(RuntimeError, match="WHISPER_PARTIAL_MODEL"):
+        asyncio.run(provider.initialize())
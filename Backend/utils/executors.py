@@ -0,0 +1,135 @@
+"""Named thread pools, one per workload, instead of asyncio's shared default.
+
+A handful of 30 s Playwright runs used to be able to take every thread of
+the default pool that `asyncio.to_thread` draws from, stalling speech for
+every session. Each workload now gets its own bounded pool:
+
+- speech-stt: Whisper inference, sized to STT_WORKERS (the scheduler gate)
+- speech-tts: Piper synthesis
+- browser:    GoogleCalendarAgent (Playwright) automations
+- io:         audio decode, Silero VAD, Google Calendar API, FAISS loads,
+              SQLite chores
+
+Intra-op threads are coordinated with the pool sizes: by default every
+concurrently running STT or TTS job gets an equal share of the cores
+(cpu_count // (stt workers + tts workers)), passed to CTranslate2 as
+`cpu_threads` and to ONNX Runtime as `intra_op_num_threads`, so parallel
+jobs don't oversubscribe the CPU.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def _workers(name: str, default: int) -> int:
+    return max(1, int(os.getenv(name, str(default))))
+
+
+EXECUTOR_STT_WORKERS = _workers("EXECUTOR_STT_WORKERS", _workers("STT_WORKERS", 1))
+EXECUTOR_TTS_WORKERS = _workers("EXECUTOR_TTS_WORKERS", 2)
+EXECUTOR_BROWSER_WORKERS = _workers("EXECUTOR_BROWSER_WORKERS", 2)
+EXECUTOR_IO_WORKERS = _workers("EXECUTOR_IO_WORKERS", 8)
+
+_CPU_COUNT = os.cpu_count() or 1
+_DEFAULT_INTRA_OP = max(1, _CPU_COUNT // (EXECUTOR_STT_WORKERS + EXECUTOR_TTS_WORKERS))
+
+WHISPER_CPU_THREADS = _workers("WHISPER_CPU_THREADS", _DEFAULT_INTRA_OP)
+PIPER_INTRA_OP_THREADS = _workers("PIPER_INTRA_OP_THREADS", _DEFAULT_INTRA_OP)
+
+
+class NamedExecutor:
+    """A ThreadPoolExecutor with queue-depth and active-worker counters."""
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _call(self, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            result = fn()
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        else:
+            with self._lock:
+                self.completed += 1
+            return result
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> asyncio.Future:
+        """Schedule `fn` on this pool from the event loop, keeping contextvars
+        like `asyncio.to_thread` does. The returned future may be left
+        un-awaited for fire-and-forget producers."""
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        with self._lock:
+            self.queued += 1
+        try:
+            return loop.run_in_executor(self._pool, self._call, call)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            raise
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Drop-in replacement for `asyncio.to_thread` on this pool."""
+        return await self.submit(fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "queued": self.queued,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+
+stt_executor = NamedExecutor("speech-stt", EXECUTOR_STT_WORKERS)
+tts_executor = NamedExecutor("speech-tts", EXECUTOR_TTS_WORKERS)
+browser_executor = NamedExecutor("browser", EXECUTOR_BROWSER_WORKERS)
+io_executor = NamedExecutor("io", EXECUTOR_IO_WORKERS)
+
+EXECUTORS = {
+    executor.name: executor
+    for executor in (stt_executor, tts_executor, browser_executor, io_executor)
+}
+
+
+def executors_snapshot() -> dict[str, Any]:
+    snapshot: dict[str, Any] = {name: executor.snapshot() for name, executor in EXECUTORS.items()}
+    snapshot["intra_op_threads"] = {
+        "cpu_count": _CPU_COUNT,
+        "whisper": WHISPER_CPU_THREADS,
+        "piper": PIPER_INTRA_OP_THREADS,
+    }
+    return snapshot
+
+
+def shutdown_executors() -> None:
+    for executor in EXECUTORS.values():
+        executor.shutdown()
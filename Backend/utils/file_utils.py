@@ -1,10 +1,63 @@
 import os
 import tempfile
+from collections.abc import AsyncIterator
+
 from fastapi import UploadFile
 
-def save_temp_file(upload_file: UploadFile) -> str:
+from utils.executors import io_executor
+
+UPLOAD_CHUNK_BYTES = max(4096, int(os.getenv("UPLOAD_CHUNK_BYTES", str(1 << 20))))
+UPLOAD_MAX_BYTES = max(1, int(os.getenv("UPLOAD_MAX_BYTES", str(512 << 20))))
+
+
+class UploadTooLarge(ValueError):
+  """Raised when an upload exceeds UPLOAD_MAX_BYTES."""
+
+
+def save_temp_file(upload_file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> str:
+  """Copy an upload to a temp file in UPLOAD_CHUNK_BYTES pieces."""
   suffix = os.path.splitext(upload_file.filename or "")[1] or ".webm"
   fd, path = tempfile.mkstemp(suffix=suffix)
-  with os.fdopen(fd, "wb") as f:
-    f.write(upload_file.file.read())
+  try:
+    with os.fdopen(fd, "wb") as f:
+      total = 0
+      while chunk := upload_file.file.read(UPLOAD_CHUNK_BYTES):
+        total += len(chunk)
+        if total > max_bytes:
+          raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+        f.write(chunk)
+  except BaseException:
+    os.unlink(path)
+    raise
+  return path
+
+
+async def save_stream_to_temp(
+  chunks: AsyncIterator[bytes],
+  suffix: str = ".bin",
+  max_bytes: int = UPLOAD_MAX_BYTES,
+) -> str:
+  """Spool an async byte stream (e.g. a raw request body) to a temp file.
+
+  Pieces are coalesced to UPLOAD_CHUNK_BYTES before each write, so memory
+  stays at one buffer whatever the body size.
+  """
+  fd, path = tempfile.mkstemp(suffix=suffix)
+  try:
+    with os.fdopen(fd, "wb") as f:
+      total = 0
+      pending = bytearray()
+      async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+          raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+        pending.extend(chunk)
+        if len(pending) >= UPLOAD_CHUNK_BYTES:
+          await io_executor.run(f.write, bytes(pending))
+          pending.clear()
+      if pending:
+        await io_executor.run(f.write, bytes(pending))
+  except BaseException:
+    os.unlink(path)
+    raise
   return path
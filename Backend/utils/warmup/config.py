@@ -56,6 +56,7 @@ class WarmupConfig:
     retries:          int   = 2
     retry_delay:      float = 1.0
     whisper_enabled:  bool  = True
+    whisper_partial_enabled: bool = False
     piper_zh_enabled: bool  = True
     piper_en_enabled: bool  = True
     openai_enabled:   bool  = True
@@ -96,6 +97,10 @@ def load_config() -> WarmupConfig:
             "WARMUP_RETRY_DELAY", _float("WARMUP_RETRY_DELAY", 1.0), 0
         )),
         whisper_enabled  = _bool( "WARMUP_WHISPER_ENABLED",  True),
+        whisper_partial_enabled = _bool(
+            "WARMUP_WHISPER_PARTIAL_ENABLED",
+            bool(os.getenv("WHISPER_PARTIAL_MODEL", "").strip()),
+        ),
         piper_zh_enabled = _bool( "WARMUP_PIPER_ZH_ENABLED", True),
         piper_en_enabled = _bool( "WARMUP_PIPER_EN_ENABLED", True),
         openai_enabled   = _bool( "WARMUP_OPENAI_ENABLED",   True),
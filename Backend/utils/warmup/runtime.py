@@ -40,6 +40,7 @@ class WarmupRuntime:
     def _wire_tasks(self) -> None:
         enabled = {
             "whisper_stt": self.config.whisper_enabled,
+            "whisper_stt_partial": self.config.whisper_partial_enabled,
             "piper_tts_zh": self.config.piper_zh_enabled,
             "piper_tts_en": self.config.piper_en_enabled,
             "openai": self.config.openai_enabled,